@@ -0,0 +1,477 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    AbstractSet,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING:
+    from reader_app.image_catalog import ImageCatalogEntry
+
+
+def normalize_terms(
+    terms: Iterable[str], normalize: Callable[[str], str] = str.lower
+) -> FrozenSet[str]:
+    return frozenset(normalize(term) for term in terms)
+
+
+def compound_parts(term: str) -> List[str]:
+    """Words of a normalized catalog term; several for "sun rise"."""
+    return term.split(" ")
+
+
+def expand_compounds(
+    terms: AbstractSet[str], compounds: Dict[str, Iterable[str]]
+) -> AbstractSet[str]:
+    """``terms`` plus every multi-word catalog term whose words all occur.
+
+    ``compounds`` maps the first word of each multi-word term to the terms
+    starting with it.
+    """
+    found = [
+        compound
+        for term in terms
+        for compound in compounds.get(term, ())
+        if all(part in terms for part in compound_parts(compound))
+    ]
+    return terms.union(found) if found else terms
+
+
+def range_bounds(entry: ImageCatalogEntry) -> Tuple[float, float]:
+    """Closed interval of offsets accepted by ``entry.matches_range``."""
+    if entry.start_offset is None and entry.end_offset is None:
+        return -math.inf, math.inf
+    start = entry.start_offset if entry.start_offset is not None else 0
+    end = entry.end_offset if entry.end_offset is not None else math.inf
+    return start, end
+
+
+Interval = Tuple[float, float, int]
+# (-weight, id, slot, entry): slots are unique, so entries are never compared
+RankRow = Tuple[int, str, int, "ImageCatalogEntry"]
+
+
+class _IntervalNode:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, intervals: List[Interval]) -> None:
+        endpoints = sorted(
+            bound
+            for lo, hi, _ in intervals
+            for bound in (lo, hi)
+            if not math.isinf(bound)
+        )
+        self.center = endpoints[len(endpoints) // 2] if endpoints else 0
+        left: List[Interval] = []
+        right: List[Interval] = []
+        overlapping: List[Interval] = []
+        for interval in intervals:
+            lo, hi, _ = interval
+            if hi < self.center:
+                left.append(interval)
+            elif lo > self.center:
+                right.append(interval)
+            else:
+                overlapping.append(interval)
+        self.by_start = sorted(overlapping, key=lambda interval: interval[0])
+        self.by_end = sorted(overlapping, key=lambda interval: -interval[1])
+        self.left = _IntervalNode(left) if left else None
+        self.right = _IntervalNode(right) if right else None
+
+
+class IntervalTree:
+    """Static centered interval tree answering stabbing queries.
+
+    ``stab(point)`` returns the slots of every closed interval containing
+    ``point`` in O(log n + k). Empty intervals (start after end) are dropped
+    at build time since no offset can fall inside them.
+    """
+
+    def __init__(self, intervals: Iterable[Interval]) -> None:
+        kept = [interval for interval in intervals if interval[0] <= interval[1]]
+        self._root = _IntervalNode(kept) if kept else None
+
+    def stab(self, point: float) -> List[int]:
+        found: List[int] = []
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                for lo, _, slot in node.by_start:
+                    if lo > point:
+                        break
+                    found.append(slot)
+                node = node.left
+            elif point > node.center:
+                for _, hi, slot in node.by_end:
+                    if hi < point:
+                        break
+                    found.append(slot)
+                node = node.right
+            else:
+                found.extend(slot for _, _, slot in node.by_start)
+                node = None
+        return found
+
+
+@dataclass(frozen=True)
+class IndexedEntry:
+    slot: int
+    entry: ImageCatalogEntry
+    keywords: FrozenSet[str]
+    tags: FrozenSet[str]
+    start: float
+    end: float
+
+    @property
+    def chapter_key(self) -> Optional[str]:
+        return self.entry.chapter or None
+
+
+class _ChapterBucket:
+    """Entries sharing one ``chapter`` value plus their term postings.
+
+    The interval tree is rebuilt lazily on the first query after the bucket
+    changes, so bulk edits only pay for one rebuild.
+    """
+
+    def __init__(self) -> None:
+        self.slots: Dict[int, IndexedEntry] = {}
+        self.keyword_postings: Dict[str, Set[int]] = {}
+        self.tag_postings: Dict[str, Set[int]] = {}
+        self._tree: Optional[IntervalTree] = None
+
+    def covering(self, offset: int) -> List[int]:
+        if self._tree is None:
+            self._tree = IntervalTree(
+                (item.start, item.end, slot) for slot, item in self.slots.items()
+            )
+        return self._tree.stab(offset)
+
+    def add(self, item: IndexedEntry) -> None:
+        self.slots[item.slot] = item
+        self._tree = None
+        for term in item.keywords:
+            self.keyword_postings.setdefault(term, set()).add(item.slot)
+        for term in item.tags:
+            self.tag_postings.setdefault(term, set()).add(item.slot)
+
+    def remove(self, item: IndexedEntry) -> None:
+        self.slots.pop(item.slot, None)
+        self._tree = None
+        _discard_postings(self.keyword_postings, item.keywords, item.slot)
+        _discard_postings(self.tag_postings, item.tags, item.slot)
+
+    def __bool__(self) -> bool:
+        return bool(self.slots)
+
+
+def _discard_postings(
+    postings: Dict[str, Set[int]], terms: Iterable[str], slot: int
+) -> None:
+    for term in terms:
+        bucket = postings.get(term)
+        if bucket is None:
+            continue
+        bucket.discard(slot)
+        if not bucket:
+            del postings[term]
+
+
+class RankedEntries(Sequence["ImageCatalogEntry"]):
+    """Candidates in rank order, sorted only as deep as they are read.
+
+    ``rows`` hold the candidates a query term matched. The others rank by
+    priority, id and slot alone, so they are passed as positions ``plain``
+    into ``plain_rows``, the rows of all entries in that order. The first
+    ``k`` candidates come from a
+    heap selection; reading past them redoes it at least twice as deep, so
+    a full walk costs about one sort.
+    """
+
+    __slots__ = ("_rows", "_plain", "_plain_rows", "_ranked")
+
+    def __init__(
+        self,
+        rows: List[RankRow],
+        plain: List[int],
+        plain_rows: List[RankRow],
+        k: int,
+    ) -> None:
+        self._rows = rows
+        self._plain = plain
+        self._plain_rows = plain_rows
+        self._ranked: List[RankRow] = []
+        self._select(k)
+
+    @property
+    def selected(self) -> int:
+        """How many leading candidates are ranked so far."""
+        return len(self._ranked)
+
+    def _select(self, count: int) -> None:
+        count = min(count, len(self))
+        if count <= len(self._ranked):
+            return
+        rows = heapq.nsmallest(count, self._rows)
+        plain = [self._plain_rows[rank] for rank in heapq.nsmallest(count, self._plain)]
+        merged = heapq.merge(rows, plain)
+        self._ranked = list(itertools.islice(merged, count))
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._plain)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            self._select(stop if step > 0 else len(self))
+            return [row[3] for row in self._ranked[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("candidate index out of range")
+        if index >= len(self._ranked):
+            self._select(max(index + 1, 2 * len(self._ranked)))
+        return self._ranked[index][3]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"RankedEntries({len(self)} candidates, {self.selected} ranked)"
+
+
+class CatalogIndex:
+    """Chapter-partitioned inverted index over catalog keywords and tags.
+
+    Each chapter bucket also keeps an interval tree over the entries' offset
+    ranges, so only entries covering the current offset are scored. Entries
+    without a chapter live in the ``None`` bucket and are offered for
+    every chapter, mirroring the filter in ``ImageCatalog.find_for_context``.
+    Every stored entry gets an integer slot so duplicate ids keep their
+    insertion order when weights tie. ``normalize`` maps keywords and tags
+    to the terms that queries are compared against; a multi-word term
+    matches when all of its words are among the query terms.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[ImageCatalogEntry] = (),
+        normalize: Callable[[str], str] = str.lower,
+    ) -> None:
+        self.normalize = normalize
+        self._items: Dict[int, IndexedEntry] = {}
+        self._buckets: Dict[Optional[str], _ChapterBucket] = {}
+        self._slots_by_id: Dict[str, List[int]] = {}
+        # first word -> multi-word terms in use, with their entry counts
+        self._compounds: Dict[str, Dict[str, int]] = {}
+        # unscored rows in rank order and each slot's position, rebuilt after
+        # edits; one tuple so a concurrent reader never mixes two builds
+        self._plain_order: Optional[Tuple[List[RankRow], Dict[int, int]]] = None
+        self._next_slot = 0
+        for entry in entries:
+            self.add(entry)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(
+        self,
+        entry: ImageCatalogEntry,
+        keywords: Optional[FrozenSet[str]] = None,
+        tags: Optional[FrozenSet[str]] = None,
+    ) -> IndexedEntry:
+        """Index ``entry``; ``keywords``/``tags`` may pass already normalized terms."""
+        start, end = range_bounds(entry)
+        if keywords is None:
+            keywords = normalize_terms(entry.keywords, self.normalize)
+        if tags is None:
+            tags = normalize_terms(entry.tags, self.normalize)
+        item = IndexedEntry(
+            slot=self._next_slot,
+            entry=entry,
+            keywords=keywords,
+            tags=tags,
+            start=start,
+            end=end,
+        )
+        self._next_slot += 1
+        self._items[item.slot] = item
+        self._slots_by_id.setdefault(entry.id, []).append(item.slot)
+        self._buckets.setdefault(item.chapter_key, _ChapterBucket()).add(item)
+        self._count_compounds(item, 1)
+        self._plain_order = None
+        return item
+
+    def _count_compounds(self, item: IndexedEntry, delta: int) -> None:
+        for term in item.keywords | item.tags:
+            if " " not in term:
+                continue
+            first = compound_parts(term)[0]
+            counts = self._compounds.setdefault(first, {})
+            counts[term] = counts.get(term, 0) + delta
+            if counts[term] <= 0:
+                del counts[term]
+                if not counts:
+                    del self._compounds[first]
+
+    def remove(self, entry_id: str) -> List[ImageCatalogEntry]:
+        removed: List[ImageCatalogEntry] = []
+        for slot in self._slots_by_id.pop(entry_id, []):
+            item = self._items.pop(slot)
+            bucket = self._buckets[item.chapter_key]
+            bucket.remove(item)
+            if not bucket:
+                del self._buckets[item.chapter_key]
+            self._count_compounds(item, -1)
+            self._plain_order = None
+            removed.append(item.entry)
+        return removed
+
+    def _buckets_for(self, chapter: Optional[str]) -> List[_ChapterBucket]:
+        if not chapter:
+            return list(self._buckets.values())
+        return [
+            bucket
+            for bucket in (self._buckets.get(chapter), self._buckets.get(None))
+            if bucket is not None
+        ]
+
+    def _bonuses(
+        self, buckets: List[_ChapterBucket], terms: FrozenSet[str]
+    ) -> Dict[int, int]:
+        bonuses: Dict[int, int] = {}
+        for bucket in buckets:
+            for term in terms:
+                for slot in bucket.keyword_postings.get(term, ()):
+                    bonuses[slot] = bonuses.get(slot, 0) + 1
+                for slot in bucket.tag_postings.get(term, ()):
+                    bonuses[slot] = bonuses.get(slot, 0) + 2
+        return bonuses
+
+    def covering(self, chapter: Optional[str], offset: int) -> List[ImageCatalogEntry]:
+        return [
+            bucket.slots[slot].entry
+            for bucket in self._buckets_for(chapter)
+            for slot in bucket.covering(offset)
+        ]
+
+    def rank(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        keywords: Iterable[str],
+    ) -> List[Tuple[int, ImageCatalogEntry]]:
+        return self.rank_terms(
+            chapter, offset, normalize_terms(keywords, self.normalize)
+        )
+
+    def rank_terms(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: FrozenSet[str],
+    ) -> List[Tuple[int, ImageCatalogEntry]]:
+        """Like ``rank`` for query terms that are already normalized."""
+        ranked = self._rows(chapter, offset, terms)
+        ranked.sort(key=lambda row: row[:3])
+        return [(-weight, entry) for weight, _, _, entry in ranked]
+
+    def top_terms(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: FrozenSet[str],
+        k: int,
+    ) -> RankedEntries:
+        """``rank_terms`` entries with only the best ``k`` ranked up front."""
+        rows, plain = self._candidates(chapter, offset, terms)
+        order = self._plain_order
+        if order is None:
+            order = self._plain_order = self._build_plain_order()
+        try:
+            plain_ranks = list(map(order[1].__getitem__, plain))
+        except KeyError:
+            # an entry was added while ``order`` was read
+            order = self._plain_order = self._build_plain_order()
+            plain_ranks = list(map(order[1].__getitem__, plain))
+        return RankedEntries(rows, plain_ranks, order[0], k)
+
+    def _build_plain_order(self) -> Tuple[List[RankRow], Dict[int, int]]:
+        plain_rows = sorted(
+            (-item.entry.priority, item.entry.id, item.slot, item.entry)
+            for item in list(self._items.values())
+        )
+        return plain_rows, {row[2]: rank for rank, row in enumerate(plain_rows)}
+
+    def best_with_id(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: FrozenSet[str],
+        entry_id: str,
+    ) -> Optional[ImageCatalogEntry]:
+        """Best-ranked candidate with ``entry_id``, found without ranking the rest."""
+        if self._compounds:
+            terms = expand_compounds(frozenset(terms), self._compounds)
+        best: Optional[Tuple[int, int]] = None
+        for slot in self._slots_by_id.get(entry_id, ()):
+            item = self._items[slot]
+            if chapter and item.chapter_key not in (None, chapter):
+                continue
+            if not item.start <= offset <= item.end:
+                continue
+            weight = (
+                item.entry.priority
+                + len(item.keywords & terms)
+                + 2 * len(item.tags & terms)
+            )
+            if best is None or (-weight, slot) < best:
+                best = (-weight, slot)
+        return self._items[best[1]].entry if best is not None else None
+
+    def _plain_row(self, slot: int) -> RankRow:
+        entry = self._items[slot].entry
+        return (-entry.priority, entry.id, slot, entry)
+
+    def _candidates(
+        self, chapter: Optional[str], offset: int, terms: FrozenSet[str]
+    ) -> Tuple[List[RankRow], List[int]]:
+        """Rows of the covering entries a term matched, slots of the others."""
+        buckets = self._buckets_for(chapter)
+        if self._compounds:
+            terms = expand_compounds(frozenset(terms), self._compounds)
+        bonuses = self._bonuses(buckets, terms)
+        rows: List[RankRow] = []
+        plain: List[int] = []
+        for bucket in buckets:
+            covering = bucket.covering(offset)
+            if not bonuses:
+                plain.extend(covering)
+                continue
+            plain.extend([slot for slot in covering if slot not in bonuses])
+            for slot in [slot for slot in covering if slot in bonuses]:
+                entry = bucket.slots[slot].entry
+                rows.append((-(entry.priority + bonuses[slot]), entry.id, slot, entry))
+        return rows, plain
+
+    def _rows(
+        self, chapter: Optional[str], offset: int, terms: FrozenSet[str]
+    ) -> List[RankRow]:
+        rows, plain = self._candidates(chapter, offset, terms)
+        rows.extend(map(self._plain_row, plain))
+        return rows
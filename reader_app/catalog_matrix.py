@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from typing import AbstractSet, Dict, List, Optional, Sequence, Tuple
+
+from reader_app.catalog_index import (
+    compound_parts,
+    expand_compounds,
+    normalize_terms,
+    range_bounds,
+)
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+
+try:
+    import numpy as np
+except ImportError:  # optional: the catalog index ranks without it
+    np = None
+
+HAVE_NUMPY = np is not None
+# score cells (contexts x entries) materialized per step of a batch
+BATCH_CELL_BUDGET = 1 << 22
+KEYWORD_WEIGHT = 1
+TAG_WEIGHT = 2
+# chapter codes: entries without a chapter, contexts without one, and
+# contexts naming a chapter no entry uses
+_NO_CHAPTER = -1
+_ANY_CHAPTER = -2
+_UNKNOWN_CHAPTER = -3
+
+Query = Tuple[Optional[str], int, AbstractSet[str]]
+
+
+class CatalogMatrix:
+    """The catalog as NumPy arrays for vectorized ranking.
+
+    Term weights form a sparse term-by-entry matrix in CSR layout
+    (``term_bounds``, ``term_entries``, ``term_weights``; a keyword adds 1,
+    a tag 2) next to per-entry ``priority``, chapter codes and offset
+    bounds. ``rank`` and ``rank_many`` return positions in the
+    ``catalog.entries()`` snapshot taken at construction, in exactly the
+    order ``ImageCatalog.find_for_terms`` returns: weight descending, then
+    id, then catalog order. Needs numpy; check ``HAVE_NUMPY`` first.
+    """
+
+    def __init__(self, catalog: ImageCatalog) -> None:
+        if np is None:
+            raise RuntimeError("CatalogMatrix requires numpy")
+        self.version = catalog.version
+        self.entries: List[ImageCatalogEntry] = catalog.entries()
+        normalize = catalog.tokenizer.normalize
+        count = len(self.entries)
+        postings: Dict[str, Dict[int, int]] = {}
+        chapters: Dict[str, int] = {}
+        chapter_codes = np.full(count, _NO_CHAPTER, dtype=np.int64)
+        starts = np.empty(count, dtype=np.float64)
+        ends = np.empty(count, dtype=np.float64)
+        for position, entry in enumerate(self.entries):
+            for terms, weight in (
+                (entry.keywords, KEYWORD_WEIGHT),
+                (entry.tags, TAG_WEIGHT),
+            ):
+                for term in normalize_terms(terms, normalize):
+                    row = postings.setdefault(term, {})
+                    row[position] = row.get(position, 0) + weight
+            if entry.chapter:
+                chapter_codes[position] = chapters.setdefault(
+                    entry.chapter, len(chapters)
+                )
+            starts[position], ends[position] = range_bounds(entry)
+
+        self.terms = {term: index for index, term in enumerate(postings)}
+        self._compounds: Dict[str, List[str]] = {}
+        for term in postings:
+            if " " in term:
+                self._compounds.setdefault(compound_parts(term)[0], []).append(term)
+        bounds = [0]
+        columns: List[int] = []
+        weights: List[int] = []
+        for row in postings.values():
+            columns.extend(row)
+            weights.extend(row.values())
+            bounds.append(len(columns))
+        self.term_bounds = np.array(bounds, dtype=np.int64)
+        self.term_entries = np.array(columns, dtype=np.int64)
+        self.term_weights = np.array(weights, dtype=np.int64)
+        self.priority = np.array(
+            [entry.priority for entry in self.entries], dtype=np.int64
+        )
+        self.chapter_codes = chapter_codes
+        self.starts = starts
+        self.ends = ends
+        self._chapters = chapters
+        order = sorted(
+            range(count), key=lambda position: (self.entries[position].id, position)
+        )
+        self.tie_rank = np.empty(count, dtype=np.int64)
+        self.tie_rank[order] = np.arange(count, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def rank(
+        self, chapter: Optional[str], offset: int, terms: AbstractSet[str]
+    ) -> List[int]:
+        """Ranked entry positions for one context."""
+        _, positions = self.rank_many([(chapter, offset, terms)])
+        return positions.tolist()
+
+    def find_for_terms(
+        self, chapter: Optional[str], offset: int, terms: AbstractSet[str]
+    ) -> List[ImageCatalogEntry]:
+        ranked = self.rank(chapter, offset, terms)
+        return [self.entries[position] for position in ranked]
+
+    def rank_many(
+        self, queries: Sequence[Query], limit: Optional[int] = None
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Rank a batch of (chapter, offset, terms) contexts at once.
+
+        Returns each context's candidate count and all ranked positions
+        concatenated in query order, the row layout ``ImageSchedule`` uses.
+        ``limit`` keeps only the best candidates of each context.
+        """
+        step = max(1, BATCH_CELL_BUDGET // max(1, len(self.entries)))
+        lengths = [np.zeros(0, dtype=np.int64)]
+        positions = [np.zeros(0, dtype=np.int64)]
+        for first in range(0, len(queries), step):
+            chunk_lengths, chunk_positions = self._rank_chunk(
+                queries[first : first + step], limit
+            )
+            lengths.append(chunk_lengths)
+            positions.append(chunk_positions)
+        return np.concatenate(lengths), np.concatenate(positions)
+
+    def _rank_chunk(
+        self, queries: Sequence[Query], limit: Optional[int] = None
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        count = len(self.entries)
+        query_rows: List[int] = []
+        query_terms: List[int] = []
+        codes: List[int] = []
+        offsets: List[int] = []
+        for row, (chapter, offset, terms) in enumerate(queries):
+            if self._compounds:
+                terms = expand_compounds(frozenset(terms), self._compounds)
+            for term in terms:
+                index = self.terms.get(term)
+                if index is not None:
+                    query_rows.append(row)
+                    query_terms.append(index)
+            if chapter:
+                codes.append(self._chapters.get(chapter, _UNKNOWN_CHAPTER))
+            else:
+                codes.append(_ANY_CHAPTER)
+            offsets.append(offset)
+
+        scores = np.tile(self.priority, (len(queries), 1))
+        if query_terms:
+            term_ids = np.array(query_terms, dtype=np.int64)
+            firsts = self.term_bounds[term_ids]
+            sizes = self.term_bounds[term_ids + 1] - firsts
+            total = int(sizes.sum())
+            # expand every (context, term) pair into that term's postings
+            rows = np.repeat(np.array(query_rows, dtype=np.int64), sizes)
+            within = np.arange(total, dtype=np.int64) - np.repeat(
+                np.cumsum(sizes) - sizes, sizes
+            )
+            postings = np.repeat(firsts, sizes) + within
+            np.add.at(
+                scores,
+                (rows, self.term_entries[postings]),
+                self.term_weights[postings],
+            )
+
+        chapter_codes = np.array(codes, dtype=np.int64)[:, None]
+        points = np.array(offsets, dtype=np.float64)[:, None]
+        eligible = (
+            (self.chapter_codes == _NO_CHAPTER)
+            | (self.chapter_codes == chapter_codes)
+            | (chapter_codes == _ANY_CHAPTER)
+        )
+        eligible &= (self.starts <= points) & (points <= self.ends)
+        keys = self.tie_rank - scores * count
+        keys[~eligible] = np.iinfo(np.int64).max
+        lengths = eligible.sum(axis=1)
+        if limit is not None and limit < count:
+            # select each row's best ``limit`` keys, then order only those
+            lengths = np.minimum(lengths, limit)
+            if limit <= 0:
+                return lengths, np.zeros(0, dtype=np.int64)
+            order = np.argpartition(keys, limit - 1, axis=1)[:, :limit]
+            selected = np.take_along_axis(keys, order, axis=1)
+            order = np.take_along_axis(order, np.argsort(selected, axis=1), axis=1)
+        else:
+            order = np.argsort(keys, axis=1)
+        keep = np.arange(order.shape[1]) < lengths[:, None]
+        return lengths, order[keep]
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import yaml
+
+from reader_app.catalog_index import range_bounds
+from reader_app.image_catalog import ImageCatalogEntry, read_yaml_entries
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _group(entries: Sequence[ImageCatalogEntry]) -> Dict[str, List[ImageCatalogEntry]]:
+    groups: Dict[str, List[ImageCatalogEntry]] = {}
+    for entry in entries:
+        groups.setdefault(entry.id, []).append(entry)
+    return groups
+
+
+@dataclass
+class CatalogDiff:
+    """Entry-level difference between two versions of a catalog.
+
+    ``old``/``new`` hold, for every touched id only, the entries carrying
+    that id before and after; an added id is missing from ``old`` and a
+    removed one from ``new``. ``entries`` is the complete new entry list in
+    file order.
+    """
+
+    entries: List[ImageCatalogEntry]
+    old: Dict[str, List[ImageCatalogEntry]] = field(default_factory=dict)
+    new: Dict[str, List[ImageCatalogEntry]] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return bool(self.old or self.new)
+
+    @property
+    def added(self) -> List[str]:
+        return [entry_id for entry_id in self.new if entry_id not in self.old]
+
+    @property
+    def removed(self) -> List[str]:
+        return [entry_id for entry_id in self.old if entry_id not in self.new]
+
+    @property
+    def changed(self) -> List[str]:
+        return [entry_id for entry_id in self.new if entry_id in self.old]
+
+    def touched(self) -> Set[str]:
+        return set(self.old) | set(self.new)
+
+    def affects(self, chapter: Optional[str], offset: int) -> bool:
+        """Whether any touched entry, before or after, is a candidate here."""
+        for group in (*self.old.values(), *self.new.values()):
+            for entry in group:
+                if chapter and entry.chapter and entry.chapter != chapter:
+                    continue
+                start, end = range_bounds(entry)
+                if start <= offset <= end:
+                    return True
+        return False
+
+
+def diff_entries(
+    old: Sequence[ImageCatalogEntry], new: Sequence[ImageCatalogEntry]
+) -> CatalogDiff:
+    before = _group(old)
+    after = _group(new)
+    diff = CatalogDiff(list(new))
+    for entry_id in before.keys() | after.keys():
+        previous = before.get(entry_id, [])
+        current = after.get(entry_id, [])
+        if previous == current:
+            continue
+        if previous:
+            diff.old[entry_id] = previous
+        if current:
+            diff.new[entry_id] = current
+    return diff
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class CatalogWatcher:
+    """Polls a YAML catalog and reports entry-level diffs from a worker thread.
+
+    Parsing and diffing run on the watcher's daemon thread against the
+    entries it last reported, so the caller only applies ``CatalogDiff``
+    objects (see ``ImageCatalog.apply_diff``). ``on_diff`` and ``on_error``
+    are invoked on the watcher thread; GUI code should forward them to its
+    own thread (e.g. through a queued Qt signal). A file that fails to parse
+    is reported and the previous entries are kept.
+    """
+
+    def __init__(
+        self,
+        source: Path,
+        entries: Sequence[ImageCatalogEntry],
+        on_diff: Callable[[CatalogDiff], None],
+        on_error: Optional[Callable[[Exception], None]] = None,
+        interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> None:
+        self.source = source
+        self.interval = interval
+        self._entries = list(entries)
+        self._on_diff = on_diff
+        self._on_error = on_error
+        self._stamp = _stamp(source)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="catalog-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self) -> Optional[CatalogDiff]:
+        """Check the file once; return (and report) the diff if it changed."""
+        stamp = _stamp(self.source)
+        if stamp is None or stamp == self._stamp:
+            return None
+        self._stamp = stamp
+        try:
+            entries = read_yaml_entries(self.source)
+        except (OSError, yaml.YAMLError, KeyError, TypeError, ValueError) as error:
+            if self._on_error is not None:
+                self._on_error(error)
+            return None
+        diff = diff_entries(self._entries, entries)
+        self._entries = entries
+        if diff:
+            self._on_diff(diff)
+        return diff
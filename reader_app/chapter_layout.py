@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Tuple
+
+
+def document_length(text: str) -> int:
+    """Length of ``text`` in ``QTextDocument`` positions (UTF-16 units)."""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def paragraph_starts(title: str, paragraphs: Sequence[str]) -> List[int]:
+    """Document position of every paragraph block of a laid out chapter.
+
+    The layout is the heading block followed by one block per paragraph;
+    each block separator takes one position. A sentinel one past the end of
+    the last block closes the list, so paragraph ``i`` spans
+    ``starts[i]`` to ``starts[i + 1] - 1``.
+    """
+    position = document_length(title)
+    starts = []
+    for text in paragraphs:
+        position += 1
+        starts.append(position)
+        position += document_length(text)
+    starts.append(position + 1)
+    return starts
+
+
+def highlight_range(starts: Sequence[int], index: int) -> Optional[Tuple[int, int]]:
+    """(start, end) positions of paragraph ``index``; None when out of range."""
+    if index < 0 or index + 1 >= len(starts):
+        return None
+    return starts[index], starts[index + 1] - 1
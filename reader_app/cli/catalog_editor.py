@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import argparse
+import sys
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Iterable, List, Optional, Sequence
 
 from reader_app.image_catalog import ImageCatalog
+from reader_app.image_check import check_cache_path, deep_validate
 
 
 def describe_entry(entry) -> str:
@@ -27,6 +29,43 @@ def validate_entries(entries: Sequence) -> None:
         print("Catalog looks healthy.")
 
 
+def print_progress(done: int, total: int, width: int = 30) -> None:
+    filled = width * done // total if total else width
+    bar = "#" * filled + "-" * (width - filled)
+    end = "\n" if done >= total else ""
+    print(f"\r[{bar}] {done}/{total}", end=end, file=sys.stderr, flush=True)
+
+
+def deep_validate_entries(
+    catalog_path: Path,
+    entries: Sequence,
+    workers: Optional[int],
+    roots: Optional[List[Path]],
+    use_cache: bool = True,
+) -> bool:
+    report = deep_validate(
+        entries,
+        cache_path=check_cache_path(catalog_path) if use_cache else None,
+        workers=workers,
+        roots=roots,
+        progress=print_progress if sys.stderr.isatty() else None,
+    )
+    print(f"Checked {len(report.checks)} image files ({report.cached} unchanged).")
+    for title, lines in (
+        ("Image file errors:", report.errors),
+        (
+            "Duplicate image files:",
+            [" = ".join(map(str, paths)) for paths in report.duplicates],
+        ),
+        ("Images not referenced by the catalog:", report.orphans),
+    ):
+        if lines:
+            print(title)
+            for line in lines:
+                print(" -", line)
+    return not report.errors
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Inspect or validate an image catalog."
@@ -39,8 +78,35 @@ def main() -> None:
         action="store_true",
         help="List entries whose image files are missing on disk",
     )
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Write the binary form that ImageCatalog.load prefers while it is current",
+    )
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Decode image headers, find duplicate and orphaned image files",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Threads used by --deep"
+    )
+    parser.add_argument(
+        "--images-root",
+        type=Path,
+        action="append",
+        help="Directory searched recursively for orphans by --deep (repeatable)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Re-read every image instead of reusing results for unchanged files",
+    )
     args = parser.parse_args()
 
+    if args.compile:
+        target = ImageCatalog.compile(args.catalog)
+        print(f"Compiled {args.catalog} -> {target}")
     catalog = ImageCatalog.load(args.catalog)
     if args.list:
         list_entries(catalog.entries())
@@ -56,6 +122,16 @@ def main() -> None:
                 print(f" - {entry.id}: {entry.path}")
         else:
             print("All referenced image files exist.")
+    if args.deep:
+        healthy = deep_validate_entries(
+            args.catalog,
+            catalog.entries(),
+            args.workers,
+            args.images_root,
+            use_cache=not args.no_cache,
+        )
+        if not healthy:
+            raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from reader_app.catalog_matrix import HAVE_NUMPY
+from reader_app.image_catalog import ImageCatalog
+from reader_app.schedule import DEFAULT_SCHEDULE_DEPTH, schedule_path, write_schedule
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Precompute the image schedule of a book for a catalog."
+    )
+    parser.add_argument("book", type=Path, help="Book text file")
+    parser.add_argument("catalog", type=Path, help="YAML catalog path")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (defaults to the CPU count, 1 runs in-process)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=("auto", "numpy", "python"),
+        default="auto",
+        help=(
+            "numpy batch scoring (the 'fast' extra) or per-paragraph scoring "
+            "(auto: numpy if installed)"
+        ),
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=DEFAULT_SCHEDULE_DEPTH,
+        help="Candidates kept per paragraph (0 keeps all)",
+    )
+    args = parser.parse_args()
+    if args.engine == "numpy" and not HAVE_NUMPY:
+        parser.error("--engine numpy requires numpy (install the 'fast' extra)")
+
+    catalog = ImageCatalog.load(args.catalog)
+    vectorized = None if args.engine == "auto" else args.engine == "numpy"
+    started = time.perf_counter()
+    schedule = write_schedule(
+        args.book, catalog, args.workers, vectorized, args.depth
+    )
+    elapsed = time.perf_counter() - started
+    paragraphs = len(schedule.row_bounds) - 1
+    print(
+        f"Scheduled {paragraphs} paragraphs in {len(schedule)} chapters "
+        f"({len(schedule.candidates)} candidates) in {elapsed:.2f}s"
+    )
+    print(f"Wrote {schedule_path(args.book)}")
+
+
+if __name__ == "__main__":
+    main()
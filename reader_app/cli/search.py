@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from reader_app.reader import BookLoader
+from reader_app.search_index import DEFAULT_RESULT_LIMIT, load_search_index
+from reader_app.tokenizer import Tokenizer
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Search a book's full-text index (built and saved on first use)."
+    )
+    parser.add_argument("book", type=Path, help="Book text file")
+    parser.add_argument("query", help='Words and "quoted phrases"')
+    parser.add_argument("--limit", type=int, default=DEFAULT_RESULT_LIMIT)
+    parser.add_argument("--fold-accents", action="store_true")
+    parser.add_argument("--stem", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = load_search_index(args.book, Tokenizer(args.fold_accents, args.stem))
+    loaded = time.perf_counter()
+    hits = index.search(args.query, args.limit)
+    searched = time.perf_counter()
+    loader = BookLoader(args.book, lazy=True, index_cache=True)
+    for hit in hits:
+        chapter = loader.chapters[hit.chapter_index]
+        text = chapter.paragraphs[hit.paragraph_index].text
+        where = f"{hit.chapter_index}:{hit.paragraph_index}"
+        print(f"{hit.score:7.3f}  {where:>9}  {text[:100]}")
+    loader.close()
+    print(
+        f"{len(hits)} results; index ready in {loaded - started:.2f}s, "
+        f"query took {(searched - loaded) * 1000:.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
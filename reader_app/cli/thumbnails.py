@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+from reader_app.cli.catalog_editor import print_progress
+from reader_app.image_catalog import ImageCatalog
+from reader_app.thumbnails import DEFAULT_THUMBNAIL_EDGES, ThumbnailStore
+from reader_app.ui.thumbnails import generate_thumbnails
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate the downscaled versions of every catalog image."
+    )
+    parser.add_argument("catalog", type=Path, help="YAML catalog path")
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=None,
+        help="Thumbnail cache directory (defaults to ~/.cache/storyglassy/thumbnails)",
+    )
+    parser.add_argument(
+        "--edges",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_THUMBNAIL_EDGES),
+        help="Longest-edge sizes to generate, in pixels",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (defaults to the CPU count)",
+    )
+    args = parser.parse_args()
+
+    catalog = ImageCatalog.load(args.catalog)
+    store = ThumbnailStore(args.cache_dir, args.edges)
+    paths = list(dict.fromkeys(entry.path for entry in catalog.entries()))
+    started = time.perf_counter()
+    results = generate_thumbnails(store, paths, args.workers, print_progress)
+    elapsed = time.perf_counter() - started
+    failed = [path for path, ok in results.items() if not ok]
+    print(
+        f"Thumbnails ready for {len(paths) - len(failed)} of {len(paths)} images "
+        f"in {elapsed:.2f}s ({store.root})"
+    )
+    for path in failed:
+        print(f" - could not read {path}")
+
+
+if __name__ == "__main__":
+    main()
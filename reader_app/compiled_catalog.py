@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import struct
+from array import array
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from reader_app.book_index import ColumnReader, to_le
+from reader_app.tokenizer import Tokenizer
+
+if TYPE_CHECKING:
+    from reader_app.image_catalog import ImageCatalogEntry
+
+COMPILED_SUFFIX = ".sgcat"
+_MAGIC = b"SGCATLG2"
+# magic, source size, source mtime_ns, fold_accents, stem, strings, blob bytes, entries
+_HEADER = struct.Struct("<8sQq??IQI")
+_NONE = 0xFFFFFFFF
+_HAS_START = 1
+_HAS_END = 2
+
+EntryTerms = Tuple[FrozenSet[str], FrozenSet[str]]
+CompiledCatalog = Tuple[List["ImageCatalogEntry"], Optional[List[EntryTerms]]]
+
+
+def compiled_path(source: Path) -> Path:
+    return source.with_name(source.name + COMPILED_SUFFIX)
+
+
+class _StringTable:
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        found = self.ids.get(value)
+        if found is None:
+            found = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return found
+
+
+class _ListColumn:
+    """Variable-length lists of string ids as bounds plus one flat column."""
+
+    def __init__(self) -> None:
+        self.bounds = array("I", [0])
+        self.items = array("I")
+
+    def append(self, ids: Sequence[int]) -> None:
+        self.items.extend(ids)
+        self.bounds.append(len(self.items))
+
+
+def write_compiled(
+    target: Path,
+    source: Path,
+    entries: Sequence[ImageCatalogEntry],
+    tokenizer: Tokenizer,
+) -> None:
+    """Store ``entries`` with every string interned once.
+
+    Besides the raw tags and keywords each entry carries its tokenizer-
+    normalized term sets, so loading with the same tokenizer skips
+    normalization. ``source``'s size and mtime are recorded to detect edits.
+    """
+    strings = _StringTable()
+    scalars = {
+        "I": [array("I") for _ in range(5)],
+        "q": [array("q") for _ in range(3)],
+    }
+    ids, paths, titles, chapters, descriptions = scalars["I"]
+    priorities, starts, ends = scalars["q"]
+    flags = array("B")
+    lists = [_ListColumn() for _ in range(4)]
+    for entry in entries:
+        ids.append(strings.intern(entry.id))
+        paths.append(strings.intern(str(entry.path)))
+        titles.append(strings.intern(entry.title))
+        chapters.append(strings.intern(entry.chapter))
+        descriptions.append(strings.intern(entry.description))
+        priorities.append(entry.priority)
+        starts.append(entry.start_offset or 0)
+        ends.append(entry.end_offset or 0)
+        flags.append(
+            (_HAS_START if entry.start_offset is not None else 0)
+            | (_HAS_END if entry.end_offset is not None else 0)
+        )
+        for column, terms in zip(
+            lists,
+            (
+                entry.tags,
+                entry.keywords,
+                sorted(tokenizer.normalize_all(entry.keywords)),
+                sorted(tokenizer.normalize_all(entry.tags)),
+            ),
+        ):
+            column.append([strings.intern(term) for term in terms])
+
+    encoded = [value.encode("utf-8") for value in strings.strings]
+    blob = b"".join(encoded)
+    stat = source.stat()
+    header = _HEADER.pack(
+        _MAGIC,
+        stat.st_size,
+        stat.st_mtime_ns,
+        tokenizer.fold_accents,
+        tokenizer.stem,
+        len(encoded),
+        len(blob),
+        len(entries),
+    )
+    parts = [header, to_le(array("I", map(len, encoded))), blob]
+    parts.extend(to_le(column) for column in (*scalars["I"], *scalars["q"], flags))
+    for column in lists:
+        parts.extend((to_le(column.bounds), to_le(column.items)))
+    temp = target.with_name(target.name + ".tmp")
+    temp.write_bytes(b"".join(parts))
+    temp.replace(target)
+
+
+def read_compiled(
+    source: Path, tokenizer: Tokenizer, target: Optional[Path] = None
+) -> Optional[CompiledCatalog]:
+    """Entries from the compiled copy of ``source`` if it is up to date.
+
+    The normalized term sets are returned only when they were computed with
+    an equal tokenizer; otherwise the second item is None.
+    """
+    from reader_app.image_catalog import ImageCatalogEntry
+
+    target = target or compiled_path(source)
+    try:
+        source_stat = source.stat()
+        if os.stat(target).st_mtime_ns < source_stat.st_mtime_ns:
+            return None
+        raw = target.read_bytes()
+        (
+            magic,
+            size,
+            mtime_ns,
+            fold_accents,
+            stem,
+            string_count,
+            blob_length,
+            entry_count,
+        ) = _HEADER.unpack_from(raw)
+    except (OSError, struct.error):
+        return None
+    if magic != _MAGIC or (size, mtime_ns) != (
+        source_stat.st_size,
+        source_stat.st_mtime_ns,
+    ):
+        return None
+    try:
+        reader = ColumnReader(raw, _HEADER.size)
+        lengths = reader.column("I", string_count)
+        blob = reader.take(blob_length)
+        strings: List[Optional[str]] = []
+        cursor = 0
+        for length in lengths:
+            strings.append(blob[cursor : cursor + length].decode("utf-8"))
+            cursor += length
+        ids, paths, titles, chapters, descriptions = (
+            reader.column("I", entry_count) for _ in range(5)
+        )
+        priorities, starts, ends = (reader.column("q", entry_count) for _ in range(3))
+        flags = reader.column("B", entry_count)
+        lists = []
+        for _ in range(4):
+            bounds = reader.column("I", entry_count + 1)
+            lists.append((bounds, reader.column("I", bounds[-1])))
+        if not reader.at_end() or cursor != blob_length:
+            return None
+    except (ValueError, UnicodeDecodeError, IndexError):
+        return None
+
+    strings.append(None)  # _NONE indexes past the table; map it to None
+    none_slot = len(strings) - 1
+
+    def lookup(string_id: int) -> Optional[str]:
+        return strings[none_slot if string_id == _NONE else string_id]
+
+    def terms(column: int, row: int) -> List[str]:
+        bounds, items = lists[column]
+        return [strings[item] for item in items[bounds[row] : bounds[row + 1]]]
+
+    entries: List[ImageCatalogEntry] = []
+    for row in range(entry_count):
+        flag = flags[row]
+        entries.append(
+            ImageCatalogEntry(
+                id=strings[ids[row]],
+                path=Path(strings[paths[row]]),
+                # YAML allows ``title: null``
+                title=lookup(titles[row]),
+                chapter=lookup(chapters[row]),
+                priority=priorities[row],
+                tags=terms(0, row),
+                keywords=terms(1, row),
+                description=lookup(descriptions[row]),
+                start_offset=starts[row] if flag & _HAS_START else None,
+                end_offset=ends[row] if flag & _HAS_END else None,
+            )
+        )
+    if (fold_accents, stem) != tokenizer.key:
+        return entries, None
+    normalized = [
+        (frozenset(terms(2, row)), frozenset(terms(3, row)))
+        for row in range(entry_count)
+    ]
+    return entries, normalized
@@ -1,10 +1,33 @@
 from __future__ import annotations
 
+import atexit
 import json
+import os
+import tempfile
+import threading
+import weakref
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from reader_app.instrumentation import span
+
+# Idle time before a write-behind store flushes coalesced changes.
+DEFAULT_FLUSH_DELAY = 0.5
+
+# write-behind stores still alive, flushed by one exit hook
+_WRITE_BEHIND: "weakref.WeakValueDictionary[int, StateStore]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _flush_write_behind() -> None:
+    for store in list(_WRITE_BEHIND.values()):
+        store.flush()
+
+
+atexit.register(_flush_write_behind)
+
 
 def default_config_path() -> Path:
     config_dir = Path.home() / ".config" / "storyglassy"
@@ -12,27 +35,121 @@ def default_config_path() -> Path:
     return config_dir / "session.json"
 
 
+def write_atomic(path: Path, payload: str) -> None:
+    """Replace ``path`` so readers only ever see the old or the new contents."""
+    descriptor, temp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+            handle.write(payload)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
 @dataclass
 class StateStore:
+    """JSON-backed session state.
+
+    With ``flush_delay`` set the store is write-behind: mutations only mark
+    it dirty and a single write happens once no change arrived for
+    ``flush_delay`` seconds, on ``flush()``, or at interpreter exit.
+    Without it every ``set`` is written through immediately. Every ``set``
+    counts as a change, so values mutated in place after ``get`` are saved;
+    a save that would rewrite the contents last written is skipped.
+    """
+
     path: Path = field(default_factory=default_config_path)
     data: Dict[str, Any] = field(default_factory=dict)
+    flush_delay: Optional[float] = None
+    _dirty: bool = field(default=False, init=False, repr=False, compare=False)
+    _saved: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _timer: Optional[threading.Timer] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _lock: threading.RLock = field(
+        default_factory=threading.RLock, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         self.load()
+        if self.flush_delay is not None:
+            _WRITE_BEHIND[id(self)] = self
 
     def load(self) -> None:
         if self.path.exists():
             try:
-                self.data = json.loads(self.path.read_text())
+                contents = self.path.read_text()
+                self.data = json.loads(contents)
+                self._saved = contents
             except json.JSONDecodeError:
                 self.data = {}
 
     def save(self) -> None:
-        self.path.write_text(json.dumps(self.data, indent=2))
+        with self._lock, span("state.save"):
+            self._cancel_timer()
+            payload = json.dumps(self.data, indent=2)
+            if payload != self._saved:
+                write_atomic(self.path, payload)
+                self._saved = payload
+            self._dirty = False
+
+    def flush(self) -> None:
+        """Write pending changes now, if there are any."""
+        with self._lock:
+            if not self._dirty:
+                return
+        self.save()
 
     def get(self, key: str, default: Any = None) -> Any:
         return self.data.get(key, default)
 
     def set(self, key: str, value: Any) -> None:
-        self.data[key] = value
+        self.update({key: value})
+
+    def book_offset(self, book_path: Path) -> Optional[int]:
+        """Global character offset last saved for ``book_path``, if any."""
+        offset = self.data.get("book_offsets", {}).get(str(book_path))
+        return offset if isinstance(offset, int) else None
+
+    def update_position(
+        self, book_path: Path, offset: int, values: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Save ``book_path``'s reading offset together with ``values``."""
+        offsets = dict(self.data.get("book_offsets", {}))
+        offsets[str(book_path)] = offset
+        self.update({**(values or {}), "book_offsets": offsets})
+
+    def update(self, values: Dict[str, Any]) -> None:
+        """Apply several changes with at most one write."""
+        with span("state.update"):
+            self._update(values)
+
+    def _update(self, values: Dict[str, Any]) -> None:
+        with self._lock:
+            # no equality check: the value may be the very object held in
+            # ``data``, mutated in place since ``get``
+            self.data.update(values)
+            self._dirty = True
+            if self.flush_delay is not None:
+                self._schedule_flush()
+                return
         self.save()
+
+    def _schedule_flush(self) -> None:
+        self._cancel_timer()
+        self._timer = threading.Timer(self.flush_delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
@@ -1,22 +1,135 @@
 from __future__ import annotations
 
+import itertools
 from dataclasses import dataclass
-from typing import Callable, Iterable, List, Optional
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, List, Optional, Sequence
 
+from reader_app.catalog_index import RankedEntries
 from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+from reader_app.instrumentation import span
+
+if TYPE_CHECKING:
+    from reader_app.catalog_watch import CatalogDiff
+    from reader_app.schedule import ImageSchedule
+
+# candidates ranked per match; the rest are only ranked when read
+DEFAULT_TOP_K = 8
+
+
+class FallbackEntries(Sequence[ImageCatalogEntry]):
+    """Ranked candidates other than the winner, taken from the ranking on demand.
+
+    Indexing or slicing only pulls as many candidates as it needs; ``len``
+    and negative indices walk the whole ranking.
+    """
+
+    def __init__(
+        self, candidates: Iterable[ImageCatalogEntry], excluded_id: str
+    ) -> None:
+        self._source: Optional[Iterator[ImageCatalogEntry]] = iter(candidates)
+        self._excluded_id = excluded_id
+        self._taken: List[ImageCatalogEntry] = []
+
+    def _fill(self, count: Optional[int]) -> None:
+        while self._source is not None and (count is None or len(self._taken) < count):
+            entry = next(self._source, None)
+            if entry is None:
+                self._source = None
+            elif entry.id != self._excluded_id:
+                self._taken.append(entry)
+
+    def __len__(self) -> int:
+        self._fill(None)
+        return len(self._taken)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            needs_all = (
+                index.stop is None
+                or index.stop < 0
+                or (index.start or 0) < 0
+                or (index.step or 1) < 0
+            )
+            self._fill(None if needs_all else index.stop)
+            return self._taken[index]
+        self._fill(None if index < 0 else index + 1)
+        return self._taken[index]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"FallbackEntries({len(self._taken)} taken)"
 
 
 @dataclass
 class MatchResult:
+    """The winning entry and every other candidate, best first.
+
+    Scheduled and live matches give the same ``fallback_candidates``: past
+    the end of a truncated schedule row they continue with the live ranking.
+    """
+
     entry: ImageCatalogEntry
-    fallback_candidates: List[ImageCatalogEntry]
+    fallback_candidates: Sequence[ImageCatalogEntry]
 
 
 class ContextMatcher:
-    def __init__(self, catalog: ImageCatalog) -> None:
+    """Scores contexts against the catalog and emits the winning image.
+
+    With ``changes_only`` set, ``update_context`` only notifies listeners
+    when the result differs from the last one it emitted (another entry, an
+    edited entry or different leading fallbacks), so page turns within a
+    scene cost listeners nothing; ``force=True`` emits regardless.
+
+    Only the best ``top_k`` candidates are ranked per match; fallbacks past
+    them are ranked when a listener reads that far.
+    """
+
+    def __init__(
+        self,
+        catalog: ImageCatalog,
+        changes_only: bool = False,
+        top_k: int = DEFAULT_TOP_K,
+    ) -> None:
         self.catalog = catalog
+        self.tokenizer = catalog.tokenizer
+        self.changes_only = changes_only
+        self.top_k = top_k
+        self.last_result: Optional[MatchResult] = None
         self._listeners: List[Callable[[MatchResult], None]] = []
         self._pinned_entry_id: Optional[str] = None
+        self._schedule: Optional[ImageSchedule] = None
+        self._schedule_entries: List[ImageCatalogEntry] = []
+        self._schedule_version = -1
+        self._last_context: Optional[dict] = None
+
+    def attach_schedule(self, schedule: Optional[ImageSchedule]) -> None:
+        """Answer contexts of the scheduled book by lookup instead of scoring.
+
+        The schedule is ignored as soon as the catalog is edited; pass None to
+        detach it (e.g. when another book is opened).
+        """
+        self._schedule = schedule
+        self._schedule_entries = self.catalog.entries()
+        self._schedule_version = self.catalog.version
+
+    def _scheduled(self, context: dict) -> Optional[List[ImageCatalogEntry]]:
+        if self._schedule is None or self.catalog.version != self._schedule_version:
+            return None
+        chapter_index = context.get("chapter_index")
+        paragraph_index = context.get("paragraph_index")
+        if chapter_index is None or paragraph_index is None:
+            return None
+        ranked = self._schedule.ranked(chapter_index, paragraph_index)
+        if ranked is None:
+            return None
+        if self._schedule.truncated(len(ranked)) and len(ranked) <= self.top_k:
+            # the stored row is shorter than the ranking this matcher shows
+            return None
+        return [self._schedule_entries[position] for position in ranked]
 
     def add_listener(self, listener: Callable[[MatchResult], None]) -> None:
         self._listeners.append(listener)
@@ -28,28 +141,108 @@ class ContextMatcher:
         self._pinned_entry_id = None
 
     def _emit(self, result: MatchResult) -> None:
+        self.last_result = result
         for listener in self._listeners:
             listener(result)
 
-    def update_context(self, context: dict) -> None:
-        chapter_title = context.get("chapter_title")
-        text = context.get("text", "")
-        offset = context.get("offset", 0)
+    def catalog_changed(self, diff: CatalogDiff) -> bool:
+        """Re-evaluate the last context if ``diff`` touched one of its candidates.
+
+        Call after ``ImageCatalog.apply_diff``; returns whether it re-emitted.
+        """
+        context = self._last_context
+        if context is None or not diff.affects(
+            context.get("chapter_title"), context.get("offset", 0)
+        ):
+            return False
+        return self.update_context(context)
+
+    def update_context(self, context: dict, force: bool = False) -> bool:
+        """Match ``context`` and notify listeners; returns whether it emitted."""
+        self._last_context = context
+        with span("matcher.update_context"):
+            result = self.match(context)
+            if result is None:
+                return False
+            if self.changes_only and not force and self._unchanged(result):
+                return False
+            self._emit(result)
+            return True
 
-        keywords = [word.strip(".,?") for word in text.lower().split()]
-        candidates = self.catalog.find_for_context(chapter_title, offset, keywords)
+    def _unchanged(self, result: MatchResult) -> bool:
+        last = self.last_result
+        if last is None or last.entry != result.entry:
+            return False
+        depth = self.top_k
+        return last.fallback_candidates[:depth] == result.fallback_candidates[:depth]
+
+    def match(self, context: dict) -> Optional[MatchResult]:
+        """Score ``context`` the way ``update_context`` does, without emitting.
+
+        A ``tokens`` set in the context (see ``BookLoader.set_tokenizer``) is
+        used as is; otherwise the text is tokenized here. Positions covered by
+        an attached schedule skip both steps, except for a pinned entry that
+        fell off a truncated schedule row or fallbacks read past its end.
+        """
+        candidates = self._scheduled(context)
+        scheduled = candidates is not None
+        tokens: Optional[Iterable[str]] = None
+        if candidates is None:
+            tokens = self._tokens(context)
+            candidates = self._rank(context, tokens)
 
         selected: Optional[ImageCatalogEntry] = None
-        if self._pinned_entry_id:
-            pinned = next(
-                (entry for entry in candidates if entry.id == self._pinned_entry_id), None
-            )
-            if pinned:
-                selected = pinned
+        pin = self._pinned_entry_id
+        if pin:
+            if scheduled:
+                selected = next((e for e in candidates if e.id == pin), None)
+            # the pinned entry may rank anywhere, not just in the top k
+            if selected is None and (
+                not scheduled or self._schedule.truncated(len(candidates))
+            ):
+                selected = self.catalog.best_with_id(
+                    context.get("chapter_title"),
+                    context.get("offset", 0),
+                    self._tokens(context) if tokens is None else tokens,
+                    pin,
+                )
 
         if selected is None and candidates:
             selected = candidates[0]
 
-        if selected:
-            fallback = [entry for entry in candidates if entry.id != selected.id]
-            self._emit(MatchResult(entry=selected, fallback_candidates=fallback))
+        if selected is None:
+            return None
+        source: Iterable[ImageCatalogEntry] = candidates
+        if scheduled and self._schedule.truncated(len(candidates)):
+            source = self._continued(candidates, context, tokens)
+        fallback = FallbackEntries(source, selected.id)
+        return MatchResult(entry=selected, fallback_candidates=fallback)
+
+    def _continued(
+        self,
+        row: List[ImageCatalogEntry],
+        context: dict,
+        tokens: Optional[Iterable[str]],
+    ) -> Iterator[ImageCatalogEntry]:
+        """A truncated schedule row, then the live ranking past its end."""
+        yield from row
+        if tokens is None:
+            tokens = self._tokens(context)
+        yield from itertools.islice(self._rank(context, tokens), len(row), None)
+
+    def _tokens(self, context: dict) -> Iterable[str]:
+        tokens = context.get("tokens")
+        if tokens is None:
+            with span("matcher.tokenize"):
+                tokens = self.tokenizer.tokens(context.get("text", ""))
+        return tokens
+
+    def _rank(self, context: dict, tokens: Iterable[str]) -> RankedEntries:
+        with span("catalog.rank"):
+            # one more than shown, the winner is not among the fallbacks
+            return self.catalog.top_for_terms(
+                context.get("chapter_title"),
+                context.get("offset", 0),
+                tokens,
+                self.top_k + 1,
+            )
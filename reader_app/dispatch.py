@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from reader_app.instrumentation import span
+
+# longest a navigation event waits before its matching and image work runs
+DEFAULT_COALESCE_MS = 40
+
+ContextListener = Callable[[dict], None]
+
+
+@dataclass
+class DispatchCounters:
+    posted: int = 0
+    delivered: int = 0
+    coalesced: int = 0
+
+
+class ContextDispatcher:
+    """Latest-wins fan-out of ``BookLoader`` contexts.
+
+    ``immediate`` listeners run for every posted context (the cheap text
+    update). ``deferred`` listeners (matching, image loading, saving the
+    position) only run from ``flush``, with the newest context posted since
+    the previous flush; contexts overtaken before then are dropped and
+    counted in ``counters.coalesced``. ``schedule`` is called with ``flush``
+    once per burst (the window passes a ``QTimer`` single shot); without it
+    every post is flushed straight away.
+    """
+
+    def __init__(
+        self, schedule: Optional[Callable[[Callable[[], None]], None]] = None
+    ) -> None:
+        self.schedule = schedule
+        self.counters = DispatchCounters()
+        self._immediate: List[ContextListener] = []
+        self._deferred: List[ContextListener] = []
+        self._pending: Optional[dict] = None
+        self._scheduled = False
+
+    def add_immediate(self, callback: ContextListener) -> None:
+        self._immediate.append(callback)
+
+    def add_deferred(self, callback: ContextListener) -> None:
+        self._deferred.append(callback)
+
+    def post(self, context: dict) -> None:
+        self.counters.posted += 1
+        for listener in self._immediate:
+            listener(context)
+        if self._pending is not None:
+            self.counters.coalesced += 1
+        self._pending = context
+        if self.schedule is None:
+            self.flush()
+        elif not self._scheduled:
+            self._scheduled = True
+            self.schedule(self.flush)
+
+    def discard(self) -> None:
+        """Drop the pending context, e.g. once the book it came from is closed."""
+        if self._pending is not None:
+            self._pending = None
+            self.counters.coalesced += 1
+
+    def flush(self) -> bool:
+        """Deliver the newest pending context; False when there was none."""
+        self._scheduled = False
+        context = self._pending
+        if context is None:
+            return False
+        self._pending = None
+        self.counters.delivered += 1
+        with span("dispatch.deferred"):
+            for listener in self._deferred:
+                listener(context)
+        return True
+
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+DEFAULT_IMAGE_CACHE_BUDGET_MB = 256
+# share of the budget reserved for scaled variants; the rest holds originals
+SCALED_BUDGET_SHARE = 0.25
+
+Value = TypeVar("Value")
+Size = Tuple[int, int]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass
+class _Slot(Generic[Value]):
+    value: Value
+    cost: int
+    stamp: Optional[int]
+
+
+class LruByteCache(Generic[Value]):
+    """LRU mapping that evicts least recently used items past a byte budget."""
+
+    def __init__(self, budget_bytes: int) -> None:
+        self.budget_bytes = max(0, budget_bytes)
+        self.used_bytes = 0
+        self.stats = CacheStats()
+        self._slots: "OrderedDict[Hashable, _Slot[Value]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    def stamp(self, key: Hashable) -> Optional[int]:
+        slot = self._slots.get(key)
+        return slot.stamp if slot is not None else None
+
+    def peek(self, key: Hashable) -> Optional[Value]:
+        slot = self._slots.get(key)
+        return slot.value if slot is not None else None
+
+    def get(self, key: Hashable, stamp: Optional[int] = None) -> Optional[Value]:
+        """Return the cached value if it was stored with the same ``stamp``."""
+        slot = self._slots.get(key)
+        if slot is not None and slot.stamp != stamp:
+            self._drop(key)
+            self.stats.invalidations += 1
+            slot = None
+        if slot is None:
+            self.stats.misses += 1
+            return None
+        self._slots.move_to_end(key)
+        self.stats.hits += 1
+        return slot.value
+
+    def put(
+        self, key: Hashable, value: Value, cost: int, stamp: Optional[int] = None
+    ) -> None:
+        if key in self._slots:
+            self._drop(key)
+        if cost > self.budget_bytes:
+            return
+        self._slots[key] = _Slot(value, cost, stamp)
+        self.used_bytes += cost
+        self._evict()
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        doomed = [key for key in self._slots if predicate(key)]
+        for key in doomed:
+            self._drop(key)
+        self.stats.invalidations += len(doomed)
+        return len(doomed)
+
+    def set_budget(self, budget_bytes: int) -> None:
+        self.budget_bytes = max(0, budget_bytes)
+        self._evict()
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self.used_bytes = 0
+
+    def _drop(self, key: Hashable) -> None:
+        slot = self._slots.pop(key)
+        self.used_bytes -= slot.cost
+
+    def _evict(self) -> None:
+        while self.used_bytes > self.budget_bytes and self._slots:
+            key = next(iter(self._slots))
+            self._drop(key)
+            self.stats.evictions += 1
+
+
+def file_stamp(path: Path) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class ImageCache(Generic[Value]):
+    """Two-level cache of decoded originals and scaled variants.
+
+    Originals are keyed by catalog entry id, scaled variants by
+    ``(entry id, (width, height))``. Both levels remember the image file's
+    mtime when stored; a lookup after the file changed drops the entry from
+    both levels instead of returning stale pixels.
+    """
+
+    def __init__(self, budget_bytes: int) -> None:
+        scaled_budget = int(budget_bytes * SCALED_BUDGET_SHARE)
+        self.originals: LruByteCache[Value] = LruByteCache(
+            budget_bytes - scaled_budget
+        )
+        self.scaled: LruByteCache[Value] = LruByteCache(scaled_budget)
+
+    @property
+    def budget_bytes(self) -> int:
+        return self.originals.budget_bytes + self.scaled.budget_bytes
+
+    def set_budget(self, budget_bytes: int) -> None:
+        scaled_budget = int(budget_bytes * SCALED_BUDGET_SHARE)
+        self.originals.set_budget(budget_bytes - scaled_budget)
+        self.scaled.set_budget(scaled_budget)
+
+    def original(self, entry_id: str, path: Path) -> Optional[Value]:
+        stamp = file_stamp(path)
+        self._drop_if_changed(entry_id, stamp)
+        return self.originals.get(entry_id, stamp)
+
+    def store_original(
+        self, entry_id: str, path: Path, image: Value, cost: int
+    ) -> None:
+        self.originals.put(entry_id, image, cost, file_stamp(path))
+
+    def peek_original(self, entry_id: str) -> Optional[Value]:
+        """Cached original without touching recency, stats or the file."""
+        return self.originals.peek(entry_id)
+
+    def has_scaled(self, entry_id: str, size: Size) -> bool:
+        return (entry_id, size) in self.scaled
+
+    def scaled_variant(self, entry_id: str, path: Path, size: Size) -> Optional[Value]:
+        stamp = file_stamp(path)
+        self._drop_if_changed(entry_id, stamp)
+        return self.scaled.get((entry_id, size), stamp)
+
+    def store_scaled(
+        self, entry_id: str, path: Path, size: Size, image: Value, cost: int
+    ) -> None:
+        self.scaled.put((entry_id, size), image, cost, file_stamp(path))
+
+    def invalidate(self, entry_id: str) -> None:
+        self.originals.discard_where(lambda key: key == entry_id)
+        self.scaled.discard_where(lambda key: key[0] == entry_id)
+
+    def clear(self) -> None:
+        self.originals.clear()
+        self.scaled.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            level: {
+                "items": len(cache),
+                "used_bytes": cache.used_bytes,
+                "budget_bytes": cache.budget_bytes,
+                "hits": cache.stats.hits,
+                "misses": cache.stats.misses,
+                "hit_rate": round(cache.stats.hit_rate, 3),
+                "evictions": cache.stats.evictions,
+                "invalidations": cache.stats.invalidations,
+            }
+            for level, cache in (("originals", self.originals), ("scaled", self.scaled))
+        }
+
+    def _drop_if_changed(self, entry_id: str, stamp: Optional[int]) -> None:
+        if entry_id in self.originals and self.originals.stamp(entry_id) != stamp:
+            self.invalidate(entry_id)
@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable, List, Optional, Sequence
+from typing import TYPE_CHECKING, AbstractSet, Any, Iterable, List, Optional, Sequence
 
 import yaml
 
+from reader_app.catalog_index import CatalogIndex, RankedEntries
+from reader_app.compiled_catalog import (
+    EntryTerms,
+    compiled_path,
+    read_compiled,
+    write_compiled,
+)
+from reader_app.tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+if TYPE_CHECKING:
+    from reader_app.catalog_watch import CatalogDiff
+
 
 @dataclass
 class ImageCatalogEntry:
@@ -28,57 +42,165 @@ class ImageCatalogEntry:
         return start <= offset <= end
 
 
+def _text(value: Any) -> Optional[str]:
+    # YAML reads ``id: 42`` or ``title: 7`` as numbers
+    return None if value is None else str(value)
+
+
+def read_yaml_entries(source: Path) -> List[ImageCatalogEntry]:
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    raw = yaml.load(source.read_text(), Loader=loader)
+    entries: List[ImageCatalogEntry] = []
+    for item in raw or []:
+        if item is None:
+            continue
+        entry = ImageCatalogEntry(
+            id=str(item["id"]),
+            path=Path(item["path"]),
+            title=_text(item.get("title", "")),
+            chapter=_text(item.get("chapter")),
+            priority=int(item.get("priority", 50)),
+            tags=[str(tag) for tag in item.get("tags", [])],
+            keywords=[str(keyword) for keyword in item.get("keywords", [])],
+            description=_text(item.get("description")),
+            start_offset=item.get("start_offset"),
+            end_offset=item.get("end_offset"),
+        )
+        entries.append(entry)
+    return entries
+
+
 class ImageCatalog:
-    def __init__(self, entries: Sequence[ImageCatalogEntry]) -> None:
+    def __init__(
+        self,
+        entries: Sequence[ImageCatalogEntry],
+        tokenizer: Optional[Tokenizer] = None,
+        terms: Optional[Sequence[EntryTerms]] = None,
+    ) -> None:
+        self.tokenizer = tokenizer or DEFAULT_TOKENIZER
+        # bumped on every add/remove so derived data can tell it is outdated
+        self.version = 0
         self._entries = list(entries)
+        self._index = CatalogIndex((), self.tokenizer.normalize)
+        if terms is None:
+            for entry in self._entries:
+                self._index.add(entry)
+        else:
+            for entry, (keywords, tags) in zip(self._entries, terms):
+                self._index.add(entry, keywords, tags)
 
     @classmethod
-    def load(cls, source: Path) -> "ImageCatalog":
-        raw = yaml.safe_load(source.read_text())
-        entries: List[ImageCatalogEntry] = []
-        for item in raw or []:
-            if item is None:
-                continue
-            entry = ImageCatalogEntry(
-                id=item["id"],
-                path=Path(item["path"]),
-                title=item.get("title", ""),
-                chapter=item.get("chapter"),
-                priority=int(item.get("priority", 50)),
-                tags=list(item.get("tags", [])),
-                keywords=list(item.get("keywords", [])),
-                description=item.get("description"),
-                start_offset=item.get("start_offset"),
-                end_offset=item.get("end_offset"),
-            )
-            entries.append(entry)
-        return cls(entries)
+    def load(
+        cls,
+        source: Path,
+        tokenizer: Optional[Tokenizer] = None,
+        use_compiled: bool = True,
+    ) -> "ImageCatalog":
+        """Load ``source``, preferring its compiled copy when that is up to date."""
+        tokenizer = tokenizer or DEFAULT_TOKENIZER
+        if use_compiled:
+            compiled = read_compiled(source, tokenizer)
+            if compiled is not None:
+                entries, terms = compiled
+                return cls(entries, tokenizer, terms)
+        return cls(read_yaml_entries(source), tokenizer)
+
+    @classmethod
+    def compile(
+        cls,
+        source: Path,
+        target: Optional[Path] = None,
+        tokenizer: Optional[Tokenizer] = None,
+    ) -> Path:
+        """Write the binary form of the YAML catalog ``source``."""
+        target = target or compiled_path(source)
+        entries = read_yaml_entries(source)
+        write_compiled(target, source, entries, tokenizer or DEFAULT_TOKENIZER)
+        return target
 
     def entries(self) -> List[ImageCatalogEntry]:
         return list(self._entries)
 
+    def add_entry(self, entry: ImageCatalogEntry) -> None:
+        self._entries.append(entry)
+        self._index.add(entry)
+        self.version += 1
+
+    def remove_entry(self, entry_id: str) -> List[ImageCatalogEntry]:
+        removed = self._index.remove(entry_id)
+        if removed:
+            self._entries = [entry for entry in self._entries if entry.id != entry_id]
+            self.version += 1
+        return removed
+
+    def apply_diff(self, diff: CatalogDiff) -> None:
+        """Re-index only the ids ``diff`` touches and adopt its entry order."""
+        if not diff:
+            return
+        for entry_id in diff.touched():
+            self._index.remove(entry_id)
+            for entry in diff.new.get(entry_id, ()):
+                self._index.add(entry)
+        self._entries = list(diff.entries)
+        self.version += 1
+
+    def fingerprint(self) -> bytes:
+        """Digest of everything that influences ranking, in entry order."""
+        rows = [
+            [
+                entry.id,
+                str(entry.path),
+                entry.chapter,
+                entry.priority,
+                list(entry.tags),
+                list(entry.keywords),
+                entry.start_offset,
+                entry.end_offset,
+            ]
+            for entry in self._entries
+        ]
+        payload = json.dumps([list(self.tokenizer.key), rows], ensure_ascii=False)
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).digest()
+
     def find_for_context(
         self,
         chapter: Optional[str],
         offset: int,
         keywords: Sequence[str],
     ) -> List[ImageCatalogEntry]:
-        matching = []
-        normalized_keywords = {k.lower() for k in keywords}
-        for entry in self._entries:
-            if entry.chapter and chapter and entry.chapter != chapter:
-                continue
-            if not entry.matches_range(offset):
-                continue
-            weight = entry.priority
-            weight += len(normalized_keywords & {kw.lower() for kw in entry.keywords})
-            tag_hit = len(
-                normalized_keywords & {tag.lower() for tag in entry.tags}
-            )
-            weight += tag_hit * 2
-            matching.append((weight, entry))
-        matching.sort(key=lambda pair: (-pair[0], pair[1].id))
-        return [entry for _, entry in matching]
+        return [entry for _, entry in self._index.rank(chapter, offset, keywords)]
+
+    def find_for_terms(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: AbstractSet[str],
+    ) -> List[ImageCatalogEntry]:
+        """``find_for_context`` for terms already produced by ``self.tokenizer``."""
+        return [
+            entry
+            for _, entry in self._index.rank_terms(chapter, offset, frozenset(terms))
+        ]
+
+    def top_for_terms(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: AbstractSet[str],
+        k: int,
+    ) -> RankedEntries:
+        """``find_for_terms`` as a lazy sequence with the best ``k`` selected first."""
+        return self._index.top_terms(chapter, offset, frozenset(terms), k)
+
+    def best_with_id(
+        self,
+        chapter: Optional[str],
+        offset: int,
+        terms: AbstractSet[str],
+        entry_id: str,
+    ) -> Optional[ImageCatalogEntry]:
+        """The ``find_for_terms`` candidate first with ``entry_id``, if any."""
+        return self._index.best_with_id(chapter, offset, frozenset(terms), entry_id)
 
     def validate(self) -> List[str]:
         errors = []
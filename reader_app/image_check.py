@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from reader_app.image_catalog import ImageCatalogEntry
+
+CHECK_CACHE_SUFFIX = ".sgcheck"
+_CACHE_VERSION = 1
+# file suffixes treated as images when looking for orphans, with their format
+IMAGE_SUFFIXES = {
+    ".png": "png",
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".gif": "gif",
+    ".bmp": "bmp",
+    ".webp": "webp",
+}
+# JPEG start-of-frame markers; C4, C8 and CC share the range but are not frames
+_JPEG_FRAMES = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+Progress = Callable[[int, int], None]
+
+
+def check_cache_path(catalog: Path) -> Path:
+    return catalog.with_name(catalog.name + CHECK_CACHE_SUFFIX)
+
+
+def _jpeg_size(handle: BinaryIO) -> Tuple[int, int]:
+    handle.seek(2)
+    while True:
+        marker = handle.read(2)
+        while marker[:1] == b"\xff" and marker[1:] == b"\xff":
+            marker = marker[1:] + handle.read(1)  # fill bytes
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("corrupt JPEG marker")
+        length_bytes = handle.read(2)
+        if len(length_bytes) < 2:
+            raise ValueError("truncated JPEG")
+        (length,) = struct.unpack(">H", length_bytes)
+        if marker[1] in _JPEG_FRAMES:
+            frame = handle.read(5)
+            if len(frame) < 5:
+                raise ValueError("truncated JPEG frame")
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        if length < 2:
+            raise ValueError("corrupt JPEG segment")
+        handle.seek(length - 2, os.SEEK_CUR)
+
+
+def _webp_size(head: bytes) -> Tuple[int, int]:
+    chunk = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack_from("<HH", head, 26)
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(head) >= 25:
+        (bits,) = struct.unpack_from("<I", head, 21)
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(head) >= 30:
+        width = int.from_bytes(head[24:27], "little") + 1
+        height = int.from_bytes(head[27:30], "little") + 1
+        return width, height
+    raise ValueError("unsupported WebP chunk")
+
+
+def read_image_header(handle: BinaryIO) -> Tuple[str, int, int]:
+    """Format and pixel size from an image's header, without decoding pixels."""
+    head = handle.read(32)
+    if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+        width, height = struct.unpack_from(">II", head, 16)
+        return "png", width, height
+    if head.startswith((b"GIF87a", b"GIF89a")) and len(head) >= 10:
+        width, height = struct.unpack_from("<HH", head, 6)
+        return "gif", width, height
+    if head.startswith(b"BM") and len(head) >= 26:
+        width, height = struct.unpack_from("<ii", head, 18)
+        return "bmp", width, abs(height)
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        return ("webp", *_webp_size(head))
+    if head.startswith(b"\xff\xd8"):
+        return ("jpeg", *_jpeg_size(handle))
+    raise ValueError("unrecognized image format")
+
+
+@dataclass
+class FileCheck:
+    """What deep validation learned about one image file."""
+
+    size: int
+    mtime_ns: int
+    format: Optional[str] = None
+    width: int = 0
+    height: int = 0
+    digest: Optional[str] = None
+    error: Optional[str] = None
+
+
+def check_file(path: Path, stat: Optional[os.stat_result] = None) -> FileCheck:
+    stat = stat or os.stat(path)
+    check = FileCheck(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+    try:
+        with open(path, "rb") as handle:
+            try:
+                check.format, check.width, check.height = read_image_header(handle)
+                if check.width <= 0 or check.height <= 0:
+                    raise ValueError(f"invalid dimensions {check.width}x{check.height}")
+            except (ValueError, struct.error) as error:
+                check.error = str(error)
+            handle.seek(0)
+            check.digest = hashlib.file_digest(handle, "blake2b").hexdigest()
+    except OSError as error:
+        check.error = str(error)
+    return check
+
+
+def _load_cache(path: Optional[Path]) -> Dict[str, FileCheck]:
+    if path is None:
+        return {}
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        if payload.get("version") != _CACHE_VERSION:
+            return {}
+        return {name: FileCheck(**fields) for name, fields in payload["files"].items()}
+    except (OSError, ValueError, TypeError, KeyError, AttributeError):
+        return {}
+
+
+def _save_cache(path: Path, checks: Dict[str, FileCheck]) -> None:
+    payload = {
+        "version": _CACHE_VERSION,
+        "files": {name: asdict(check) for name, check in sorted(checks.items())},
+    }
+    temp = path.with_name(path.name + ".tmp")
+    temp.write_text(json.dumps(payload), encoding="utf-8")
+    temp.replace(path)
+
+
+def find_orphans(
+    referenced: Iterable[Path], roots: Iterable[Path], recursive: bool = False
+) -> List[Path]:
+    """Image files under ``roots`` that no catalog entry points at."""
+    known = {path.resolve() for path in referenced}
+    orphans = []
+    for root in roots:
+        if not root.is_dir():
+            continue
+        candidates = root.rglob("*") if recursive else root.iterdir()
+        for candidate in candidates:
+            if candidate.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            if candidate.is_file() and candidate.resolve() not in known:
+                orphans.append(candidate)
+    return sorted(set(orphans))
+
+
+@dataclass
+class DeepReport:
+    checks: Dict[Path, Optional[FileCheck]] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    duplicates: List[List[Path]] = field(default_factory=list)
+    orphans: List[Path] = field(default_factory=list)
+    read: int = 0
+    cached: int = 0
+
+
+def deep_validate(
+    entries: Sequence[ImageCatalogEntry],
+    cache_path: Optional[Path] = None,
+    workers: Optional[int] = None,
+    roots: Optional[Sequence[Path]] = None,
+    progress: Optional[Progress] = None,
+) -> DeepReport:
+    """Check every referenced image file on a thread pool.
+
+    Each distinct file is stat-ed, its header decoded for format and size, and
+    its content hashed to find duplicates. Results are cached in
+    ``cache_path`` keyed by resolved path, size and mtime, so a re-run only
+    reads files that changed. Orphans are looked for in ``roots`` recursively
+    or, by default, directly inside the directories the catalog references.
+    """
+    users: Dict[Path, List[ImageCatalogEntry]] = {}
+    for entry in entries:
+        users.setdefault(entry.path.resolve(), []).append(entry)
+    cached = _load_cache(cache_path)
+    report = DeepReport()
+    pending: Dict[Path, os.stat_result] = {}
+    done = 0
+    for path in users:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            report.checks[path] = None
+            done += 1
+            continue
+        previous = cached.get(str(path))
+        if previous and (previous.size, previous.mtime_ns) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            report.checks[path] = previous
+            report.cached += 1
+            done += 1
+        else:
+            pending[path] = stat
+    if progress:
+        progress(done, len(users))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(check_file, path, stat): path for path, stat in pending.items()
+        }
+        for future in as_completed(futures):
+            report.checks[futures[future]] = future.result()
+            report.read += 1
+            done += 1
+            if progress:
+                progress(done, len(users))
+
+    by_digest: Dict[str, List[Path]] = {}
+    for path, entries_for_path in users.items():
+        check = report.checks[path]
+        for entry in entries_for_path:
+            if check is None:
+                report.errors.append(f"{entry.id}: missing image file {entry.path}")
+            elif check.error:
+                report.errors.append(
+                    f"{entry.id}: unreadable image {entry.path} ({check.error})"
+                )
+            elif IMAGE_SUFFIXES.get(path.suffix.lower(), check.format) != check.format:
+                report.errors.append(
+                    f"{entry.id}: {entry.path} holds {check.format.upper()} data"
+                )
+        if check is not None and check.digest:
+            by_digest.setdefault(check.digest, []).append(path)
+    report.duplicates = sorted(
+        sorted(paths) for paths in by_digest.values() if len(paths) > 1
+    )
+
+    if roots is None:
+        report.orphans = find_orphans(users, {path.parent for path in users})
+    else:
+        report.orphans = find_orphans(users, roots, recursive=True)
+    if cache_path is not None:
+        current = {str(path): check for path, check in report.checks.items() if check}
+        _save_cache(cache_path, current)
+    return report
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import itertools
+
+
+class ImageTickets:
+    """Ticket bookkeeping behind ``ImageLoader``, free of Qt.
+
+    Every request and prefetch draws a ticket from one increasing counter.
+    ``request`` supersedes all earlier requests (only the latest one is
+    fresh); prefetch tickets stay fresh until the next ``cancel_prefetch``
+    or ``close``, and never supersede a request.
+    """
+
+    def __init__(self) -> None:
+        self._counter = itertools.count(1)
+        self.latest = 0
+        self.prefetch_floor = 0
+
+    def request(self) -> int:
+        self.latest = next(self._counter)
+        return self.latest
+
+    def prefetch(self) -> int:
+        return next(self._counter)
+
+    def cancel_prefetch(self) -> None:
+        self.prefetch_floor = next(self._counter)
+
+    def close(self) -> None:
+        """Make every ticket handed out so far stale."""
+        self.latest = 0
+        self.cancel_prefetch()
+
+    def is_stale(self, ticket: int) -> bool:
+        return ticket != self.latest
+
+    def is_stale_prefetch(self, ticket: int) -> bool:
+        return ticket < self.prefetch_floor
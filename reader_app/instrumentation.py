@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Latest durations kept per stage for the percentile summary.
+DEFAULT_HISTOGRAM_WINDOW = 2048
+# Spans kept for the Chrome trace export.
+DEFAULT_TRACE_CAPACITY = 100_000
+PROFILE_ENV = "STORYGLASS_PROFILE"
+TRACE_ENV = "STORYGLASS_TRACE"
+
+
+class RollingHistogram:
+    """Durations (ns) of the latest ``window`` samples plus lifetime totals."""
+
+    def __init__(self, window: int = DEFAULT_HISTOGRAM_WINDOW) -> None:
+        self.samples: Deque[int] = deque(maxlen=window)
+        self.count = 0
+        self.total_ns = 0
+
+    def add(self, duration_ns: int) -> None:
+        self.samples.append(duration_ns)
+        self.count += 1
+        self.total_ns += duration_ns
+
+    def percentiles(self, *fractions: float) -> List[float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return [0.0 for _ in fractions]
+        last = len(ordered) - 1
+        return [
+            float(ordered[min(last, int(fraction * len(ordered)))])
+            for fraction in fractions
+        ]
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("_tracer", "_name", "_started")
+
+    def __init__(self, tracer: "Tracer", name: str) -> None:
+        self._tracer = tracer
+        self._name = name
+        self._started = 0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter_ns()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._tracer.record(self._name, self._started, time.perf_counter_ns())
+
+
+class Tracer:
+    """Named timing spans around the navigation pipeline's stages.
+
+    Disabled tracers hand out one shared no-op context manager, so an
+    instrumented call site only pays for a method call. Enabled tracers keep
+    a rolling histogram per stage and, with ``trace=True``, the individual
+    spans for ``export_chrome_trace`` (loadable in chrome://tracing or
+    Perfetto). Spans may be recorded from worker threads.
+    """
+
+    def __init__(
+        self,
+        window: int = DEFAULT_HISTOGRAM_WINDOW,
+        trace_capacity: int = DEFAULT_TRACE_CAPACITY,
+    ) -> None:
+        self.enabled = False
+        self.tracing = False
+        self._window = window
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._events: Deque[Tuple[str, int, int, int]] = deque(maxlen=trace_capacity)
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter_ns()
+
+    def enable(self, trace: bool = False) -> None:
+        self.enabled = True
+        self.tracing = trace
+
+    def disable(self) -> None:
+        self.enabled = False
+        self.tracing = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._events.clear()
+            self._epoch = time.perf_counter_ns()
+
+    def span(self, name: str):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, started_ns: int, ended_ns: int) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = RollingHistogram(self._window)
+            histogram.add(ended_ns - started_ns)
+            if self.tracing:
+                self._events.append(
+                    (name, started_ns, ended_ns, threading.get_ident())
+                )
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage call count and p50/p95/p99/max in milliseconds."""
+        with self._lock:
+            histograms = list(self._histograms.items())
+        report: Dict[str, Dict[str, float]] = {}
+        for name, histogram in sorted(histograms):
+            p50, p95, p99, worst = histogram.percentiles(0.50, 0.95, 0.99, 1.0)
+            report[name] = {
+                "count": histogram.count,
+                "total_ms": round(histogram.total_ns / 1e6, 3),
+                "p50_ms": round(p50 / 1e6, 3),
+                "p95_ms": round(p95 / 1e6, 3),
+                "p99_ms": round(p99 / 1e6, 3),
+                "max_ms": round(worst / 1e6, 3),
+            }
+        return report
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        if not rows:
+            return "no spans recorded"
+        width = max(len(name) for name in rows)
+        lines = [
+            f"{'stage':<{width}} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'max ms':>8}"
+        ]
+        for name, row in rows.items():
+            lines.append(
+                f"{name:<{width}} {row['count']:>7} {row['p50_ms']:>8.3f} "
+                f"{row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f} {row['max_ms']:>8.3f}"
+            )
+        return "\n".join(lines)
+
+    def export_chrome_trace(self, path: Path) -> int:
+        """Write recorded spans as Chrome trace JSON and return how many."""
+        with self._lock:
+            events = list(self._events)
+            epoch = self._epoch
+        pid = os.getpid()
+        payload = {
+            "traceEvents": [
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": (started - epoch) / 1e3,
+                    "dur": (ended - started) / 1e3,
+                    "pid": pid,
+                    "tid": thread,
+                }
+                for name, started, ended, thread in events
+            ],
+            "displayTimeUnit": "ms",
+        }
+        path.write_text(json.dumps(payload))
+        return len(events)
+
+
+TRACER = Tracer()
+
+
+def span(name: str):
+    """Time a block under ``name`` with the process-wide tracer."""
+    return TRACER.span(name)
+
+
+def configure_from_env(tracer: Optional[Tracer] = None) -> Tracer:
+    """Enable ``tracer`` from ``STORYGLASS_PROFILE``/``STORYGLASS_TRACE``.
+
+    Any non-empty ``STORYGLASS_PROFILE`` turns on the histograms;
+    ``STORYGLASS_TRACE=<file>`` also records spans and writes them to that
+    file at exit.
+    """
+    tracer = tracer or TRACER
+    trace_path = os.environ.get(TRACE_ENV)
+    if trace_path:
+        tracer.enable(trace=True)
+        atexit.register(tracer.export_chrome_trace, Path(trace_path))
+    elif os.environ.get(PROFILE_ENV):
+        tracer.enable()
+    return tracer
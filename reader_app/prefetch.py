@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalogEntry
+from reader_app.instrumentation import span
+from reader_app.reader import BookLoader
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_DEPTH = 2
+DEFAULT_PREFETCH_BEHIND = 1
+DEFAULT_PREFETCH_FALLBACKS = 2
+
+
+@dataclass
+class PrefetchStats:
+    issued: int = 0
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        shown = self.hits + self.misses
+        return self.hits / shown if shown else 0.0
+
+
+class Prefetcher:
+    """Predicts which catalog images the next page turns will need.
+
+    ``plan`` runs the matcher over the next ``depth`` paragraphs and the
+    previous ``behind`` ones and returns their winners (nearest first)
+    followed by up to ``fallbacks`` alternates each. The UI warms its image
+    pipeline with the plan and reports every displayed image through
+    ``record_shown`` so the counters show whether prefetching pays off.
+    """
+
+    def __init__(
+        self,
+        matcher: ContextMatcher,
+        depth: int = DEFAULT_PREFETCH_DEPTH,
+        behind: int = DEFAULT_PREFETCH_BEHIND,
+        fallbacks: int = DEFAULT_PREFETCH_FALLBACKS,
+    ) -> None:
+        self.matcher = matcher
+        self.depth = depth
+        self.behind = behind
+        self.fallbacks = fallbacks
+        self.stats = PrefetchStats()
+        self._warmed: Set[str] = set()
+
+    def plan(
+        self, loader: BookLoader, origin: Optional[Tuple[int, int]] = None
+    ) -> List[ImageCatalogEntry]:
+        if self.depth <= 0 and self.behind <= 0:
+            return []
+        winners: Dict[str, ImageCatalogEntry] = {}
+        alternates: Dict[str, ImageCatalogEntry] = {}
+        for position in loader.neighbor_positions(self.depth, self.behind, origin):
+            result = self.matcher.match(loader.context_at(*position))
+            if result is None:
+                continue
+            winners.setdefault(result.entry.id, result.entry)
+            for entry in result.fallback_candidates[: self.fallbacks]:
+                alternates.setdefault(entry.id, entry)
+        planned = list(winners.values())
+        planned.extend(entry for key, entry in alternates.items() if key not in winners)
+        return planned
+
+    def mark_issued(self, entry_id: str) -> None:
+        self.stats.issued += 1
+        self._warmed.add(entry_id)
+
+    def record_shown(self, entry_id: str, cached: bool) -> None:
+        """Count a displayed image: a hit if prefetching had already warmed it."""
+        if not cached:
+            self.stats.misses += 1
+        elif entry_id in self._warmed:
+            self.stats.hits += 1
+        self._warmed.discard(entry_id)
+
+
+PlanListener = Callable[[int, List[ImageCatalogEntry]], None]
+
+
+class PlanWorker:
+    """Runs ``Prefetcher.plan`` on a daemon thread, newest request only.
+
+    ``request`` hands over a loader and the position to plan around and
+    returns its generation at once; requests overtaken before the thread
+    picks them up are dropped. Every plan goes to ``deliver(generation,
+    entries)`` on the worker thread (the window forwards it through a queued
+    signal); plans whose generation is no longer ``latest`` are outdated.
+    Hold ``lock`` while changing the catalog or the matcher's schedule.
+    """
+
+    def __init__(self, prefetcher: Prefetcher, deliver: PlanListener) -> None:
+        self.prefetcher = prefetcher
+        self.deliver = deliver
+        self.lock = threading.Lock()
+        self.latest = 0
+        self._wake = threading.Condition()
+        self._pending: Optional[Tuple[int, BookLoader, Tuple[int, int]]] = None
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def request(self, loader: BookLoader, origin: Tuple[int, int]) -> int:
+        with self._wake:
+            self.latest += 1
+            self._pending = (self.latest, loader, origin)
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(
+                    target=self._run, name="prefetch-plan", daemon=True
+                )
+                self._thread.start()
+            self._wake.notify()
+            return self.latest
+
+    def close(self) -> None:
+        with self._wake:
+            self._closed = True
+            self._pending = None
+            self._wake.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._wake:
+                while self._pending is None and not self._closed:
+                    self._wake.wait()
+                if self._closed:
+                    return
+                generation, loader, origin = self._pending
+                self._pending = None
+            try:
+                with self.lock, span("prefetch.plan"):
+                    entries = self.prefetcher.plan(loader, origin)
+                self.deliver(generation, entries)
+            except Exception:
+                # prefetching is best effort; a failed plan must not end the
+                # thread, or no later request would be planned
+                log.exception("prefetch plan around %s failed", origin)
@@ -1,29 +1,383 @@
 from __future__ import annotations
 
+import mmap
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence
+from typing import Callable, FrozenSet, List, Optional, Sequence, Tuple, Union
 
+from reader_app import book_index
+from reader_app.book_index import Buffer, BookIndex, ChapterSpan
+from reader_app.instrumentation import span
+from reader_app.tokenizer import Tokenizer
 
-@dataclass
+# Books at least this large are memory-mapped and parsed chapter by chapter.
+LAZY_LOAD_THRESHOLD = 4 * 1024 * 1024
+DEFAULT_CHAPTER_CACHE_SIZE = 8
+# Paragraph token sets kept by a loader with a tokenizer attached.
+DEFAULT_TOKEN_CACHE_SIZE = 4096
+
+
+@dataclass(slots=True)
 class Paragraph:
     text: str
     offset: int
 
 
+class ParagraphColumns(Sequence[Paragraph]):
+    """Paragraphs stored as start/end/offset columns over one shared buffer.
+
+    ``buffer`` is either the decoded text (character positions) or the raw
+    UTF-8 file contents (byte positions). ``Paragraph`` objects are only
+    created when an item is accessed.
+    """
+
+    __slots__ = ("_buffer", "_starts", "_ends", "_offsets")
+
+    def __init__(
+        self,
+        buffer: Union[str, Buffer],
+        starts: array,
+        ends: array,
+        offsets: array,
+    ) -> None:
+        self._buffer = buffer
+        self._starts = starts
+        self._ends = ends
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        text = self._buffer[self._starts[index] : self._ends[index]]
+        if not isinstance(text, str):
+            text = text.decode("utf-8")
+        return Paragraph(text, self._offsets[index])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        return f"ParagraphColumns({len(self)} paragraphs)"
+
+
 @dataclass
 class Chapter:
     title: str
-    paragraphs: List[Paragraph]
+    paragraphs: Sequence[Paragraph]
+
+
+def chapter_from_span(
+    buffer: Buffer, spans: Sequence[ChapterSpan], compact: bool, chapter_index: int
+) -> Chapter:
+    span = spans[chapter_index]
+    if compact:
+        columns = book_index.paragraph_columns(buffer, span)
+        return Chapter(span.title, ParagraphColumns(buffer, *columns))
+    body = buffer[span.start : span.end].decode("utf-8")
+    return Chapter(span.title, BookLoader._parse_body(body))
+
+
+def chapter_from_index(
+    buffer: Buffer, index: BookIndex, compact: bool, chapter_index: int
+) -> Chapter:
+    rows = index.paragraph_rows(chapter_index)
+    if compact:
+        paragraphs: Sequence[Paragraph] = ParagraphColumns(
+            buffer,
+            index.starts[rows.start : rows.stop],
+            index.ends[rows.start : rows.stop],
+            index.offsets[rows.start : rows.stop],
+        )
+    else:
+        paragraphs = [
+            Paragraph(
+                buffer[index.starts[row] : index.ends[row]].decode("utf-8"),
+                index.offsets[row],
+            )
+            for row in rows
+        ]
+    return Chapter(index.titles[chapter_index], paragraphs)
+
+
+class LazyChapters(Sequence[Chapter]):
+    """Chapters materialized on first access and kept in a bounded LRU."""
+
+    def __init__(
+        self,
+        count: int,
+        build: Callable[[int], Chapter],
+        cache_size: int = DEFAULT_CHAPTER_CACHE_SIZE,
+    ) -> None:
+        self._count = count
+        self._build = build
+        self._cache_size = max(1, cache_size)
+        self._cache: "OrderedDict[int, Chapter]" = OrderedDict()
+        # the prefetch planner reads chapters from its own thread
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("chapter index out of range")
+        with self._lock:
+            chapter = self._cache.get(index)
+            if chapter is not None:
+                self._cache.move_to_end(index)
+                return chapter
+        chapter = self._build(index)
+        with self._lock:
+            self._cache[index] = chapter
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return chapter
+
+    def cached_indices(self) -> List[int]:
+        with self._lock:
+            return list(self._cache)
+
+
+class PositionIndex:
+    """Prefix sums over a book's chapters for seeking by global offset.
+
+    ``chapter_starts[c]`` is the global character offset of chapter ``c``
+    (the summed lengths of the chapters before it, counted like
+    ``Paragraph.offset``) and ``chapter_bounds[c]`` the number of paragraphs
+    before it; both end with the book's totals.
+    """
+
+    def __init__(self, chapter_starts: array, chapter_bounds: array) -> None:
+        self.chapter_starts = chapter_starts
+        self.chapter_bounds = chapter_bounds
+
+    @classmethod
+    def build(cls, chapters: Sequence[Chapter]) -> "PositionIndex":
+        chapter_starts = array("Q", [0])
+        chapter_bounds = array("Q", [0])
+        for chapter in chapters:
+            paragraphs = chapter.paragraphs
+            length = 0
+            if paragraphs:
+                last = paragraphs[-1]
+                length = last.offset + len(last.text)
+            chapter_starts.append(chapter_starts[-1] + length)
+            chapter_bounds.append(chapter_bounds[-1] + len(paragraphs))
+        return cls(chapter_starts, chapter_bounds)
+
+    @classmethod
+    def from_index(cls, buffer: Buffer, index: BookIndex) -> "PositionIndex":
+        """Prefix sums from a sidecar index, decoding one paragraph per chapter."""
+        chapter_starts = array("Q", [0])
+        bounds = index.chapter_bounds
+        for chapter_index in range(len(index)):
+            length = 0
+            if bounds[chapter_index + 1] > bounds[chapter_index]:
+                row = bounds[chapter_index + 1] - 1
+                last = buffer[index.starts[row] : index.ends[row]].decode("utf-8")
+                length = index.offsets[row] + len(last)
+            chapter_starts.append(chapter_starts[-1] + length)
+        return cls(chapter_starts, array("Q", bounds))
+
+    @classmethod
+    def from_spans(
+        cls, buffer: Buffer, spans: Sequence[ChapterSpan]
+    ) -> "PositionIndex":
+        """Prefix sums from chapter spans, counting lines without building them."""
+        chapter_starts = array("Q", [0])
+        chapter_bounds = array("Q", [0])
+        for span in spans:
+            length = count = 0
+            for line in buffer[span.start : span.end].decode("utf-8").splitlines():
+                stripped = line.strip()
+                if stripped:
+                    length += len(stripped)
+                    count += 1
+            chapter_starts.append(chapter_starts[-1] + length)
+            chapter_bounds.append(chapter_bounds[-1] + count)
+        return cls(chapter_starts, chapter_bounds)
+
+    @property
+    def length(self) -> int:
+        return self.chapter_starts[-1]
+
+    def chapter_at(self, offset: int) -> int:
+        """Non-empty chapter holding ``offset``, clamped to the book."""
+        offset = max(0, min(offset, self.length - 1))
+        return bisect_right(self.chapter_starts, offset) - 1
+
+    def nearest_chapter(self, chapter_index: int) -> Optional[int]:
+        """First chapter with paragraphs from ``chapter_index`` on, else before it."""
+        bounds = self.chapter_bounds
+        following = bisect_right(bounds, bounds[chapter_index]) - 1
+        if following < len(bounds) - 1:
+            return following
+        if bounds[chapter_index]:
+            return bisect_right(bounds, bounds[chapter_index] - 1) - 1
+        return None
 
 
 class BookLoader:
-    def __init__(self, path: Path) -> None:
+    def __init__(
+        self,
+        path: Path,
+        *,
+        lazy: Optional[bool] = None,
+        chapter_cache_size: int = DEFAULT_CHAPTER_CACHE_SIZE,
+        index_cache: bool = False,
+        compact: bool = False,
+    ) -> None:
         self.path = path
-        self.chapters = self._parse(path.read_text())
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        if lazy is None:
+            lazy = path.stat().st_size >= LAZY_LOAD_THRESHOLD
+        self.lazy = lazy
+        self.index: Optional[BookIndex] = None
+        self._buffer: Buffer = b""
+        self._spans: Optional[List[ChapterSpan]] = None
+        if lazy or index_cache or compact:
+            self.chapters = self._map_chapters(
+                path,
+                chapter_cache_size,
+                lazy=lazy,
+                index_cache=index_cache,
+                compact=compact,
+            )
+        else:
+            self.chapters = self._parse(path.read_text(encoding="utf-8"))
         self.current_chapter = 0
         self.current_paragraph = 0
         self._listeners: List[Callable[[dict], None]] = []
+        self.tokenizer: Optional[Tokenizer] = None
+        self._token_cache_size = DEFAULT_TOKEN_CACHE_SIZE
+        self._tokens: "OrderedDict[Tuple[int, int], FrozenSet[str]]" = OrderedDict()
+        self._tokens_lock = threading.Lock()
+        self._positions: Optional[PositionIndex] = None
+
+    def set_tokenizer(
+        self,
+        tokenizer: Optional[Tokenizer],
+        cache_size: int = DEFAULT_TOKEN_CACHE_SIZE,
+    ) -> None:
+        """Add a ``tokens`` set to every context, computed once per paragraph."""
+        self.tokenizer = tokenizer
+        self._token_cache_size = max(1, cache_size)
+        with self._tokens_lock:
+            self._tokens.clear()
+
+    def tokens_at(self, chapter_index: int, paragraph_index: int) -> FrozenSet[str]:
+        key = (chapter_index, paragraph_index)
+        with self._tokens_lock:
+            tokens = self._tokens.get(key)
+            if tokens is not None:
+                self._tokens.move_to_end(key)
+                return tokens
+        paragraphs = self.chapters[chapter_index].paragraphs if self.chapters else ()
+        text = paragraphs[paragraph_index].text if paragraphs else ""
+        tokens = self.tokenizer.tokens(text)
+        with self._tokens_lock:
+            self._tokens[key] = tokens
+            if len(self._tokens) > self._token_cache_size:
+                self._tokens.popitem(last=False)
+        return tokens
+
+    @property
+    def positions(self) -> PositionIndex:
+        """Chapter prefix sums, built on first use.
+
+        A lazily loaded book takes them from its sidecar index or chapter
+        spans without materializing any chapter.
+        """
+        if self._positions is None:
+            with span("loader.positions"):
+                if self.lazy and self.index is not None:
+                    positions = PositionIndex.from_index(self._buffer, self.index)
+                elif self.lazy and self._spans is not None:
+                    positions = PositionIndex.from_spans(self._buffer, self._spans)
+                else:
+                    positions = PositionIndex.build(self.chapters)
+                self._positions = positions
+        return self._positions
+
+    def global_offset(self, chapter_index: int, paragraph_index: int) -> int:
+        """Character offset of a paragraph from the start of the book."""
+        if not self.chapters:
+            return 0
+        paragraphs = self.chapters[chapter_index].paragraphs
+        local = paragraphs[paragraph_index].offset if paragraphs else 0
+        return self.positions.chapter_starts[chapter_index] + local
+
+    def position_at_offset(self, offset: int) -> Tuple[int, int]:
+        """(chapter, paragraph) holding a global character offset."""
+        if not self.positions.length:
+            return 0, 0
+        chapter_index = self.positions.chapter_at(offset)
+        local = offset - self.positions.chapter_starts[chapter_index]
+        paragraphs = self.chapters[chapter_index].paragraphs
+        paragraph_index = bisect_right(
+            paragraphs, local, key=lambda paragraph: paragraph.offset
+        )
+        return chapter_index, max(0, paragraph_index - 1)
+
+    def _map_chapters(
+        self,
+        path: Path,
+        cache_size: int,
+        *,
+        lazy: bool,
+        index_cache: bool,
+        compact: bool,
+    ) -> Sequence[Chapter]:
+        if compact and not lazy:
+            # eager columns keep slicing this buffer for the loader's lifetime
+            buffer: Buffer = path.read_bytes()
+        else:
+            buffer = self._open_map(path)
+        if index_cache:
+            index = self.index = book_index.load_or_build(path, buffer)
+            count = len(index)
+            build = partial(chapter_from_index, buffer, index, compact)
+        else:
+            spans = self._spans = book_index.scan_chapter_spans(buffer)
+            count = len(spans)
+            build = partial(chapter_from_span, buffer, spans, compact)
+        if lazy:
+            self._buffer = buffer
+            return LazyChapters(count, build, cache_size)
+        chapters = [build(chapter_index) for chapter_index in range(count)]
+        self.close()
+        return chapters
+
+    def _open_map(self, path: Path) -> Buffer:
+        self._file = path.open("rb")
+        if not path.stat().st_size:
+            return b""
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def close(self) -> None:
+        """Release the memory map held by a lazily loaded book."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
     @staticmethod
     def _parse(raw: str) -> List[Chapter]:
@@ -50,38 +404,108 @@ class BookLoader:
             chapters.append(Chapter(current_title, current_paragraphs))
         return chapters
 
+    @staticmethod
+    def _parse_body(raw: str) -> List[Paragraph]:
+        paragraphs: List[Paragraph] = []
+        offset = 0
+        for line in raw.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                continue
+            paragraphs.append(Paragraph(stripped, offset))
+            offset += len(stripped)
+        return paragraphs
+
     def add_listener(self, callback: Callable[[dict], None]) -> None:
         self._listeners.append(callback)
 
     def _emit_context(self) -> None:
         self._listeners[:]  # ensure list referenced
-        context = self.current_context()
-        for listener in self._listeners:
-            listener(context)
+        with span("loader.emit_context"):
+            with span("loader.context"):
+                context = self.current_context()
+            for listener in self._listeners:
+                listener(context)
 
     def current_context(self) -> dict:
+        return self.context_at(self.current_chapter, self.current_paragraph)
+
+    def context_at(self, chapter_index: int, paragraph_index: int) -> dict:
+        """Context for any position, without navigating or notifying listeners."""
         if not self.chapters:
-            return {
+            context = {
                 "chapter_title": "",
                 "text": "",
                 "offset": 0,
                 "chapter_index": 0,
                 "paragraph_index": 0,
             }
-        chapter = self.chapters[self.current_chapter]
+            if self.tokenizer is not None:
+                context["tokens"] = frozenset()
+            return context
+        chapter = self.chapters[chapter_index]
         paragraph_text = ""
         offset = 0
         if chapter.paragraphs:
-            paragraph = chapter.paragraphs[self.current_paragraph]
+            paragraph = chapter.paragraphs[paragraph_index]
             paragraph_text = paragraph.text
             offset = paragraph.offset
-        return {
+        context = {
             "chapter_title": chapter.title,
             "text": paragraph_text,
             "offset": offset,
-            "chapter_index": self.current_chapter,
-            "paragraph_index": self.current_paragraph,
+            "chapter_index": chapter_index,
+            "paragraph_index": paragraph_index,
         }
+        if self.tokenizer is not None:
+            context["tokens"] = self.tokens_at(chapter_index, paragraph_index)
+        return context
+
+    def _position_after(
+        self, chapter_index: int, paragraph_index: int
+    ) -> Optional[Tuple[int, int]]:
+        if paragraph_index + 1 < len(self.chapters[chapter_index].paragraphs):
+            return chapter_index, paragraph_index + 1
+        for following in range(chapter_index + 1, len(self.chapters)):
+            if self.chapters[following].paragraphs:
+                return following, 0
+        return None
+
+    def _position_before(
+        self, chapter_index: int, paragraph_index: int
+    ) -> Optional[Tuple[int, int]]:
+        if paragraph_index > 0:
+            return chapter_index, paragraph_index - 1
+        for preceding in range(chapter_index - 1, -1, -1):
+            count = len(self.chapters[preceding].paragraphs)
+            if count:
+                return preceding, count - 1
+        return None
+
+    def neighbor_positions(
+        self,
+        ahead: int,
+        behind: int = 0,
+        origin: Optional[Tuple[int, int]] = None,
+    ) -> List[Tuple[int, int]]:
+        """Positions the reader reaches next, in reading order, then behind them.
+
+        ``origin`` defaults to the current position.
+        """
+        positions: List[Tuple[int, int]] = []
+        if not self.chapters:
+            return positions
+        if origin is None:
+            origin = (self.current_chapter, self.current_paragraph)
+        walks = ((self._position_after, ahead), (self._position_before, behind))
+        for step, count in walks:
+            position: Optional[Tuple[int, int]] = origin
+            for _ in range(count):
+                position = step(*position)
+                if position is None:
+                    break
+                positions.append(position)
+        return positions
 
     def _clamp_indices(self) -> None:
         if not self.chapters:
@@ -94,16 +518,8 @@ class BookLoader:
         # leap to the nearest chapter that actually has paragraphs
         chapter = self.chapters[self.current_chapter]
         if not chapter.paragraphs:
-            forward = self.current_chapter
-            while forward < len(self.chapters) and not self.chapters[forward].paragraphs:
-                forward += 1
-            if forward < len(self.chapters):
-                self.current_chapter = forward
-            else:
-                backward = self.current_chapter
-                while backward >= 0 and not self.chapters[backward].paragraphs:
-                    backward -= 1
-                self.current_chapter = max(0, backward)
+            nearest = self.positions.nearest_chapter(self.current_chapter)
+            self.current_chapter = nearest if nearest is not None else 0
             chapter = self.chapters[self.current_chapter]
         if chapter.paragraphs:
             self.current_paragraph = max(
@@ -137,3 +553,11 @@ class BookLoader:
         self.current_paragraph = paragraph_index
         self._clamp_indices()
         self._emit_context()
+
+    def navigate_to_offset(self, offset: int) -> None:
+        self.navigate_to(*self.position_at_offset(offset))
+
+    def navigate_to_fraction(self, fraction: float) -> None:
+        """Jump to the paragraph ``fraction`` (0.0-1.0) of the way into the book."""
+        fraction = max(0.0, min(fraction, 1.0))
+        self.navigate_to_offset(int(fraction * self.positions.length))
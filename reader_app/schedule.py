@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import os
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from reader_app.book_index import ColumnReader, SourceKey, to_le
+from reader_app.catalog_matrix import HAVE_NUMPY, CatalogMatrix
+from reader_app.context_matcher import DEFAULT_TOP_K
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+from reader_app.reader import BookLoader
+from reader_app.tokenizer import Tokenizer
+
+SCHEDULE_SUFFIX = ".sgsched"
+# candidates stored per paragraph: a matcher's winner plus its top k
+DEFAULT_SCHEDULE_DEPTH = DEFAULT_TOP_K + 1
+_MAGIC = b"SGSCHED3"
+# magic, size, mtime_ns, book digest, catalog digest, path length,
+# chapters, paragraphs, candidates, depth
+_HEADER = struct.Struct("<8sQq16s16sIIQQI")
+
+ChapterRows = Tuple[array, array]
+
+
+def schedule_path(book_path: Path) -> Path:
+    return book_path.with_name(book_path.name + SCHEDULE_SUFFIX)
+
+
+class ImageSchedule:
+    """Ranked catalog candidates for every paragraph of one book.
+
+    Paragraph ``p`` of chapter ``c`` is row ``chapter_bounds[c] + p``; its
+    candidates, best first, are the catalog entry positions in
+    ``candidates[row_bounds[row]:row_bounds[row + 1]]``. A schedule is only
+    meaningful for the catalog whose ``fingerprint`` it was built with.
+    Rows keep at most ``depth`` candidates (0: all of them).
+    """
+
+    def __init__(
+        self,
+        catalog_digest: bytes,
+        chapter_bounds: array,
+        row_bounds: array,
+        candidates: array,
+        depth: int = 0,
+    ) -> None:
+        self.catalog_digest = catalog_digest
+        self.chapter_bounds = chapter_bounds
+        self.row_bounds = row_bounds
+        self.candidates = candidates
+        self.depth = depth
+
+    def __len__(self) -> int:
+        return len(self.chapter_bounds) - 1
+
+    def ranked(self, chapter_index: int, paragraph_index: int) -> Optional[array]:
+        """Candidate positions for a paragraph, or None if it is not scheduled."""
+        if not 0 <= chapter_index < len(self):
+            return None
+        row = self.chapter_bounds[chapter_index] + paragraph_index
+        if paragraph_index < 0 or row >= self.chapter_bounds[chapter_index + 1]:
+            return None
+        return self.candidates[self.row_bounds[row] : self.row_bounds[row + 1]]
+
+    def truncated(self, row_length: int) -> bool:
+        """Whether a row this long may have lost candidates to ``depth``."""
+        return bool(self.depth) and row_length >= self.depth
+
+    def write(self, path: Path, key: SourceKey) -> None:
+        encoded_path = key.path.encode("utf-8")
+        header = _HEADER.pack(
+            _MAGIC,
+            key.size,
+            key.mtime_ns,
+            key.digest,
+            self.catalog_digest,
+            len(encoded_path),
+            len(self),
+            len(self.row_bounds) - 1,
+            len(self.candidates),
+            self.depth,
+        )
+        payload = b"".join(
+            [
+                header,
+                encoded_path,
+                to_le(self.chapter_bounds),
+                to_le(self.row_bounds),
+                to_le(self.candidates),
+            ]
+        )
+        temp = path.with_name(path.name + ".tmp")
+        temp.write_bytes(payload)
+        temp.replace(path)
+
+    @classmethod
+    def read(
+        cls, path: Path, key: SourceKey, catalog_digest: bytes
+    ) -> Optional["ImageSchedule"]:
+        """Load the schedule at ``path`` if it matches the book and catalog."""
+        try:
+            raw = path.read_bytes()
+            (
+                magic,
+                size,
+                mtime_ns,
+                digest,
+                stored_catalog,
+                path_length,
+                chapter_count,
+                paragraph_count,
+                candidate_count,
+                depth,
+            ) = _HEADER.unpack_from(raw)
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or stored_catalog != catalog_digest:
+            return None
+        reader = ColumnReader(raw, _HEADER.size)
+        try:
+            stored_path = reader.take(path_length).decode("utf-8", "replace")
+            if SourceKey(stored_path, size, mtime_ns, digest) != key:
+                return None
+            chapter_bounds = reader.column("Q", chapter_count + 1)
+            row_bounds = reader.column("I", paragraph_count + 1)
+            candidates = reader.column("I", candidate_count)
+        except ValueError:
+            return None
+        if (
+            not reader.at_end()
+            or chapter_bounds[-1] != paragraph_count
+            or row_bounds[-1] != candidate_count
+        ):
+            return None
+        return cls(catalog_digest, chapter_bounds, row_bounds, candidates, depth)
+
+
+_worker_loader: Optional[BookLoader] = None
+_worker_catalog: Optional[ImageCatalog] = None
+_worker_positions: Dict[int, int] = {}
+_worker_matrix: Optional[CatalogMatrix] = None
+_worker_depth = 0
+
+
+def _init_worker(
+    book_path: Path,
+    entries: Sequence[ImageCatalogEntry],
+    tokenizer_key: Tuple[bool, bool],
+    vectorized: bool = False,
+    depth: int = 0,
+) -> None:
+    global _worker_loader, _worker_catalog, _worker_positions, _worker_matrix
+    global _worker_depth
+    _worker_loader = BookLoader(book_path, lazy=True, index_cache=True)
+    _worker_catalog = ImageCatalog(entries, Tokenizer(*tokenizer_key))
+    _worker_positions = {
+        id(entry): position for position, entry in enumerate(_worker_catalog.entries())
+    }
+    _worker_matrix = CatalogMatrix(_worker_catalog) if vectorized else None
+    _worker_depth = depth
+
+
+def _schedule_chapter(chapter_index: int) -> ChapterRows:
+    chapter = _worker_loader.chapters[chapter_index]
+    tokenizer = _worker_catalog.tokenizer
+    if _worker_matrix is not None:
+        lengths, positions = _worker_matrix.rank_many(
+            [
+                (chapter.title, paragraph.offset, tokenizer.tokens(paragraph.text))
+                for paragraph in chapter.paragraphs
+            ],
+            _worker_depth or None,
+        )
+        return array("I", lengths.tolist()), array("I", positions.tolist())
+    lengths = array("I")
+    candidates = array("I")
+    for paragraph in chapter.paragraphs:
+        terms = tokenizer.tokens(paragraph.text)
+        if _worker_depth:
+            ranked = _worker_catalog.top_for_terms(
+                chapter.title, paragraph.offset, terms, _worker_depth
+            )[:_worker_depth]
+        else:
+            ranked = _worker_catalog.find_for_terms(
+                chapter.title, paragraph.offset, terms
+            )
+        lengths.append(len(ranked))
+        candidates.extend(_worker_positions[id(entry)] for entry in ranked)
+    return lengths, candidates
+
+
+def build_schedule(
+    book_path: Path,
+    catalog: ImageCatalog,
+    workers: Optional[int] = None,
+    vectorized: Optional[bool] = None,
+    depth: int = DEFAULT_SCHEDULE_DEPTH,
+) -> ImageSchedule:
+    """Rank the catalog for every paragraph, one chapter per pool task.
+
+    ``workers=1`` runs in this process; otherwise chapters are spread over a
+    process pool of ``workers`` (default: CPU count) processes. Each chapter
+    is ranked as one ``CatalogMatrix`` batch when ``vectorized`` (default:
+    whenever numpy is installed), else paragraph by paragraph. Only the best
+    ``depth`` candidates of each paragraph are kept (0 keeps all).
+    """
+    if vectorized is None:
+        vectorized = HAVE_NUMPY
+    loader = BookLoader(book_path, lazy=True, index_cache=True)
+    chapter_count = len(loader.chapters)
+    loader.close()
+    initargs = (
+        book_path,
+        catalog.entries(),
+        catalog.tokenizer.key,
+        vectorized,
+        depth,
+    )
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or chapter_count <= 1:
+        _init_worker(*initargs)
+        try:
+            rows: List[ChapterRows] = [
+                _schedule_chapter(index) for index in range(chapter_count)
+            ]
+        finally:
+            _worker_loader.close()
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, chapter_count),
+            initializer=_init_worker,
+            initargs=initargs,
+        ) as pool:
+            rows = list(pool.map(_schedule_chapter, range(chapter_count)))
+
+    chapter_bounds = array("Q", [0])
+    row_bounds = array("I", [0])
+    candidates = array("I")
+    for lengths, chapter_candidates in rows:
+        for length in lengths:
+            row_bounds.append(row_bounds[-1] + length)
+        candidates.extend(chapter_candidates)
+        chapter_bounds.append(len(row_bounds) - 1)
+    return ImageSchedule(
+        catalog.fingerprint(), chapter_bounds, row_bounds, candidates, depth
+    )
+
+
+def write_schedule(
+    book_path: Path,
+    catalog: ImageCatalog,
+    workers: Optional[int] = None,
+    vectorized: Optional[bool] = None,
+    depth: int = DEFAULT_SCHEDULE_DEPTH,
+) -> ImageSchedule:
+    schedule = build_schedule(book_path, catalog, workers, vectorized, depth)
+    key = SourceKey.for_file(book_path, book_path.read_bytes())
+    schedule.write(schedule_path(book_path), key)
+    return schedule
+
+
+def load_schedule(
+    book_path: Path,
+    catalog: ImageCatalog,
+    catalog_digest: Optional[bytes] = None,
+) -> Optional[ImageSchedule]:
+    """The stored schedule for ``book_path`` if it is still valid, else None.
+
+    Pass ``catalog_digest`` (the catalog's ``fingerprint``) when loading off
+    the thread that edits the catalog.
+    """
+    target = schedule_path(book_path)
+    if not target.exists():
+        return None
+    try:
+        key = SourceKey.for_file(book_path, book_path.read_bytes())
+    except OSError:
+        return None
+    if catalog_digest is None:
+        catalog_digest = catalog.fingerprint()
+    return ImageSchedule.read(target, key, catalog_digest)
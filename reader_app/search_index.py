@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from reader_app.book_index import ColumnReader, SourceKey, to_le
+from reader_app.reader import BookLoader, Chapter
+from reader_app.tokenizer import Tokenizer
+
+SEARCH_SUFFIX = ".sgsearch"
+_MAGIC = b"SGSRCH01"
+# magic, size, mtime_ns, digest, fold_accents, stem, path length, term bytes,
+# terms, paragraphs, postings, positions
+_HEADER = struct.Struct("<8sQq16s??IQIIQQ")
+DEFAULT_RESULT_LIMIT = 50
+# BM25 term-frequency saturation and paragraph-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# A phrase word's run is probed by bisection instead of hashed whole when it
+# is longer than this many times the surviving candidate starts.
+PHRASE_PROBE_RATIO = 16
+# Quoted phrases or single words, in query order.
+_QUERY_PART = re.compile(r'"([^"]*)"?|([^\s"]+)')
+
+
+def search_index_path(book_path: Path) -> Path:
+    return book_path.with_name(book_path.name + SEARCH_SUFFIX)
+
+
+def _contains(ordered: array, value: int, start: int, end: int) -> bool:
+    found = bisect_left(ordered, value, start, end)
+    return found < end and ordered[found] == value
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    chapter_index: int
+    paragraph_index: int
+    score: float
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """Arguments for ``BookLoader.navigate_to``."""
+        return self.chapter_index, self.paragraph_index
+
+
+def parse_query(query: str, tokenizer: Tokenizer) -> List[List[str]]:
+    """Split a query into phrases (quoted, several words) and single words."""
+    groups = []
+    for phrase, word in _QUERY_PART.findall(query):
+        words = tokenizer.words(phrase or word)
+        if len(words) > 1 and phrase:
+            groups.append(words)
+        else:
+            groups.extend([single] for single in words)
+    return groups
+
+
+class SearchIndex:
+    """Positional inverted index over every paragraph of a book.
+
+    Paragraphs are numbered in reading order (``paragraph_chapters`` and
+    ``paragraph_indices`` map them back). Term ``t`` owns postings
+    ``term_bounds[t]:term_bounds[t + 1]``; posting ``i`` names paragraph
+    ``docs[i]``, its precomputed BM25 weight ``impacts[i]`` and the word
+    positions ``positions[position_bounds[i]:position_bounds[i + 1]]``.
+    Positions count words across the whole book, with paragraph ``d``
+    starting at ``paragraph_starts[d]`` and one unused position between
+    paragraphs, so a phrase can be matched over a term's entire position
+    run with set operations and never spans two paragraphs.
+    """
+
+    def __init__(
+        self,
+        tokenizer: Tokenizer,
+        terms: Sequence[str],
+        term_bounds: array,
+        docs: array,
+        impacts: array,
+        position_bounds: array,
+        positions: array,
+        paragraph_starts: array,
+        paragraph_chapters: array,
+        paragraph_indices: array,
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.terms = list(terms)
+        self.term_ids: Dict[str, int] = {
+            term: index for index, term in enumerate(terms)
+        }
+        self.term_bounds = term_bounds
+        self.docs = docs
+        self.impacts = impacts
+        self.position_bounds = position_bounds
+        self.positions = positions
+        self.paragraph_starts = paragraph_starts
+        # bisect_right over the ends yields the paragraph of a word position;
+        # a list bisects without boxing every probed item
+        self._paragraph_ends = paragraph_starts.tolist()[1:]
+        self.paragraph_chapters = paragraph_chapters
+        self.paragraph_indices = paragraph_indices
+
+    def __len__(self) -> int:
+        return len(self.paragraph_chapters)
+
+    def _postings(self, term: str) -> Tuple[int, int]:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return 0, 0
+        return self.term_bounds[term_id], self.term_bounds[term_id + 1]
+
+    def _idf(self, start: int, end: int) -> float:
+        frequency = end - start
+        return math.log(1 + (len(self) - frequency + 0.5) / (frequency + 0.5))
+
+    def _occurrences(self, start: int, end: int, shift: int = 0) -> Set[int]:
+        """Positions of a term's postings, each moved back by ``shift``."""
+        bounds = self.position_bounds
+        found = self.positions[bounds[start] : bounds[end]]
+        return set(map((-shift).__add__, found)) if shift else set(found)
+
+    def _phrase_docs(self, phrase: Sequence[str]) -> Set[int]:
+        bounds = [self._postings(term) for term in phrase]
+        if any(end == start for start, end in bounds):
+            return set()
+        # phrase start positions: word k of the phrase sits at start + k
+        order = sorted(range(len(phrase)), key=lambda k: bounds[k][1] - bounds[k][0])
+        starts = self._occurrences(*bounds[order[0]], order[0])
+        for offset in order[1:]:
+            if not starts:
+                break
+            start, end = bounds[offset]
+            first, last = self.position_bounds[start], self.position_bounds[end]
+            if len(starts) * PHRASE_PROBE_RATIO < last - first:
+                # few candidates: probe the long run instead of hashing all of it
+                positions = self.positions
+                starts = {
+                    candidate
+                    for candidate in starts
+                    if _contains(positions, candidate + offset, first, last)
+                }
+            else:
+                starts &= self._occurrences(start, end, offset)
+        return set(map(partial(bisect_right, self._paragraph_ends), starts))
+
+    def _required_postings(
+        self, required: Set[int], start: int, end: int
+    ) -> List[Tuple[int, float]]:
+        """(paragraph, impact) of a term's postings within ``required``."""
+        docs, impacts = self.docs, self.impacts
+        if len(required) * PHRASE_PROBE_RATIO < end - start:
+            # few phrase matches: find each in the sorted run by bisection
+            found = []
+            for doc in required:
+                index = bisect_left(docs, doc, start, end)
+                if index < end and docs[index] == doc:
+                    found.append((doc, impacts[index]))
+            return found
+        return [
+            (docs[index], impacts[index])
+            for index in range(start, end)
+            if docs[index] in required
+        ]
+
+    def search(self, query: str, limit: int = DEFAULT_RESULT_LIMIT) -> List[SearchHit]:
+        """Paragraphs matching ``query``, best BM25 score first.
+
+        Every quoted phrase must occur in a result; plain words only add to
+        the score. Ties keep reading order.
+        """
+        groups = parse_query(query, self.tokenizer)
+        required: Optional[Set[int]] = None
+        for group in groups:
+            if len(group) > 1:
+                found = self._phrase_docs(group)
+                required = found if required is None else required & found
+        terms = list(dict.fromkeys(term for group in groups for term in group))
+        postings = [self._postings(term) for term in terms]
+        postings = [(start, end) for start, end in postings if end > start]
+        if not postings or required is not None and not required:
+            return []
+
+        if len(postings) == 1 and required is None:
+            start, end = postings[0]
+            idf = self._idf(start, end)
+            impacts = self.impacts
+            best = heapq.nlargest(limit, range(start, end), key=impacts.__getitem__)
+            ranked = [(self.docs[index], idf * impacts[index]) for index in best]
+        else:
+            scores: Dict[int, float] = {}
+            get = scores.get
+            for start, end in postings:
+                idf = self._idf(start, end)
+                if required is None:
+                    pairs = zip(self.docs[start:end], self.impacts[start:end])
+                else:
+                    pairs = self._required_postings(required, start, end)
+                for doc, impact in pairs:
+                    scores[doc] = get(doc, 0.0) + idf * impact
+            # every paragraph scoring at least the limit-th best, then ties
+            # go to the earlier paragraph
+            cutoff = min(heapq.nlargest(limit, scores.values()), default=0.0)
+            ranked = sorted(
+                ((doc, score) for doc, score in scores.items() if score >= cutoff),
+                key=lambda item: (-item[1], item[0]),
+            )[:limit]
+        return [
+            SearchHit(self.paragraph_chapters[doc], self.paragraph_indices[doc], score)
+            for doc, score in ranked
+        ]
+
+    def write(self, path: Path, key: SourceKey) -> None:
+        encoded_path = key.path.encode("utf-8")
+        blob = "\0".join(self.terms).encode("utf-8")
+        header = _HEADER.pack(
+            _MAGIC,
+            key.size,
+            key.mtime_ns,
+            key.digest,
+            self.tokenizer.fold_accents,
+            self.tokenizer.stem,
+            len(encoded_path),
+            len(blob),
+            len(self.terms),
+            len(self),
+            len(self.docs),
+            len(self.positions),
+        )
+        parts = [header, encoded_path, blob]
+        parts.extend(
+            to_le(column)
+            for column in (
+                self.term_bounds,
+                self.docs,
+                self.impacts,
+                self.position_bounds,
+                self.positions,
+                self.paragraph_starts,
+                self.paragraph_chapters,
+                self.paragraph_indices,
+            )
+        )
+        temp = path.with_name(path.name + ".tmp")
+        temp.write_bytes(b"".join(parts))
+        temp.replace(path)
+
+    @classmethod
+    def read(
+        cls, path: Path, key: SourceKey, tokenizer: Tokenizer
+    ) -> Optional["SearchIndex"]:
+        """Load the index at ``path`` if it matches the book and tokenizer."""
+        try:
+            raw = path.read_bytes()
+            (
+                magic,
+                size,
+                mtime_ns,
+                digest,
+                fold_accents,
+                stem,
+                path_length,
+                blob_length,
+                term_count,
+                paragraph_count,
+                posting_count,
+                position_count,
+            ) = _HEADER.unpack_from(raw)
+        except (OSError, struct.error):
+            return None
+        if magic != _MAGIC or (fold_accents, stem) != tokenizer.key:
+            return None
+        reader = ColumnReader(raw, _HEADER.size)
+        try:
+            stored_path = reader.take(path_length).decode("utf-8", "replace")
+            if SourceKey(stored_path, size, mtime_ns, digest) != key:
+                return None
+            blob = reader.text(blob_length)
+            columns = [
+                reader.column(typecode, count)
+                for typecode, count in (
+                    ("I", term_count + 1),
+                    ("I", posting_count),
+                    ("f", posting_count),
+                    ("Q", posting_count + 1),
+                    ("I", position_count),
+                    ("Q", paragraph_count + 1),
+                    ("I", paragraph_count),
+                    ("I", paragraph_count),
+                )
+            ]
+        except ValueError:
+            return None
+        terms = blob.split("\0") if term_count else []
+        if (
+            not reader.at_end()
+            or len(terms) != term_count
+            or columns[0][-1] != posting_count
+            or columns[3][-1] != position_count
+        ):
+            return None
+        return cls(tokenizer, terms, *columns)
+
+
+def build_search_index(
+    chapters: Sequence[Chapter], tokenizer: Tokenizer
+) -> SearchIndex:
+    """Index every paragraph of ``chapters`` in one pass."""
+    term_docs: Dict[str, array] = {}
+    term_counts: Dict[str, array] = {}
+    term_positions: Dict[str, array] = {}
+    paragraph_starts = array("Q", [0])
+    paragraph_chapters = array("I")
+    paragraph_indices = array("I")
+    lengths = array("I")
+    for chapter_index, chapter in enumerate(chapters):
+        for paragraph_index, paragraph in enumerate(chapter.paragraphs):
+            doc = len(lengths)
+            paragraph_chapters.append(chapter_index)
+            paragraph_indices.append(paragraph_index)
+            words = tokenizer.words(paragraph.text)
+            lengths.append(len(words))
+            base = paragraph_starts[-1]
+            paragraph_starts.append(base + len(words) + 1)
+            occurrences: Dict[str, List[int]] = {}
+            for position, word in enumerate(words, base):
+                occurrences.setdefault(word, []).append(position)
+            for word, found in occurrences.items():
+                docs = term_docs.get(word)
+                if docs is None:
+                    docs = term_docs[word] = array("I")
+                    term_counts[word] = array("I")
+                    term_positions[word] = array("I")
+                docs.append(doc)
+                term_counts[word].append(len(found))
+                term_positions[word].extend(found)
+
+    average = sum(lengths) / len(lengths) if lengths else 0.0
+    norms = [
+        BM25_K1 * (1 - BM25_B + BM25_B * length / average) if average else BM25_K1
+        for length in lengths
+    ]
+    terms = list(term_docs)
+    term_bounds = array("I", [0])
+    docs = array("I")
+    impacts = array("f")
+    position_bounds = array("Q", [0])
+    positions = array("I")
+    for term in terms:
+        term_doc_list = term_docs[term]
+        docs.extend(term_doc_list)
+        term_bounds.append(len(docs))
+        for doc, count in zip(term_doc_list, term_counts[term]):
+            impacts.append(count * (BM25_K1 + 1) / (count + norms[doc]))
+            position_bounds.append(position_bounds[-1] + count)
+        positions.extend(term_positions[term])
+    return SearchIndex(
+        tokenizer,
+        terms,
+        term_bounds,
+        docs,
+        impacts,
+        position_bounds,
+        positions,
+        paragraph_starts,
+        paragraph_chapters,
+        paragraph_indices,
+    )
+
+
+def load_search_index(
+    book_path: Path, tokenizer: Tokenizer, persist: bool = True
+) -> SearchIndex:
+    """The stored index of ``book_path`` if current, else a fresh (saved) one.
+
+    Reads the book through its own lazily mapped ``BookLoader``, so it can
+    run on a background thread while the window uses another loader.
+    """
+    key = SourceKey.for_file(book_path, book_path.read_bytes())
+    target = search_index_path(book_path)
+    if target.exists():
+        index = SearchIndex.read(target, key, tokenizer)
+        if index is not None:
+            return index
+    loader = BookLoader(book_path, lazy=True, index_cache=True)
+    try:
+        index = build_search_index(loader.chapters, tokenizer)
+    finally:
+        loader.close()
+    if persist:
+        try:
+            index.write(target, key)
+        except OSError:
+            pass
+    return index
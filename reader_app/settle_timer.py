@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Callable
+
+
+class SettleTimer:
+    """Restartable single-shot timer on top of a one-off ``schedule``.
+
+    Every ``start`` schedules a wake-up (the window passes a ``QTimer``
+    single shot with the settle delay) and outdates the ones already
+    pending, so ``callback`` runs once, after the last ``start`` of a burst
+    has gone unanswered for a whole delay. ``stop`` drops the pending run.
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[Callable[[], None]], None],
+        callback: Callable[[], None],
+    ) -> None:
+        self.schedule = schedule
+        self.callback = callback
+        self.fired = 0
+        self._generation = 0
+        self._active = False
+
+    def is_active(self) -> bool:
+        return self._active
+
+    def start(self) -> None:
+        self._generation += 1
+        self._active = True
+        generation = self._generation
+        self.schedule(lambda: self._wake(generation))
+
+    def stop(self) -> None:
+        self._generation += 1
+        self._active = False
+
+    def _wake(self, generation: int) -> None:
+        if generation != self._generation:
+            return
+        self._active = False
+        self.fired += 1
+        self.callback()
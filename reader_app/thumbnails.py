@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# longest-edge pixel sizes of the downscaled versions kept per image
+DEFAULT_THUMBNAIL_EDGES = (256, 512, 1024, 2048)
+MANIFEST_NAME = "levels.json"
+# path -> (size, mtime_ns, digest) of every image hashed so far
+DIGEST_INDEX_NAME = "digests.json"
+
+Size = Tuple[int, int]
+
+
+def default_thumbnail_root() -> Path:
+    return Path.home() / ".cache" / "storyglassy" / "thumbnails"
+
+
+def content_digest(path: Path) -> str:
+    with open(path, "rb") as handle:
+        digest = hashlib.file_digest(handle, lambda: hashlib.blake2b(digest_size=16))
+    return digest.hexdigest()
+
+
+def level_sizes(width: int, height: int, edges: Sequence[int]) -> List[Size]:
+    """Sizes of the versions strictly smaller than a ``width`` x ``height`` image."""
+    longest = max(width, height)
+    sizes = []
+    for edge in sorted(set(edges)):
+        if edge >= longest:
+            break
+        scale = edge / longest
+        sizes.append((max(1, round(width * scale)), max(1, round(height * scale))))
+    return sizes
+
+
+@dataclass(frozen=True)
+class Thumbnail:
+    path: Path
+    width: int
+    height: int
+
+
+def pick_level(levels: Sequence[Thumbnail], target: Size) -> Optional[Thumbnail]:
+    """Smallest level that covers ``target`` without upscaling, if any.
+
+    Images are shown scaled to cover the label, so a level qualifies when
+    both of its sides are at least the label's.
+    """
+    covering = [
+        level
+        for level in levels
+        if level.width >= target[0] and level.height >= target[1]
+    ]
+    return min(covering, key=lambda level: level.width * level.height, default=None)
+
+
+class ThumbnailStore:
+    """Content-addressed directory of downscaled image versions.
+
+    Versions of an image live under ``<root>/<digest[:2]>/<digest>/`` where
+    the digest hashes the image file's bytes, so renamed or duplicated files
+    share them and an edited file gets new ones. A directory counts as
+    complete once its manifest, written last, exists. Digests are memoized
+    per path, keyed by the file's size and mtime, and kept across sessions
+    in ``<root>/digests.json`` by ``save_digests``, so an unchanged image is
+    only ever hashed once.
+    """
+
+    def __init__(
+        self,
+        root: Optional[Path] = None,
+        edges: Sequence[int] = DEFAULT_THUMBNAIL_EDGES,
+    ) -> None:
+        self.root = root or default_thumbnail_root()
+        self.edges = tuple(edges)
+        self._lock = threading.Lock()
+        self._digests: Optional[Dict[str, Tuple[int, int, str]]] = None
+        self._digests_dirty = False
+        self._levels: Dict[str, List[Thumbnail]] = {}
+
+    def _known_digests(self) -> Dict[str, Tuple[int, int, str]]:
+        # called with the lock held
+        if self._digests is None:
+            self._digests = {}
+            try:
+                raw = (self.root / DIGEST_INDEX_NAME).read_text(encoding="utf-8")
+                for name, (size, mtime_ns, digest) in json.loads(raw).items():
+                    self._digests[name] = (int(size), int(mtime_ns), str(digest))
+            except (OSError, ValueError, TypeError, AttributeError):
+                pass
+        return self._digests
+
+    def digest_for(self, path: Path) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            known = self._known_digests().get(str(path))
+        if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+            return known[2]
+        try:
+            digest = content_digest(path)
+        except OSError:
+            return None
+        with self._lock:
+            self._known_digests()[str(path)] = (stat.st_size, stat.st_mtime_ns, digest)
+            self._digests_dirty = True
+        return digest
+
+    def save_digests(self) -> None:
+        """Write memoized digests to the store root, if any are new."""
+        with self._lock:
+            if not self._digests_dirty:
+                return
+            payload = json.dumps(self._digests)
+            self._digests_dirty = False
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            temp = self.root / f".{DIGEST_INDEX_NAME}.{os.getpid()}"
+            temp.write_text(payload, encoding="utf-8")
+            temp.replace(self.root / DIGEST_INDEX_NAME)
+        except OSError:
+            pass
+
+    def directory(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def levels(self, digest: str) -> Optional[List[Thumbnail]]:
+        """The stored versions of an image, or None if none were generated."""
+        with self._lock:
+            cached = self._levels.get(digest)
+        if cached is not None:
+            return cached
+        directory = self.directory(digest)
+        try:
+            raw = (directory / MANIFEST_NAME).read_text(encoding="utf-8")
+            manifest = json.loads(raw)
+            levels = [
+                Thumbnail(directory / name, width, height)
+                for name, width, height in manifest["levels"]
+            ]
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+        with self._lock:
+            self._levels[digest] = levels
+        return levels
+
+    def lookup(self, path: Path, target: Size) -> Optional[Thumbnail]:
+        digest = self.digest_for(path)
+        if digest is None:
+            return None
+        found = pick_level(self.levels(digest) or [], target)
+        if found is not None and not found.path.exists():
+            with self._lock:
+                self._levels.pop(digest, None)
+            return None
+        return found
+
+    def write_manifest(self, digest: str, levels: Sequence[Thumbnail]) -> None:
+        directory = self.directory(digest)
+        directory.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "levels": [[level.path.name, level.width, level.height] for level in levels]
+        }
+        temp = directory / f".{MANIFEST_NAME}.{os.getpid()}.{threading.get_ident()}"
+        temp.write_text(json.dumps(payload), encoding="utf-8")
+        temp.replace(directory / MANIFEST_NAME)
+        with self._lock:
+            self._levels[digest] = list(levels)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple
+
+# Runs of letters/digits; every punctuation mark, quote, dash or underscore splits.
+_WORD = re.compile(r"[^\W_]+")
+_STEM_SUFFIXES = (("ies", "y"), ("ing", ""), ("ed", ""), ("s", ""))
+_UNSTEMMED_ENDINGS = ("ss", "us", "is")
+_MIN_STEM = 3
+
+
+def fold_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def light_stem(word: str) -> str:
+    """Strip one common inflection (plural, -ing, -ed) from ``word``."""
+    if word.endswith(_UNSTEMMED_ENDINGS):
+        return word
+    for suffix, replacement in _STEM_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= _MIN_STEM:
+            return word[: -len(suffix)] + replacement
+    return word
+
+
+class Tokenizer:
+    """Turns paragraph text and catalog terms into comparable match terms.
+
+    Text is NFC-composed and casefolded, then split on anything that is not a
+    letter or digit, so quotes, em-dashes and hyphens never stick to words.
+    ``fold_accents`` maps "coração" to "coracao" and ``stem`` applies a light
+    suffix stripper. The catalog normalizes its keywords and tags with the
+    same instance, so both sides always agree.
+    """
+
+    def __init__(self, fold_accents: bool = False, stem: bool = False) -> None:
+        self.fold_accents = fold_accents
+        self.stem = stem
+        self._normalize_word = lru_cache(maxsize=65536)(self._normalize_word_uncached)
+
+    @property
+    def key(self) -> Tuple[bool, bool]:
+        return self.fold_accents, self.stem
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Tokenizer):
+            return NotImplemented
+        return self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        return f"Tokenizer(fold_accents={self.fold_accents}, stem={self.stem})"
+
+    def _prepare(self, text: str) -> str:
+        text = unicodedata.normalize("NFC", text).casefold()
+        if self.fold_accents:
+            text = fold_accents(text)
+        return text
+
+    def _normalize_word_uncached(self, word: str) -> str:
+        return light_stem(word) if self.stem else word
+
+    def words(self, text: str) -> List[str]:
+        """Normalized words of ``text`` in order, repeats included."""
+        normalize = self._normalize_word
+        return [normalize(word) for word in _WORD.findall(self._prepare(text))]
+
+    def tokens(self, text: str) -> FrozenSet[str]:
+        return frozenset(self.words(text))
+
+    def normalize(self, term: str) -> str:
+        """Normalize one catalog keyword or tag.
+
+        The term is split like text; a term of several words ("sun-rise",
+        "king's", "old town") comes back as its words joined by single
+        spaces and only matches text containing every one of them.
+        """
+        return " ".join(self.words(term))
+
+    def normalize_all(self, terms: Iterable[str]) -> FrozenSet[str]:
+        return frozenset(self.normalize(term) for term in terms)
+
+
+DEFAULT_TOKENIZER = Tokenizer()
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import (
+    QColor,
+    QFont,
+    QTextBlockFormat,
+    QTextCharFormat,
+    QTextCursor,
+    QTextDocument,
+)
+from PySide6.QtWidgets import QTextBrowser, QTextEdit
+
+from reader_app.chapter_layout import highlight_range, paragraph_starts
+from reader_app.instrumentation import span
+from reader_app.reader import Chapter
+
+# background of the paragraph the reader is on
+HIGHLIGHT_COLOR = QColor(255, 236, 179)
+PARAGRAPH_SPACING = 12
+# pixels kept visible above the current paragraph when scrolling to it
+SCROLL_MARGIN = 24
+
+
+class ChapterView:
+    """Keeps one chapter laid out in a ``QTextBrowser`` across page turns.
+
+    ``show`` builds a plain-text ``QTextDocument`` (heading plus one block
+    per paragraph) only when the chapter differs from the one on screen or
+    after ``invalidate``; moving between paragraphs of the same chapter only
+    swaps an extra selection and the scroll position, so Qt never re-lays
+    out the chapter on a page turn.
+    """
+
+    def __init__(self, browser: QTextBrowser) -> None:
+        self.browser = browser
+        self._chapter_key: Optional[object] = None
+        self._starts: List[int] = []
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        """Force the next ``show`` to rebuild, e.g. after a font change."""
+        self._chapter_key = None
+
+    def show(self, chapter_key: object, chapter: Chapter, paragraph_index: int) -> None:
+        rebuilt = chapter_key != self._chapter_key
+        if rebuilt:
+            with span("ui.build_chapter"):
+                self._build(chapter)
+            self._chapter_key = chapter_key
+        with span("ui.highlight"):
+            self._highlight(paragraph_index)
+        if rebuilt and paragraph_index + 1 < len(self._starts):
+            # scroll range of a fresh document is only known after layout
+            start = self._starts[paragraph_index]
+            QTimer.singleShot(0, lambda: self._scroll_to(start))
+
+    def _build(self, chapter: Chapter) -> None:
+        document = QTextDocument(self.browser)
+        document.setDefaultFont(self.browser.font())
+        cursor = QTextCursor(document)
+        heading = QTextCharFormat()
+        heading.setFontWeight(QFont.Bold)
+        heading.setFontPointSize(self.browser.font().pointSizeF() * 1.4)
+        body = QTextCharFormat()
+        spacing = QTextBlockFormat()
+        spacing.setBottomMargin(PARAGRAPH_SPACING)
+        cursor.setBlockFormat(spacing)
+        cursor.insertText(chapter.title, heading)
+        texts = [paragraph.text for paragraph in chapter.paragraphs]
+        for text in texts:
+            cursor.insertBlock(spacing, body)
+            cursor.insertText(text)
+        self._starts = paragraph_starts(chapter.title, texts)
+        previous = self.browser.document()
+        self.browser.setDocument(document)
+        if previous.parent() is self.browser:
+            previous.deleteLater()
+        self.rebuilds += 1
+
+    def _highlight(self, paragraph_index: int) -> None:
+        bounds = highlight_range(self._starts, paragraph_index)
+        if bounds is None:
+            self.browser.setExtraSelections([])
+            return
+        start, end = bounds
+        cursor = QTextCursor(self.browser.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        highlight = QTextCharFormat()
+        highlight.setBackground(HIGHLIGHT_COLOR)
+        selection = QTextEdit.ExtraSelection()
+        selection.cursor = cursor
+        selection.format = highlight
+        self.browser.setExtraSelections([selection])
+        self._scroll_to(start)
+
+    def _scroll_to(self, position: int) -> None:
+        document = self.browser.document()
+        block = document.findBlock(position)
+        top = document.documentLayout().blockBoundingRect(block).top()
+        self.browser.verticalScrollBar().setValue(max(0, int(top) - SCROLL_MARGIN))
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Set
+
+from PySide6.QtCore import (
+    QObject,
+    QRunnable,
+    QSize,
+    Qt,
+    QThread,
+    QThreadPool,
+    Signal,
+)
+from PySide6.QtGui import QImage, QImageReader
+
+from reader_app.image_tickets import ImageTickets
+from reader_app.instrumentation import span
+from reader_app.thumbnails import ThumbnailStore
+from reader_app.ui.thumbnails import ensure_levels
+
+REQUEST_PRIORITY = 1
+PREFETCH_PRIORITY = 0
+
+
+@dataclass
+class ImageResult:
+    ticket: int
+    key: str
+    path: Path
+    original: QImage
+    scaled: QImage
+    target: QSize
+    prefetch: bool = False
+    # ``original`` is a stored downscaled version, not the full image
+    from_thumbnail: bool = False
+
+
+def scale_image(image: QImage, target: QSize) -> QImage:
+    return image.scaled(target, Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation)
+
+
+def decode_image(path: Path) -> QImage:
+    reader = QImageReader(str(path))
+    reader.setAutoTransform(True)
+    return reader.read()
+
+
+class _ImageTask(QRunnable):
+    def __init__(
+        self,
+        loader: "ImageLoader",
+        ticket: int,
+        key: str,
+        path: Path,
+        target: QSize,
+        original: Optional[QImage],
+        prefetch: bool = False,
+    ) -> None:
+        super().__init__()
+        self._loader = loader
+        self._ticket = ticket
+        self._key = key
+        self._path = path
+        self._target = QSize(target)
+        self._original = original
+        self._prefetch = prefetch
+
+    def _stale(self) -> bool:
+        if self._prefetch:
+            return self._loader.is_stale_prefetch(self._ticket)
+        return self._loader.is_stale(self._ticket)
+
+    def run(self) -> None:
+        if self._stale():
+            return
+        original = self._original
+        thumbnail = None
+        thumbnails = self._loader.thumbnails
+        if thumbnails is not None:
+            thumbnail = thumbnails.lookup(
+                self._path, (self._target.width(), self._target.height())
+            )
+        if thumbnail is not None:
+            with span("image.decode"):
+                original = decode_image(thumbnail.path)
+        elif original is None:
+            with span("image.decode"):
+                original = decode_image(self._path)
+        if original.isNull():
+            if not self._prefetch:
+                self._loader.failed.emit(self._ticket, str(self._path))
+            return
+        if self._stale():
+            return
+        with span("image.scale"):
+            scaled = scale_image(original, self._target)
+        self._loader.finished.emit(
+            ImageResult(
+                self._ticket,
+                self._key,
+                self._path,
+                original,
+                scaled,
+                self._target,
+                self._prefetch,
+                thumbnail is not None,
+            )
+        )
+        if thumbnails is not None and thumbnail is None:
+            # no stored version fits yet: leave them for next time
+            self._loader.queue_levels(self._path, original)
+
+
+class _LevelsTask(QRunnable):
+    def __init__(self, loader: "ImageLoader", path: Path, original: QImage) -> None:
+        super().__init__()
+        self._loader = loader
+        self._path = path
+        self._original = original
+
+    def run(self) -> None:
+        try:
+            with span("image.levels"):
+                ensure_levels(self._loader.thumbnails, self._path, self._original)
+        except OSError:
+            pass
+        finally:
+            self._loader.levels_done(self._path)
+
+
+class ImageLoader(QObject):
+    """Decodes and scales catalog images on a worker pool.
+
+    Each request returns a ticket and supersedes every earlier one: queued
+    work for an older ticket is skipped, and ``finished``/``failed`` are
+    emitted from the worker thread, so slots on GUI objects run queued on the
+    GUI thread. Receivers should still compare the ticket with the latest one
+    they asked for.
+
+    Prefetch requests run at a lower pool priority, never supersede regular
+    requests, and are all dropped by the next ``cancel_prefetch`` call.
+    Their results arrive through ``finished`` with ``prefetch`` set.
+
+    With a ``ThumbnailStore`` every request decodes the smallest stored
+    version that covers the target instead of decoding or rescaling the
+    original; an image without versions gets them written from the original
+    after its result was delivered, one image at a time on a separate
+    lowest-priority thread so it never delays an image about to be shown.
+    """
+
+    finished = Signal(object)
+    failed = Signal(int, str)
+
+    def __init__(
+        self,
+        parent: Optional[QObject] = None,
+        max_threads: int = 2,
+        thumbnails: Optional[ThumbnailStore] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.thumbnails = thumbnails
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._tickets = ImageTickets()
+        self._levels_pool = QThreadPool(self)
+        self._levels_pool.setMaxThreadCount(1)
+        self._levels_pool.setThreadPriority(QThread.LowestPriority)
+        self._levels_queued: Set[Path] = set()
+        self._levels_lock = threading.Lock()
+
+    def is_stale(self, ticket: int) -> bool:
+        return self._tickets.is_stale(ticket)
+
+    def is_stale_prefetch(self, ticket: int) -> bool:
+        return self._tickets.is_stale_prefetch(ticket)
+
+    def queue_levels(self, path: Path, original: QImage) -> None:
+        """Write stored versions of ``path`` in the background, once."""
+        with self._levels_lock:
+            if path in self._levels_queued:
+                return
+            self._levels_queued.add(path)
+        self._levels_pool.start(_LevelsTask(self, path, original))
+
+    def levels_done(self, path: Path) -> None:
+        with self._levels_lock:
+            self._levels_queued.discard(path)
+
+    def prefetch(
+        self, key: str, path: Path, target: QSize, original: Optional[QImage] = None
+    ) -> None:
+        ticket = self._tickets.prefetch()
+        task = _ImageTask(self, ticket, key, path, target, original, prefetch=True)
+        self._pool.start(task, PREFETCH_PRIORITY)
+
+    def cancel_prefetch(self) -> None:
+        self._tickets.cancel_prefetch()
+
+    def load(self, key: str, path: Path, target: QSize) -> int:
+        return self._submit(key, path, target, None)
+
+    def rescale(self, key: str, path: Path, original: QImage, target: QSize) -> int:
+        return self._submit(key, path, target, original)
+
+    def _submit(
+        self, key: str, path: Path, target: QSize, original: Optional[QImage]
+    ) -> int:
+        ticket = self._tickets.request()
+        self._pool.start(
+            _ImageTask(self, ticket, key, path, target, original), REQUEST_PRIORITY
+        )
+        return ticket
+
+    def shutdown(self) -> None:
+        self._tickets.close()
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._levels_pool.clear()
+        self._levels_pool.waitForDone()
+        if self.thumbnails is not None:
+            self.thumbnails.save_digests()
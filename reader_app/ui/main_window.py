@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import html
+import threading
 from pathlib import Path
 from typing import Optional
 
-from PySide6.QtCore import Qt, QEasingCurve, QPropertyAnimation
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import (
+    Qt,
+    QEasingCurve,
+    QEvent,
+    QPropertyAnimation,
+    QTimer,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import (
+    QInputDialog,
     QLabel,
     QMessageBox,
     QPushButton,
@@ -20,12 +31,36 @@ from PySide6.QtWidgets import (
     QMainWindow,
 )
 
+from reader_app.catalog_watch import CatalogDiff, CatalogWatcher
 from reader_app.config.state import StateStore
 from reader_app.context_matcher import ContextMatcher, MatchResult
+from reader_app.dispatch import DEFAULT_COALESCE_MS, ContextDispatcher
+from reader_app.image_cache import DEFAULT_IMAGE_CACHE_BUDGET_MB, ImageCache
+from reader_app.instrumentation import TRACER, span
+from reader_app.prefetch import DEFAULT_PREFETCH_DEPTH, PlanWorker, Prefetcher
 from reader_app.reader import BookLoader
+from reader_app.schedule import load_schedule
+from reader_app.search_index import SearchIndex, load_search_index
+from reader_app.settle_timer import SettleTimer
+from reader_app.thumbnails import ThumbnailStore
+from reader_app.ui.chapter_view import ChapterView
+from reader_app.ui.image_loader import ImageLoader, ImageResult
+
+# idle time after the last resize before the image gets a smooth rescale
+RESIZE_SETTLE_MS = 150
 
 
 class MainWindow(QMainWindow):
+    # emitted from the catalog watcher thread, delivered queued on the GUI thread
+    catalog_diff_ready = Signal(object)
+    catalog_reload_failed = Signal(str)
+    # (book path, SearchIndex) from the background index build
+    search_index_ready = Signal(object, object)
+    # (book path, catalog version, ImageSchedule or None) from the loader thread
+    schedule_ready = Signal(object, int, object)
+    # (generation, planned entries) from the prefetch planner thread
+    prefetch_plan_ready = Signal(int, object)
+
     def __init__(
         self,
         book_loader: BookLoader,
@@ -38,23 +73,62 @@ class MainWindow(QMainWindow):
         self.matcher = matcher
         self.state = state
         self.catalog_path = catalog_path
-        self._current_pixmap: Optional[QPixmap] = None
+        self._current_entry_id: Optional[str] = None
+        self._current_image: Optional[QImage] = None
+        self._current_image_path: Optional[Path] = None
+        self._pending_ticket: Optional[int] = None
+        self._pending_load = False
+        self._search_index: Optional[SearchIndex] = None
+        self._shown_entry_id: Optional[str] = None
+        self._shown_pixmap: Optional[QPixmap] = None
+        thumbnail_dir = self.state.get("thumbnail_dir")
+        self._thumbnails = ThumbnailStore(
+            Path(thumbnail_dir) if thumbnail_dir else None
+        )
+        self._image_loader = ImageLoader(self, thumbnails=self._thumbnails)
+        budget_mb = self.state.get("image_cache_budget_mb", DEFAULT_IMAGE_CACHE_BUDGET_MB)
+        self._image_cache: ImageCache = ImageCache(budget_mb * 1024 * 1024)
+        self._prefetcher = Prefetcher(
+            self.matcher, depth=self.state.get("prefetch_depth", DEFAULT_PREFETCH_DEPTH)
+        )
+        self._plan_worker = PlanWorker(self._prefetcher, self.prefetch_plan_ready.emit)
 
         self.setWindowTitle("StoryGlass Reader")
         self.resize(1200, 650)
 
+        self._resize_timer = SettleTimer(
+            lambda wake: QTimer.singleShot(RESIZE_SETTLE_MS, wake),
+            self._update_image_display,
+        )
+
+        coalesce_ms = self.state.get("navigation_coalesce_ms", DEFAULT_COALESCE_MS)
+        self._dispatcher = ContextDispatcher(
+            lambda flush: QTimer.singleShot(coalesce_ms, flush)
+        )
+        self._dispatcher.add_immediate(self._render_text)
+        self._dispatcher.add_deferred(self._process_context)
+
         self._setup_ui()
         self._connect_signals()
 
         self.matcher.add_listener(self._on_image_match)
         self._set_book_loader(self.book_loader)
 
+        self._catalog_watcher = CatalogWatcher(
+            self.catalog_path,
+            self.matcher.catalog.entries(),
+            self.catalog_diff_ready.emit,
+            on_error=lambda error: self.catalog_reload_failed.emit(str(error)),
+        )
+        self._catalog_watcher.start()
+
     def _setup_ui(self) -> None:
         splitter = QSplitter(Qt.Horizontal, self)
         self.setCentralWidget(splitter)
 
         self.text_viewer = QTextBrowser()
         self.text_viewer.setReadOnly(True)
+        self._chapter_view = ChapterView(self.text_viewer)
         left_container = QWidget()
         left_layout = QVBoxLayout()
         left_layout.addWidget(self.text_viewer)
@@ -95,6 +169,7 @@ class MainWindow(QMainWindow):
         self._image_animation.setEasingCurve(QEasingCurve.InOutQuad)
         self._image_animation.setStartValue(0.0)
         self._image_animation.setEndValue(1.0)
+        self.image_label.installEventFilter(self)
         image_layout.addWidget(self.image_label)
         image_panel.setLayout(image_layout)
         self.image_panel = image_panel
@@ -112,11 +187,43 @@ class MainWindow(QMainWindow):
         open_catalog_action.triggered.connect(self._launch_catalog_editor)
         session_action = toolbar.addAction("Session Info")
         session_action.triggered.connect(self._show_session_info)
+        cache_action = toolbar.addAction("Image Cache")
+        cache_action.triggered.connect(self._configure_image_cache)
+        prefetch_action = toolbar.addAction("Prefetch")
+        prefetch_action.triggered.connect(self._configure_prefetch)
+        search_action = toolbar.addAction("Search")
+        search_action.triggered.connect(self._search_book)
+        go_to_action = toolbar.addAction("Go To %")
+        go_to_action.triggered.connect(self._go_to_percentage)
+        timings_action = toolbar.addAction("Timings")
+        timings_action.triggered.connect(self._show_timings)
 
     def _connect_signals(self) -> None:
         self.prev_button.clicked.connect(self._navigate_previous)
         self.next_button.clicked.connect(self._navigate_next)
         self.font_slider.valueChanged.connect(self._on_font_size_changed)
+        self._image_loader.finished.connect(self._on_image_loaded)
+        self._image_loader.failed.connect(self._on_image_failed)
+        self.catalog_diff_ready.connect(self._apply_catalog_diff)
+        self.catalog_reload_failed.connect(self._on_catalog_reload_failed)
+        self.search_index_ready.connect(self._on_search_index_ready)
+        self.prefetch_plan_ready.connect(self._on_prefetch_plan)
+        self.schedule_ready.connect(self._on_schedule_ready)
+
+    def _apply_catalog_diff(self, diff: CatalogDiff) -> None:
+        with self._plan_worker.lock:
+            self.matcher.catalog.apply_diff(diff)
+        for entry_id in diff.touched():
+            self._image_cache.invalidate(entry_id)
+        self.matcher.catalog_changed(diff)
+        self.statusBar().showMessage(
+            f"Catalog reloaded: {len(diff.added)} added, {len(diff.changed)} changed, "
+            f"{len(diff.removed)} removed",
+            5000,
+        )
+
+    def _on_catalog_reload_failed(self, message: str) -> None:
+        self.statusBar().showMessage(f"Catalog reload failed: {message}", 10000)
 
     def _navigate_previous(self) -> None:
         if self.book_loader:
@@ -145,7 +252,7 @@ class MainWindow(QMainWindow):
 
     def _load_book(self, path: Path) -> None:
         try:
-            loader = BookLoader(path)
+            loader = BookLoader(path, index_cache=True, compact=True)
         except Exception as exc:
             QMessageBox.warning(
                 self,
@@ -153,7 +260,10 @@ class MainWindow(QMainWindow):
                 f"Unable to load {path.name}:\n{exc}",
             )
             return
-        self._set_book_loader(loader, chapter=0, paragraph=0)
+        if self.state.book_offset(path) is not None:
+            self._set_book_loader(loader)
+        else:
+            self._set_book_loader(loader, chapter=0, paragraph=0)
 
     def _set_book_loader(
         self,
@@ -162,8 +272,27 @@ class MainWindow(QMainWindow):
         chapter: Optional[int] = None,
         paragraph: Optional[int] = None,
     ) -> None:
+        if self.book_loader is not None and self.book_loader is not loader:
+            # its indices refer to the old book
+            self._dispatcher.discard()
+            self.book_loader.close()
         self.book_loader = loader
-        self.book_loader.add_listener(self._on_book_context)
+        self._chapter_view.invalidate()
+        self.book_loader.set_tokenizer(self.matcher.tokenizer)
+        with self._plan_worker.lock:
+            self.matcher.attach_schedule(None)
+        catalog = self.matcher.catalog
+        threading.Thread(
+            target=self._load_schedule,
+            args=(loader.path, catalog.version, catalog.fingerprint()),
+            name="schedule-load",
+            daemon=True,
+        ).start()
+        self.book_loader.add_listener(self._dispatcher.post)
+        saved_offset = self.state.book_offset(loader.path)
+        if chapter is None and paragraph is None and saved_offset is not None:
+            # offsets survive edits that renumber chapters or paragraphs
+            chapter, paragraph = self.book_loader.position_at_offset(saved_offset)
         start_chapter = (
             chapter
             if chapter is not None
@@ -176,40 +305,237 @@ class MainWindow(QMainWindow):
         )
         self.book_loader.navigate_to(start_chapter, start_paragraph)
         self.state.set("last_book", str(self.book_loader.path))
+        self._search_index = None
+        threading.Thread(
+            target=self._build_search_index,
+            args=(loader.path,),
+            name="search-index",
+            daemon=True,
+        ).start()
+
+    def _load_schedule(self, path: Path, version: int, digest: bytes) -> None:
+        schedule = load_schedule(path, self.matcher.catalog, digest)
+        self.schedule_ready.emit(path, version, schedule)
+
+    def _on_schedule_ready(self, path: Path, version: int, schedule) -> None:
+        # a catalog edited meanwhile no longer matches the schedule's digest
+        if (
+            schedule is None
+            or self.book_loader is None
+            or self.book_loader.path != path
+            or self.matcher.catalog.version != version
+        ):
+            return
+        with self._plan_worker.lock:
+            self.matcher.attach_schedule(schedule)
+
+    def _build_search_index(self, path: Path) -> None:
+        try:
+            index = load_search_index(path, self.matcher.tokenizer)
+        except (OSError, ValueError):
+            return
+        self.search_index_ready.emit(path, index)
+
+    def _on_search_index_ready(self, path: Path, index: SearchIndex) -> None:
+        if self.book_loader is not None and self.book_loader.path == path:
+            self._search_index = index
+
+    def _search_book(self) -> None:
+        if self._search_index is None:
+            self.statusBar().showMessage("The search index is still being built.", 5000)
+            return
+        query, accepted = QInputDialog.getText(
+            self, "Search", 'Words or "exact phrase":'
+        )
+        if not accepted or not query.strip():
+            return
+        hits = self._search_index.search(query)
+        if not hits:
+            self.statusBar().showMessage(f"No matches for {query}", 5000)
+            return
+        chapters = self.book_loader.chapters
+        labels = []
+        for hit in hits:
+            chapter = chapters[hit.chapter_index]
+            snippet = chapter.paragraphs[hit.paragraph_index].text[:80]
+            labels.append(f"{chapter.title} ¶{hit.paragraph_index + 1}: {snippet}")
+        label, accepted = QInputDialog.getItem(
+            self, "Search", f"{len(hits)} best matches:", labels, 0, False
+        )
+        if accepted:
+            self.book_loader.navigate_to(*hits[labels.index(label)].position)
+
+    def _go_to_percentage(self) -> None:
+        loader = self.book_loader
+        if loader is None or not loader.positions.length:
+            return
+        current = loader.global_offset(loader.current_chapter, loader.current_paragraph)
+        percentage, accepted = QInputDialog.getDouble(
+            self,
+            "Go To",
+            "Percentage of the book:",
+            100.0 * current / loader.positions.length,
+            0.0,
+            100.0,
+            1,
+        )
+        if accepted:
+            loader.navigate_to_fraction(percentage / 100.0)
 
     def _launch_catalog_editor(self) -> None:
         print("You can re-run `python -m reader_app.cli.catalog_editor ...` to edit catalogs.")
 
-    def _on_book_context(self, context: dict) -> None:
-        chapter = context["chapter_title"]
-        paragraph = context["text"]
-        self.text_viewer.setHtml(
-            f"<h2>{chapter}</h2><p>{paragraph}</p>"
-        )
+    def _process_context(self, context: dict) -> None:
         self.matcher.update_context(context)
-        self.state.set("last_chapter", context["chapter_index"])
-        self.state.set("last_paragraph", context["paragraph_index"])
-        self.state.set("last_book", str(self.book_loader.path))
-        self.state.set("last_catalog", str(self.catalog_path))
+        self._prefetch_neighbors()
+        chapter_index = context["chapter_index"]
+        paragraph_index = context["paragraph_index"]
+        self.state.update_position(
+            self.book_loader.path,
+            self.book_loader.global_offset(chapter_index, paragraph_index),
+            {
+                "last_chapter": chapter_index,
+                "last_paragraph": paragraph_index,
+                "last_book": str(self.book_loader.path),
+                "last_catalog": str(self.catalog_path),
+            },
+        )
+
+    def _render_text(self, context: dict) -> None:
+        if self.state.get("text_render_mode", "chapter") == "chapter":
+            chapter_index = context["chapter_index"]
+            chapters = self.book_loader.chapters
+            if chapter_index < len(chapters):
+                self._chapter_view.show(
+                    chapter_index, chapters[chapter_index], context["paragraph_index"]
+                )
+                return
+        self._chapter_view.invalidate()
+        chapter = html.escape(context["chapter_title"])
+        paragraph = html.escape(context["text"])
+        with span("ui.set_html"):
+            self.text_viewer.setHtml(
+                f"<h2>{chapter}</h2><p>{paragraph}</p>"
+            )
 
     def _on_image_match(self, match: MatchResult) -> None:
-        pixmap = QPixmap(match.entry.path)
-        if pixmap.isNull():
-            self.image_label.setText(f"Image missing: {match.entry.path}")
-            self._current_pixmap = None
+        self._current_entry_id = match.entry.id
+        self._current_image_path = match.entry.path
+        self._current_image = None
+        self._pending_ticket = None
+        self._pending_load = False
+        self._display_current_image(record=True)
+
+    def _display_current_image(self, record: bool = False) -> None:
+        """Show the current entry; ``record`` counts it in the prefetch stats."""
+        entry_id = self._current_entry_id
+        path = self._current_image_path
+        size = self.image_label.size()
+        pixmap = self._image_cache.scaled_variant(
+            entry_id, path, (size.width(), size.height())
+        )
+        if pixmap is not None:
+            if record:
+                self._prefetcher.record_shown(entry_id, cached=True)
+            self._pending_ticket = None
+            self._pending_load = False
+            self._show_pixmap(pixmap)
             return
-        self._current_pixmap = pixmap
-        self._update_image_display()
+        original = self._image_cache.original(entry_id, path)
+        if original is None:
+            original = self._current_image
+        if record:
+            self._prefetcher.record_shown(entry_id, cached=original is not None)
+        if original is not None:
+            self._pending_ticket = self._image_loader.rescale(
+                entry_id, path, original, size
+            )
+            self._pending_load = False
+        else:
+            self._pending_ticket = self._image_loader.load(entry_id, path, size)
+            self._pending_load = True
 
-    def _update_image_display(self) -> None:
-        if not self._current_pixmap:
+    def _prefetch_neighbors(self) -> None:
+        self._image_loader.cancel_prefetch()
+        loader = self.book_loader
+        self._plan_worker.request(
+            loader, (loader.current_chapter, loader.current_paragraph)
+        )
+
+    def _on_prefetch_plan(self, generation: int, entries: list) -> None:
+        if generation != self._plan_worker.latest:
+            return
+        size = self.image_label.size()
+        dimensions = (size.width(), size.height())
+        for entry in entries:
+            if self._image_cache.has_scaled(entry.id, dimensions):
+                continue
+            if self._pending_load and entry.id == self._current_entry_id:
+                continue
+            original = self._image_cache.peek_original(entry.id)
+            self._image_loader.prefetch(entry.id, entry.path, size, original)
+            self._prefetcher.mark_issued(entry.id)
+
+    @Slot(object)
+    def _on_image_loaded(self, result: ImageResult) -> None:
+        # decoded originals are worth keeping even if the reader moved on;
+        # a downscaled version is cheaper to decode again than to keep
+        if not result.from_thumbnail:
+            self._image_cache.store_original(
+                result.key, result.path, result.original, result.original.sizeInBytes()
+            )
+        if result.prefetch:
+            self._store_scaled(result)
+            return
+        if result.ticket != self._pending_ticket:
             return
-        scaled = self._current_pixmap.scaled(
-            self.image_label.size(),
-            Qt.KeepAspectRatioByExpanding,
-            Qt.SmoothTransformation,
+        self._pending_ticket = None
+        self._pending_load = False
+        if not result.from_thumbnail:
+            self._current_image = result.original
+        self._show_pixmap(self._store_scaled(result))
+        if result.target != self.image_label.size():
+            # the label moved on meanwhile; rescale once it stops resizing
+            self._resize_timer.start()
+
+    def _store_scaled(self, result: ImageResult) -> QPixmap:
+        pixmap = QPixmap.fromImage(result.scaled)
+        self._image_cache.store_scaled(
+            result.key,
+            result.path,
+            (result.target.width(), result.target.height()),
+            pixmap,
+            pixmap.width() * pixmap.height() * pixmap.depth() // 8,
         )
-        self.image_label.setPixmap(scaled)
+        return pixmap
+
+    @Slot(int, str)
+    def _on_image_failed(self, ticket: int, path: str) -> None:
+        if ticket != self._pending_ticket:
+            return
+        self._pending_ticket = None
+        self._pending_load = False
+        self.image_label.setText(f"Image missing: {path}")
+        self._shown_entry_id = None
+        self._shown_pixmap = None
+        self._current_entry_id = None
+        self._current_image = None
+        self._current_image_path = None
+
+    def _update_image_display(self) -> None:
+        # a pending load rescales itself on arrival if the label size moved
+        if self._current_entry_id is None or self._pending_load:
+            return
+        self._display_current_image()
+
+    def _show_pixmap(self, pixmap: QPixmap) -> None:
+        with span("ui.show_pixmap"):
+            self.image_label.setPixmap(pixmap)
+        self._shown_pixmap = pixmap
+        if self._shown_entry_id == self._current_entry_id:
+            # a rescale of the image already on screen: no fade
+            return
+        self._shown_entry_id = self._current_entry_id
         self._image_effect.setOpacity(0.0)
         self._image_animation.stop()
         self._image_animation.start()
@@ -222,12 +548,121 @@ class MainWindow(QMainWindow):
 
     def _on_font_size_changed(self, value: int) -> None:
         self._apply_font_size(value)
+        self._chapter_view.invalidate()
+        if self.book_loader is not None:
+            self._render_text(self.book_loader.current_context())
 
     def resizeEvent(self, event) -> None:
         super().resizeEvent(event)
         half_width = max(240, self.width() // 2)
         self.image_panel.setMaximumWidth(half_width)
-        self._update_image_display()
+
+    def eventFilter(self, watched, event) -> bool:
+        if watched is self.image_label and event.type() == QEvent.Resize:
+            self._on_image_label_resized()
+        return super().eventFilter(watched, event)
+
+    def _on_image_label_resized(self) -> None:
+        """Window or splitter drags: cheap interim scaling, one smooth pass later."""
+        if (
+            self._shown_pixmap is not None
+            and self._shown_entry_id == self._current_entry_id
+        ):
+            with span("ui.fast_scale"):
+                self.image_label.setPixmap(
+                    self._shown_pixmap.scaled(
+                        self.image_label.size(),
+                        Qt.KeepAspectRatioByExpanding,
+                        Qt.FastTransformation,
+                    )
+                )
+        self._resize_timer.start()
+
+    def closeEvent(self, event) -> None:
+        self._catalog_watcher.stop()
+        self._resize_timer.stop()
+        self._dispatcher.flush()
+        self._plan_worker.close()
+        self._image_loader.shutdown()
+        self.state.flush()
+        super().closeEvent(event)
+
+    def _configure_image_cache(self) -> None:
+        import json
+
+        stats = json.dumps(self._image_cache.stats(), indent=2)
+        current_mb = self._image_cache.budget_bytes // (1024 * 1024)
+        budget_mb, accepted = QInputDialog.getInt(
+            self,
+            "Image Cache",
+            f"{stats}\n\nMemory budget (MB):",
+            current_mb,
+            0,
+            65536,
+        )
+        if not accepted:
+            return
+        self._image_cache.set_budget(budget_mb * 1024 * 1024)
+        self.state.set("image_cache_budget_mb", budget_mb)
+
+    def _configure_prefetch(self) -> None:
+        stats = self._prefetcher.stats
+        summary = (
+            f"Prefetches issued: {stats.issued}\n"
+            f"Shown from prefetch: {stats.hits}\n"
+            f"Loaded on demand: {stats.misses}\n"
+            f"Hit rate: {stats.hit_rate:.0%}"
+        )
+        depth, accepted = QInputDialog.getInt(
+            self,
+            "Prefetch",
+            f"{summary}\n\nParagraphs to look ahead:",
+            self._prefetcher.depth,
+            0,
+            20,
+        )
+        if not accepted:
+            return
+        self._prefetcher.depth = depth
+        self.state.set("prefetch_depth", depth)
+
+    def _show_timings(self) -> None:
+        box = QMessageBox(self)
+        box.setWindowTitle("Timings")
+        counters = self._dispatcher.counters
+        navigation = (
+            f"Navigation: {counters.posted} events, {counters.delivered} processed, "
+            f"{counters.coalesced} coalesced"
+        )
+        if TRACER.enabled:
+            box.setText(
+                f"<pre>{html.escape(TRACER.format_summary())}\n\n{navigation}</pre>"
+            )
+        else:
+            box.setText(f"Instrumentation is off.<br>{navigation}")
+        toggle = box.addButton(
+            "Disable" if TRACER.enabled else "Enable", QMessageBox.ActionRole
+        )
+        export = None
+        if TRACER.tracing:
+            export = box.addButton("Export Trace…", QMessageBox.ActionRole)
+        reset = box.addButton("Reset", QMessageBox.ResetRole)
+        box.addButton(QMessageBox.Close)
+        box.exec()
+        clicked = box.clickedButton()
+        if clicked is toggle:
+            if TRACER.enabled:
+                TRACER.disable()
+            else:
+                TRACER.enable(trace=True)
+        elif clicked is reset:
+            TRACER.reset()
+        elif export is not None and clicked is export:
+            path, _ = QFileDialog.getSaveFileName(
+                self, "Export Trace", "trace.json", "Chrome trace (*.json)"
+            )
+            if path:
+                TRACER.export_chrome_trace(Path(path))
 
     def _show_session_info(self) -> None:
         import json
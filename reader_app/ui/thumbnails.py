@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage
+
+from reader_app.thumbnails import Thumbnail, ThumbnailStore, level_sizes
+
+THUMBNAIL_JPEG_QUALITY = 88
+
+
+def render_levels(
+    store: ThumbnailStore, digest: str, image: QImage
+) -> List[Thumbnail]:
+    """Write every version of a decoded image into the store."""
+    directory = store.directory(digest)
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = "png" if image.hasAlphaChannel() else "jpg"
+    levels = []
+    for width, height in level_sizes(image.width(), image.height(), store.edges):
+        scaled = image.scaled(
+            QSize(width, height), Qt.IgnoreAspectRatio, Qt.SmoothTransformation
+        )
+        target = directory / f"{width}x{height}.{suffix}"
+        temp = directory / f".{target.name}.{os.getpid()}.{threading.get_ident()}"
+        if not scaled.save(str(temp), suffix.upper(), THUMBNAIL_JPEG_QUALITY):
+            raise OSError(f"could not write {target}")
+        temp.replace(target)
+        levels.append(Thumbnail(target, width, height))
+    store.write_manifest(digest, levels)
+    return levels
+
+
+def ensure_levels(
+    store: ThumbnailStore,
+    path: Path,
+    image: Optional[QImage] = None,
+    digest: Optional[str] = None,
+) -> Optional[List[Thumbnail]]:
+    """Generate the versions of ``path`` unless the store already has them.
+
+    Pass ``digest`` when the caller already hashed the file.
+    """
+    if digest is None:
+        digest = store.digest_for(path)
+    if digest is None:
+        return None
+    levels = store.levels(digest)
+    if levels is not None:
+        return levels
+    if image is None:
+        from reader_app.ui.image_loader import decode_image
+
+        image = decode_image(path)
+    if image.isNull():
+        return None
+    return render_levels(store, digest, image)
+
+
+def _generate(root: str, edges: Sequence[int], path: str, digest: str) -> bool:
+    store = ThumbnailStore(Path(root), edges)
+    return ensure_levels(store, Path(path), digest=digest) is not None
+
+
+def generate_thumbnails(
+    store: ThumbnailStore,
+    paths: Sequence[Path],
+    workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[Path, bool]:
+    """Generate missing versions for ``paths`` on a process pool.
+
+    Every file is hashed once, here; files with equal content are
+    generated once. Returns whether each path ended up with versions (False
+    for missing or undecodable files).
+    """
+    unique: Dict[str, Path] = {}
+    results: Dict[Path, bool] = {}
+    digests: Dict[Path, Optional[str]] = {}
+    for path in paths:
+        digest = digests[path] = store.digest_for(path)
+        if digest is None:
+            results[path] = False
+        elif store.levels(digest) is None:
+            unique.setdefault(digest, path)
+    generated: Dict[str, bool] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(
+                _generate, str(store.root), store.edges, str(path), digest
+            ): digest
+            for digest, path in unique.items()
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            generated[futures[future]] = future.result()
+            if progress:
+                progress(done, len(futures))
+    store.save_digests()
+    for path, digest in digests.items():
+        if digest is not None:
+            results[path] = generated.get(digest, True)
+    return results
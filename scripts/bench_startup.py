@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from reader_app.book_index import sidecar_path
+from reader_app.reader import BookLoader
+from scripts.synthetic import write_synthetic_book
+
+
+def best_of(repeat: int, action: Callable[[], None], before: Callable[[], None]) -> float:
+    timings = []
+    for _ in range(repeat):
+        before()
+        started = time.perf_counter()
+        action()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare book startup time with and without the sidecar index."
+    )
+    parser.add_argument(
+        "book", type=Path, nargs="?", help="Book to open (synthetic if omitted)"
+    )
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=250)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        book = args.book
+        if book is None:
+            book = Path(scratch) / "synthetic.txt"
+            write_synthetic_book(book, args.chapters, args.paragraphs, args.words)
+        sidecar = sidecar_path(book)
+
+        def drop_sidecar() -> None:
+            sidecar.unlink(missing_ok=True)
+
+        def keep_sidecar() -> None:
+            pass
+
+        def open_first(**options) -> Callable[[], None]:
+            return lambda: BookLoader(book, **options).current_context()
+
+        size_mb = book.stat().st_size / (1024 * 1024)
+        print(f"{book.name}: {size_mb:.1f} MiB")
+        cases = [
+            ("full parse", {"lazy": False}, keep_sidecar),
+            ("lazy scan", {"lazy": True}, keep_sidecar),
+            ("index build + write", {"lazy": True, "index_cache": True}, drop_sidecar),
+            ("index reuse (lazy)", {"lazy": True, "index_cache": True}, keep_sidecar),
+            ("index reuse (eager)", {"lazy": False, "index_cache": True}, keep_sidecar),
+        ]
+        rows = [
+            (label, best_of(args.repeat, open_first(**options), before))
+            for label, options, before in cases
+        ]
+        for label, seconds in rows:
+            print(f"  {label:<22} {seconds * 1000:9.1f} ms")
+        if args.book is not None:
+            drop_sidecar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from reader_app.catalog_matrix import HAVE_NUMPY, CatalogMatrix
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalog
+from reader_app.instrumentation import TRACER
+from reader_app.reader import BookLoader
+from reader_app.schedule import DEFAULT_SCHEDULE_DEPTH
+from reader_app.search_index import build_search_index
+from scripts.synthetic import synthetic_entries, vocabulary, write_synthetic_book
+
+# A case regresses when its p50 or p95 latency grows by more than this share.
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+# Calls replayed under tracemalloc to find a case's peak allocation.
+MEMORY_SAMPLE_CALLS = 20
+
+Operation = Callable[[int], Any]
+
+
+@dataclass
+class CaseResult:
+    name: str
+    calls: int
+    seconds: float
+    ops_per_sec: float
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    max_us: float
+    peak_kib: float
+    mb_per_sec: Optional[float] = None
+
+
+@dataclass
+class Case:
+    name: str
+    operation: Operation
+    calls: int
+    bytes_per_call: Optional[int] = None
+
+
+def percentile(ordered: Sequence[int], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return float(ordered[rank])
+
+
+def run_case(case: Case, warmup: int = 3) -> CaseResult:
+    for call in range(min(warmup, case.calls)):
+        case.operation(call)
+    latencies: List[int] = []
+    gc.collect()
+    clock = time.perf_counter_ns
+    for call in range(case.calls):
+        started = clock()
+        case.operation(call)
+        latencies.append(clock() - started)
+    latencies.sort()
+    total = sum(latencies) / 1e9
+
+    tracemalloc.start()
+    for call in range(min(MEMORY_SAMPLE_CALLS, case.calls)):
+        case.operation(call)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mb_per_sec = None
+    if case.bytes_per_call and total:
+        mb_per_sec = round(case.bytes_per_call * case.calls / total / 1e6, 2)
+    return CaseResult(
+        name=case.name,
+        calls=case.calls,
+        seconds=round(total, 6),
+        ops_per_sec=round(case.calls / total, 1) if total else 0.0,
+        p50_us=round(percentile(latencies, 0.50) / 1e3, 2),
+        p95_us=round(percentile(latencies, 0.95) / 1e3, 2),
+        p99_us=round(percentile(latencies, 0.99) / 1e3, 2),
+        max_us=round(latencies[-1] / 1e3, 2),
+        peak_kib=round(peak / 1024, 1),
+        mb_per_sec=mb_per_sec,
+    )
+
+
+def build_cases(args: argparse.Namespace, book: Path) -> List[Case]:
+    vocab = vocabulary(args.vocabulary)
+    write_synthetic_book(
+        book, args.chapters, args.paragraphs, args.words, args.seed, vocab
+    )
+    raw = book.read_text(encoding="utf-8")
+    size = len(raw.encode("utf-8"))
+    # offsets count characters; a synthetic word plus its space is about six
+    chapter_length = args.paragraphs * args.words * 6
+    catalog = ImageCatalog(
+        synthetic_entries(
+            args.entries,
+            args.chapters,
+            chapter_length,
+            vocab,
+            ranged_share=args.ranged_share,
+            seed=args.seed,
+        )
+    )
+    loader = BookLoader(book, lazy=False)
+    rng = random.Random(args.seed)
+    positions = [
+        (chapter, rng.randrange(len(loader.chapters[chapter].paragraphs)))
+        for chapter in (
+            rng.randrange(len(loader.chapters)) for _ in range(args.queries)
+        )
+    ]
+    contexts = [loader.context_at(*position) for position in positions]
+    queries: List[Tuple[Optional[str], int, List[str]]] = [
+        (
+            context["chapter_title"],
+            context["offset"],
+            context["text"].lower().split(),
+        )
+        for context in contexts
+    ]
+
+    matcher = ContextMatcher(catalog)
+    matcher.add_listener(lambda result: None)
+
+    navigator = BookLoader(book, lazy=False)
+    navigator.set_tokenizer(matcher.tokenizer)
+    navigator.add_listener(matcher.update_context)
+    last_chapter = len(navigator.chapters) - 1
+    last_paragraph = len(navigator.chapters[last_chapter].paragraphs) - 1
+
+    def next_paragraph(_: int) -> None:
+        if (navigator.current_chapter, navigator.current_paragraph) == (
+            last_chapter,
+            last_paragraph,
+        ):
+            navigator.navigate_to(0, 0)
+        else:
+            navigator.next_paragraph()
+
+    search_index = build_search_index(loader.chapters, matcher.tokenizer)
+    searches = []
+    for context in contexts:
+        words = context["text"].split()
+        start = rng.randrange(max(1, len(words) - 1))
+        searches.append(" ".join(words[start : start + 2]))
+        searches.append('"' + " ".join(words[start : start + 3]) + '"')
+
+    # one schedule batch per call: every paragraph of a chapter, best few kept
+    batches = [
+        [
+            (chapter.title, paragraph.offset, matcher.tokenizer.tokens(paragraph.text))
+            for paragraph in chapter.paragraphs
+        ]
+        for chapter in loader.chapters
+    ]
+
+    def rank_chapter(call: int) -> None:
+        for query in batches[call % len(batches)]:
+            catalog.top_for_terms(*query, DEFAULT_SCHEDULE_DEPTH)[
+                :DEFAULT_SCHEDULE_DEPTH
+            ]
+
+    cases = [
+        Case("parse", lambda _: BookLoader._parse(raw), args.parse_runs, size),
+        Case(
+            "find_for_context",
+            lambda call: catalog.find_for_context(*queries[call % len(queries)]),
+            args.calls,
+        ),
+        Case(
+            "update_context",
+            lambda call: matcher.update_context(contexts[call % len(contexts)]),
+            args.calls,
+        ),
+        Case("next_paragraph", next_paragraph, args.calls),
+        Case(
+            "search",
+            lambda call: search_index.search(searches[call % len(searches)]),
+            args.calls,
+        ),
+        Case("rank_chapter", rank_chapter, args.batch_calls),
+    ]
+    if HAVE_NUMPY:
+        matrix = CatalogMatrix(catalog)
+        cases.append(
+            Case(
+                "matrix_rank_chapter",
+                lambda call: matrix.rank_many(
+                    batches[call % len(batches)], DEFAULT_SCHEDULE_DEPTH
+                ),
+                args.batch_calls,
+            )
+        )
+    return cases
+
+
+def compare(
+    results: Sequence[CaseResult],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> List[str]:
+    """Describe every case whose p50/p95 latency regressed against ``baseline``."""
+    previous = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions: List[str] = []
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        for metric in ("p50_us", "p95_us"):
+            old, new = before[metric], getattr(result, metric)
+            if old and new > old * (1 + threshold):
+                regressions.append(
+                    f"{result.name} {metric}: {old:.2f} -> {new:.2f} "
+                    f"(+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark parsing, matching and navigation on synthetic data."
+    )
+    parser.add_argument("--chapters", type=int, default=40)
+    parser.add_argument("--paragraphs", type=int, default=120)
+    parser.add_argument("--words", type=int, default=60)
+    parser.add_argument("--vocabulary", type=int, default=500)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--ranged-share", type=float, default=0.5)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--parse-runs", type=int, default=5)
+    parser.add_argument(
+        "--batch-calls",
+        type=int,
+        default=40,
+        help="Chapters ranked by the rank_chapter cases",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--profile", action="store_true", help="Print per-stage span timings"
+    )
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare with")
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        cases = build_cases(args, Path(scratch) / "synthetic.txt")
+        if args.profile:
+            TRACER.enable()
+        results = [run_case(case) for case in cases]
+
+    print(
+        f"{'case':<18} {'ops/s':>10} {'p50 us':>9} {'p95 us':>9} "
+        f"{'p99 us':>9} {'peak KiB':>9}"
+    )
+    for result in results:
+        throughput = f"  {result.mb_per_sec} MB/s" if result.mb_per_sec else ""
+        print(
+            f"{result.name:<18} {result.ops_per_sec:>10.1f} {result.p50_us:>9.2f} "
+            f"{result.p95_us:>9.2f} {result.p99_us:>9.2f} "
+            f"{result.peak_kib:>9.1f}{throughput}"
+        )
+
+    if args.profile:
+        print()
+        print(TRACER.format_summary())
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "parameters": {
+            key: value for key, value in vars(args).items() if not isinstance(value, Path)
+        },
+        "cases": [asdict(result) for result in results],
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is None:
+        return 0
+    regressions = compare(
+        results, json.loads(args.baseline.read_text()), args.threshold
+    )
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"no regressions against {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,22 +4,26 @@ from pathlib import Path
 
 from PySide6.QtWidgets import QApplication
 
-from reader_app.config.state import StateStore
-from reader_app.context_matcher import ContextMatcher
+from reader_app.config.state import DEFAULT_FLUSH_DELAY, StateStore
+from reader_app.context_matcher import DEFAULT_TOP_K, ContextMatcher
 from reader_app.image_catalog import ImageCatalog
+from reader_app.instrumentation import configure_from_env
 from reader_app.reader import BookLoader
 from reader_app.ui.main_window import MainWindow
 
 
 def main() -> None:
+    configure_from_env()
     app = QApplication([])
     root = Path(__file__).resolve().parent.parent
     book_path = root / "resources" / "sample_book.txt"
     catalog_path = root / "resources" / "sample_catalog.yaml"
     catalog = ImageCatalog.load(catalog_path)
-    book_loader = BookLoader(book_path)
-    matcher = ContextMatcher(catalog)
-    state = StateStore()
+    book_loader = BookLoader(book_path, index_cache=True, compact=True)
+    state = StateStore(flush_delay=DEFAULT_FLUSH_DELAY)
+    matcher = ContextMatcher(
+        catalog, changes_only=True, top_k=state.get("match_top_k", DEFAULT_TOP_K)
+    )
     window = MainWindow(book_loader, matcher, state, catalog_path)
     window.show()
     app.exec()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import random
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+from reader_app.image_catalog import ImageCatalogEntry
+
+WORDS = (
+    "wind frost lantern ridge moon spice carriage market shadow rail "
+    "howl mist glow merchant stall silver echo dawn night stone"
+).split()
+
+
+def vocabulary(size: int) -> List[str]:
+    """``WORDS`` followed by made-up words, ``size`` terms in total."""
+    words = list(WORDS[:size])
+    words.extend(f"term{index}" for index in range(len(words), size))
+    return words
+
+
+def chapter_title(index: int, words: Sequence[str] = WORDS) -> str:
+    return f"Chapter {index + 1} — {words[index % len(words)].title()}"
+
+
+def write_synthetic_book(
+    path: Path,
+    chapters: int,
+    paragraphs: int,
+    words: int,
+    seed: int = 0,
+    vocab: Optional[Sequence[str]] = None,
+) -> None:
+    rng = random.Random(seed)
+    vocab = vocab or WORDS
+    lines: List[str] = []
+    for chapter in range(chapters):
+        lines.append(chapter_title(chapter))
+        for _ in range(paragraphs):
+            lines.append(" ".join(rng.choice(vocab) for _ in range(words)) + ".")
+            lines.append("")
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def synthetic_entries(
+    count: int,
+    chapters: int,
+    chapter_length: int,
+    vocab: Sequence[str] = WORDS,
+    ranged_share: float = 0.5,
+    global_share: float = 0.1,
+    seed: int = 0,
+) -> List[ImageCatalogEntry]:
+    """Catalog entries spread over ``chapters`` book chapters.
+
+    ``ranged_share`` of the entries get an offset range inside a chapter of
+    ``chapter_length`` characters and ``global_share`` have no chapter at all.
+    """
+    rng = random.Random(seed)
+    entries: List[ImageCatalogEntry] = []
+    for index in range(count):
+        chapter = None
+        if chapters and rng.random() >= global_share:
+            chapter = chapter_title(rng.randrange(chapters))
+        start = end = None
+        if rng.random() < ranged_share:
+            start = rng.randrange(max(1, chapter_length))
+            end = start + rng.randrange(max(1, chapter_length // 4))
+        entries.append(
+            ImageCatalogEntry(
+                id=f"img-{index}",
+                path=Path(f"images/img-{index}.jpg"),
+                title=f"Image {index}",
+                chapter=chapter,
+                priority=rng.randint(0, 100),
+                tags=rng.sample(list(vocab), min(len(vocab), rng.randint(0, 3))),
+                keywords=rng.sample(list(vocab), min(len(vocab), rng.randint(1, 5))),
+                start_offset=start,
+                end_offset=end,
+            )
+        )
+    return entries
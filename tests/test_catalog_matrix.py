@@ -0,0 +1,108 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from reader_app.catalog_matrix import HAVE_NUMPY, CatalogMatrix
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+
+pytestmark = pytest.mark.skipif(not HAVE_NUMPY, reason="numpy is not installed")
+
+WORDS = [
+    "storm",
+    "harbor",
+    "lantern",
+    "Rain",
+    "market",
+    "wolf",
+    "dawn",
+    "sun-rise",
+    "sun",
+]
+CHAPTERS = [None, "", "Chapter 1", "Chapter 2"]
+
+
+def random_catalog(rng: random.Random, count: int) -> ImageCatalog:
+    entries = []
+    for n in range(count):
+        start = rng.choice([None, rng.randrange(0, 400)])
+        end = rng.choice([None, rng.randrange(0, 400)])
+        entries.append(
+            ImageCatalogEntry(
+                id=f"e{rng.randrange(count // 2 or 1)}",
+                path=Path(f"{n}.jpg"),
+                title=str(n),
+                chapter=rng.choice(CHAPTERS),
+                priority=rng.choice([10, 30, 50, 51, 52]),
+                tags=rng.sample(WORDS, rng.randrange(3)),
+                keywords=rng.sample(WORDS, rng.randrange(4)),
+                start_offset=start,
+                end_offset=end,
+            )
+        )
+    return ImageCatalog(entries)
+
+
+def test_matrix_ranks_exactly_like_the_catalog():
+    rng = random.Random(7)
+    catalog = random_catalog(rng, 60)
+    matrix = CatalogMatrix(catalog)
+    queries = [
+        (
+            rng.choice(CHAPTERS + ["Chapter 9"]),
+            rng.randrange(-5, 450),
+            catalog.tokenizer.tokens(" ".join(rng.sample(WORDS, rng.randrange(5)))),
+        )
+        for _ in range(300)
+    ]
+    lengths, positions = matrix.rank_many(queries)
+    assert len(lengths) == len(queries)
+    entries = catalog.entries()
+    first = 0
+    for query, length in zip(queries, lengths.tolist()):
+        expected = catalog.find_for_terms(*query)
+        ranked = positions[first : first + length].tolist()
+        first += length
+        assert [entries[position] for position in ranked] == expected
+        assert matrix.find_for_terms(*query) == expected
+    assert first == len(positions)
+
+
+def test_matrix_batches_are_split_by_cell_budget(monkeypatch):
+    from reader_app import catalog_matrix
+
+    catalog = random_catalog(random.Random(3), 20)
+    matrix = CatalogMatrix(catalog)
+    terms = frozenset({"storm", "rain"})
+    queries = [("Chapter 1", offset, terms) for offset in range(50)]
+    whole = matrix.rank_many(queries)
+    monkeypatch.setattr(catalog_matrix, "BATCH_CELL_BUDGET", 45)
+    split = matrix.rank_many(queries)
+    assert whole[0].tolist() == split[0].tolist()
+    assert whole[1].tolist() == split[1].tolist()
+    assert CatalogMatrix(ImageCatalog([])).rank("Chapter 1", 0, frozenset()) == []
+
+
+def test_limited_ranking_keeps_each_rows_best_candidates():
+    rng = random.Random(11)
+    catalog = random_catalog(rng, 80)
+    matrix = CatalogMatrix(catalog)
+    queries = [
+        (
+            rng.choice(CHAPTERS),
+            rng.randrange(0, 400),
+            catalog.tokenizer.tokens(" ".join(rng.sample(WORDS, rng.randrange(5)))),
+        )
+        for _ in range(100)
+    ]
+    full_lengths, full_positions = matrix.rank_many(queries)
+    bounds = [0] + full_lengths.cumsum().tolist()
+    for limit in (1, 3, 9):
+        lengths, positions = matrix.rank_many(queries, limit)
+        assert lengths.tolist() == [min(n, limit) for n in full_lengths.tolist()]
+        first = 0
+        for row, length in enumerate(lengths.tolist()):
+            expected = full_positions[bounds[row] : bounds[row] + length]
+            assert positions[first : first + length].tolist() == expected.tolist()
+            first += length
+    assert matrix.rank_many(queries, 0)[1].tolist() == []
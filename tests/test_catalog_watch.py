@@ -0,0 +1,134 @@
+import os
+import threading
+
+import yaml
+
+from reader_app.catalog_watch import CatalogWatcher, diff_entries
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalog
+
+ITEMS = [
+    {"id": "dawn", "path": "dawn.jpg", "title": "Dawn", "chapter": "One", "priority": 60},
+    {
+        "id": "market",
+        "path": "market.jpg",
+        "title": "Market",
+        "chapter": "Two",
+        "priority": 70,
+    },
+    {
+        "id": "ranged",
+        "path": "ranged.jpg",
+        "title": "Ranged",
+        "chapter": "One",
+        "priority": 90,
+        "start_offset": 500,
+        "end_offset": 900,
+    },
+]
+
+
+def write(path, items, bump=0):
+    path.write_text(yaml.safe_dump(items))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def ids(entries):
+    return [entry.id for entry in entries]
+
+
+def test_diff_and_incremental_apply_match_a_fresh_catalog(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write(source, ITEMS)
+    catalog = ImageCatalog.load(source)
+    edited = [dict(item) for item in ITEMS[1:]]
+    edited[0]["keywords"] = ["lantern"]
+    edited.append({"id": "new", "path": "new.jpg", "title": "New", "priority": 10})
+    write(source, edited, bump=10**9)
+
+    fresh = ImageCatalog.load(source)
+    diff = diff_entries(catalog.entries(), fresh.entries())
+    assert diff.added == ["new"]
+    assert diff.removed == ["dawn"]
+    assert diff.changed == ["market"]
+
+    version = catalog.version
+    catalog.apply_diff(diff)
+    assert catalog.version == version + 1
+    assert catalog.entries() == fresh.entries()
+    for chapter, offset, words in (("One", 600, []), ("Two", 0, ["lantern"]), (None, 0, [])):
+        assert ids(catalog.find_for_context(chapter, offset, words)) == ids(
+            fresh.find_for_context(chapter, offset, words)
+        )
+
+
+def test_matcher_reevaluates_only_affected_context(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write(source, ITEMS)
+    catalog = ImageCatalog.load(source)
+    matcher = ContextMatcher(catalog)
+    shown = []
+    matcher.add_listener(lambda result: shown.append(result.entry.id))
+    matcher.update_context({"chapter_title": "One", "text": "", "offset": 10})
+    assert shown == ["dawn"]
+
+    edited = [dict(item) for item in ITEMS]
+    edited[1]["priority"] = 99  # chapter "Two" only
+    edited[2]["priority"] = 95  # range 500-900 does not cover offset 10
+    assert not diff_entries(catalog.entries(), ImageCatalog.load(source).entries())
+    write(source, edited, bump=10**9)
+    diff = diff_entries(catalog.entries(), ImageCatalog.load(source).entries())
+    catalog.apply_diff(diff)
+    assert matcher.catalog_changed(diff) is False
+    assert shown == ["dawn"]
+
+    edited.append({"id": "late", "path": "late.jpg", "title": "Late", "priority": 80})
+    write(source, edited, bump=2 * 10**9)
+    diff = diff_entries(catalog.entries(), ImageCatalog.load(source).entries())
+    catalog.apply_diff(diff)
+    assert matcher.catalog_changed(diff) is True
+    assert shown == ["dawn", "late"]
+
+
+def test_watcher_reports_diffs_and_keeps_entries_on_parse_errors(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write(source, ITEMS)
+    diffs = []
+    errors = []
+    watcher = CatalogWatcher(
+        source, ImageCatalog.load(source).entries(), diffs.append, errors.append
+    )
+    assert watcher.poll() is None
+
+    source.write_text("- id: [unclosed\n")
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 10**9))
+    assert watcher.poll() is None
+    assert len(errors) == 1
+
+    write(source, ITEMS[:2], bump=2 * 10**9)
+    diff = watcher.poll()
+    assert diff is not None and diff.removed == ["ranged"]
+    assert diffs == [diff]
+
+
+def test_watcher_thread_delivers_off_the_calling_thread(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write(source, ITEMS)
+    delivered = threading.Event()
+    threads = []
+
+    def on_diff(diff):
+        threads.append(threading.current_thread())
+        delivered.set()
+
+    watcher = CatalogWatcher(
+        source, ImageCatalog.load(source).entries(), on_diff, interval=0.01
+    )
+    watcher.start()
+    try:
+        write(source, ITEMS[:1], bump=10**9)
+        assert delivered.wait(5)
+    finally:
+        watcher.stop()
+    assert threads[0] is not threading.current_thread()
@@ -0,0 +1,29 @@
+from reader_app.chapter_layout import (
+    document_length,
+    highlight_range,
+    paragraph_starts,
+)
+
+
+def test_paragraph_starts_follow_the_block_layout():
+    starts = paragraph_starts("Chapter 1", ["One.", "", "Three"])
+    # heading (9) + separator, then each block plus its separator
+    assert starts == [10, 15, 16, 22]
+    assert highlight_range(starts, 0) == (10, 14)
+    assert highlight_range(starts, 1) == (15, 15)
+    assert highlight_range(starts, 2) == (16, 21)
+
+
+def test_out_of_range_paragraphs_have_no_highlight():
+    starts = paragraph_starts("Title", ["Only."])
+    assert highlight_range(starts, 1) is None
+    assert highlight_range(starts, -1) is None
+    assert paragraph_starts("Empty", []) == [6]
+    assert highlight_range([6], 0) is None
+
+
+def test_positions_count_utf16_units():
+    assert document_length("café") == 4
+    assert document_length("\U0001F319 moon") == 7
+    starts = paragraph_starts("\U0001F319", ["\U0001F30A", "x"])
+    assert starts == [3, 6, 8]
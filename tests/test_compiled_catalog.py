@@ -0,0 +1,109 @@
+import os
+from pathlib import Path
+
+import yaml
+
+from reader_app.compiled_catalog import compiled_path, read_compiled
+from reader_app.image_catalog import ImageCatalog
+from reader_app.tokenizer import Tokenizer
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def write_catalog(path):
+    items = [
+        {
+            "id": "a",
+            "path": "images/a.jpg",
+            "title": "Ação",
+            "chapter": "Chapter 1 — Dawn Ride",
+            "priority": 70,
+            "tags": ["Dawn", "frost"],
+            "keywords": ["Lanterns", "Coração"],
+            "description": "First",
+            "start_offset": 0,
+            "end_offset": 120,
+        },
+        {"id": "b", "path": "images/b.jpg", "title": "B", "keywords": ["frost"]},
+        {"id": "c", "path": "images/c.jpg", "title": "C", "start_offset": 40},
+    ]
+    path.write_text(yaml.safe_dump(items, allow_unicode=True), encoding="utf-8")
+
+
+def test_compiled_catalog_round_trip(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write_catalog(source)
+    target = ImageCatalog.compile(source)
+    assert target == compiled_path(source)
+
+    from_yaml = ImageCatalog.load(source, use_compiled=False)
+    from_binary = ImageCatalog.load(source)
+    assert read_compiled(source, from_yaml.tokenizer) is not None
+    assert from_binary.entries() == from_yaml.entries()
+    for keywords in (["frost"], ["lanterns", "dawn"], ["coração"], []):
+        for chapter, offset in (("Chapter 1 — Dawn Ride", 50), (None, 10), ("X", 41)):
+            query = (chapter, offset, keywords)
+            assert [e.id for e in from_binary.find_for_context(*query)] == [
+                e.id for e in from_yaml.find_for_context(*query)
+            ]
+
+    stemmed = Tokenizer(stem=True)
+    entries, terms = read_compiled(source, stemmed)
+    assert terms is None
+    matches = ImageCatalog(entries, stemmed).find_for_context(None, 0, ["lantern"])
+    assert matches[0].id == "a"
+
+
+def test_stale_or_corrupt_compiled_catalog_falls_back_to_yaml(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    write_catalog(source)
+    target = ImageCatalog.compile(source)
+
+    source.write_text(source.read_text() + "- {id: d, path: d.jpg, title: D}\n")
+    stat = target.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns - 1))
+    assert read_compiled(source, Tokenizer()) is None
+    assert [entry.id for entry in ImageCatalog.load(source).entries()] == [
+        "a",
+        "b",
+        "c",
+        "d",
+    ]
+
+    ImageCatalog.compile(source)
+    target.write_bytes(target.read_bytes()[:-3])
+    assert read_compiled(source, Tokenizer()) is None
+    assert len(ImageCatalog.load(source).entries()) == 4
+
+
+def test_sample_catalog_compiles(tmp_path):
+    source = tmp_path / "sample.yaml"
+    source.write_bytes((ROOT / "resources" / "sample_catalog.yaml").read_bytes())
+    ImageCatalog.compile(source)
+    assert ImageCatalog.load(source).entries() == ImageCatalog.load(
+        source, use_compiled=False
+    ).entries()
+
+
+def test_null_title_survives_the_round_trip(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    source.write_text(
+        "- {id: a, path: a.jpg, title: null, keywords: [frost]}\n", encoding="utf-8"
+    )
+    ImageCatalog.compile(source)
+    entries, terms = read_compiled(source, Tokenizer())
+    assert entries[0].title is None
+    assert terms == [(frozenset({"frost"}), frozenset())]
+    assert entries == ImageCatalog.load(source, use_compiled=False).entries()
+
+
+def test_numeric_yaml_scalars_compile_as_text(tmp_path):
+    source = tmp_path / "catalog.yaml"
+    source.write_text(
+        "- {id: 42, path: a.jpg, title: 7, chapter: 3, keywords: [1999, frost]}\n",
+        encoding="utf-8",
+    )
+    ImageCatalog.compile(source)
+    entries, _ = read_compiled(source, Tokenizer())
+    assert (entries[0].id, entries[0].title, entries[0].chapter) == ("42", "7", "3")
+    assert entries == ImageCatalog.load(source, use_compiled=False).entries()
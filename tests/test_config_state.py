@@ -1,5 +1,9 @@
+import os
+import time
 from pathlib import Path
 
+import pytest
+
 from reader_app.config.state import StateStore
 
 
@@ -11,3 +15,83 @@ def test_state_store_persists(tmp_path: Path) -> None:
     reloaded = StateStore(path=path)
     assert reloaded.get("last_book") == "story.txt"
     assert reloaded.get("last_catalog") == "catalog.yaml"
+
+
+def test_write_behind_coalesces_until_flush(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    store = StateStore(path=path, flush_delay=60)
+    for paragraph in range(5):
+        store.set("last_paragraph", paragraph)
+    store.update({"last_chapter": 2, "last_book": "story.txt"})
+    assert not path.exists()
+    store.flush()
+    reloaded = StateStore(path=path)
+    assert reloaded.get("last_paragraph") == 4
+    assert reloaded.get("last_chapter") == 2
+
+
+def test_write_behind_flushes_after_idle_delay(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    store = StateStore(path=path, flush_delay=0.01)
+    store.set("last_book", "story.txt")
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert StateStore(path=path).get("last_book") == "story.txt"
+
+
+def test_failed_write_keeps_previous_session(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "state.json"
+    store = StateStore(path=path)
+    store.set("last_book", "story.txt")
+
+    def crash(*args):
+        raise OSError("disk went away")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        store.set("last_book", "other.txt")
+    assert StateStore(path=path).get("last_book") == "story.txt"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["state.json"]
+
+
+def test_positions_are_saved_per_book(tmp_path: Path) -> None:
+    path = tmp_path / "session.json"
+    store = StateStore(path=path)
+    assert store.book_offset(Path("a.txt")) is None
+    store.update_position(Path("a.txt"), 120, {"last_book": "a.txt"})
+    store.update_position(Path("b.txt"), 7)
+
+    reloaded = StateStore(path=path)
+    assert reloaded.book_offset(Path("a.txt")) == 120
+    assert reloaded.book_offset(Path("b.txt")) == 7
+    assert reloaded.get("last_book") == "a.txt"
+
+
+def test_values_mutated_after_get_are_saved(tmp_path: Path) -> None:
+    path = tmp_path / "state.json"
+    store = StateStore(path=path, flush_delay=60)
+    store.set("recent_books", ["a.txt"])
+    store.flush()
+    recent = store.get("recent_books")
+    recent.append("b.txt")
+    store.set("recent_books", recent)
+    store.flush()
+    assert StateStore(path=path).get("recent_books") == ["a.txt", "b.txt"]
+
+    before = path.stat().st_mtime_ns
+    os.utime(path, ns=(before - 10**9, before - 10**9))
+    store.set("recent_books", ["a.txt", "b.txt"])
+    store.flush()
+    assert path.stat().st_mtime_ns == before - 10**9
+
+
+def test_write_behind_stores_are_not_kept_alive(tmp_path: Path) -> None:
+    import gc
+    import weakref
+
+    store = StateStore(path=tmp_path / "state.json", flush_delay=60)
+    reference = weakref.ref(store)
+    del store
+    gc.collect()
+    assert reference() is None
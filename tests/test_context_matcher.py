@@ -70,3 +70,67 @@ def test_context_matcher_pin_selects_entry(tmp_path):
     )
     assert listener.last is not None
     assert listener.last.entry.id == "b"
+
+
+def test_context_matcher_changes_only_skips_identical_results(tmp_path):
+    entries = [
+        ImageCatalogEntry(
+            id="a",
+            path=tmp_path / "a.jpg",
+            title="A",
+            priority=50,
+            keywords=["wind"],
+        ),
+        ImageCatalogEntry(
+            id="b",
+            path=tmp_path / "b.jpg",
+            title="B",
+            priority=40,
+            start_offset=100,
+            end_offset=200,
+        ),
+    ]
+    catalog = ImageCatalog(entries)
+    matcher = ContextMatcher(catalog, changes_only=True)
+    emitted = []
+    matcher.add_listener(emitted.append)
+
+    def visit(offset, text="", force=False):
+        context = {"chapter_title": "One", "text": text, "offset": offset}
+        return matcher.update_context(context, force=force)
+
+    assert visit(0) is True
+    assert visit(10, "calm") is False
+    assert visit(150) is True  # same winner, "b" joined the fallbacks
+    assert visit(160) is False
+    assert visit(160, force=True) is True
+    matcher.pin_entry("b")
+    assert visit(170) is True
+    assert [result.entry.id for result in emitted] == ["a", "a", "a", "b"]
+    assert matcher.last_result is emitted[-1]
+
+    matcher.changes_only = False
+    assert visit(170) is True
+
+
+def test_pin_outside_top_k_and_lazy_fallbacks(tmp_path):
+    entries = [
+        ImageCatalogEntry(
+            id=f"e{n}", path=tmp_path / f"{n}.jpg", title=str(n), priority=100 - n
+        )
+        for n in range(30)
+    ]
+    matcher = ContextMatcher(ImageCatalog(entries), top_k=2)
+    context = {"chapter_title": "One", "text": "", "offset": 0}
+
+    result = matcher.match(context)
+    assert result.entry.id == "e0"
+    assert [entry.id for entry in result.fallback_candidates[:2]] == ["e1", "e2"]
+    assert [entry.id for entry in result.fallback_candidates][-1] == "e29"
+    assert len(result.fallback_candidates) == 29
+
+    matcher.pin_entry("e25")
+    pinned = matcher.match(context)
+    assert pinned.entry.id == "e25"
+    fallback_ids = [entry.id for entry in pinned.fallback_candidates]
+    assert fallback_ids == [f"e{n}" for n in range(30) if n != 25]
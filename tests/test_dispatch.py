@@ -0,0 +1,59 @@
+from reader_app.dispatch import ContextDispatcher
+from reader_app.reader import BookLoader
+
+
+def test_bursts_deliver_only_the_newest_context():
+    scheduled = []
+    dispatcher = ContextDispatcher(scheduled.append)
+    shown, processed = [], []
+    dispatcher.add_immediate(lambda context: shown.append(context["n"]))
+    dispatcher.add_deferred(lambda context: processed.append(context["n"]))
+
+    for n in range(5):
+        dispatcher.post({"n": n})
+    assert shown == [0, 1, 2, 3, 4]
+    assert processed == []
+    assert len(scheduled) == 1
+
+    assert scheduled.pop()() is True
+    assert processed == [4]
+    assert dispatcher.flush() is False
+
+    dispatcher.post({"n": 5})
+    assert len(scheduled) == 1
+    scheduled.pop()()
+    assert processed == [4, 5]
+    counters = dispatcher.counters
+    assert (counters.posted, counters.delivered, counters.coalesced) == (6, 2, 4)
+
+
+def test_discard_drops_the_pending_context():
+    scheduled = []
+    dispatcher = ContextDispatcher(scheduled.append)
+    processed = []
+    dispatcher.add_deferred(lambda context: processed.append(context["n"]))
+
+    dispatcher.post({"n": 0})
+    dispatcher.discard()
+    dispatcher.post({"n": 1})
+    assert len(scheduled) == 1
+    scheduled.pop()()
+    assert processed == [1]
+    dispatcher.discard()
+    assert dispatcher.counters.coalesced == 1
+
+
+def test_without_a_scheduler_every_context_is_delivered(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_text("Chapter 1\nOne.\nTwo.\nThree.\n", encoding="utf-8")
+    loader = BookLoader(path)
+    dispatcher = ContextDispatcher()
+    processed = []
+    dispatcher.add_deferred(lambda context: processed.append(context["text"]))
+    loader.add_listener(dispatcher.post)
+
+    loader.next_paragraph()
+    loader.next_paragraph()
+    assert processed == ["Two.", "Three."]
+    assert dispatcher.counters.coalesced == 0
+
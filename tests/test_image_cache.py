@@ -0,0 +1,38 @@
+import os
+
+from reader_app.image_cache import ImageCache, LruByteCache
+
+
+def test_lru_evicts_least_recent_past_budget():
+    cache = LruByteCache(100)
+    cache.put("a", "A", 40)
+    cache.put("b", "B", 40)
+    assert cache.get("a") == "A"
+    cache.put("c", "C", 40)
+    assert "b" not in cache
+    assert cache.used_bytes == 80
+    assert cache.stats.evictions == 1
+    cache.put("huge", "H", 500)
+    assert "huge" not in cache
+    cache.set_budget(40)
+    assert "a" not in cache and "c" in cache
+
+
+def test_image_cache_invalidates_on_mtime_change(tmp_path):
+    image_path = tmp_path / "a.png"
+    image_path.write_bytes(b"one")
+    cache = ImageCache(1000)
+    cache.store_original("a", image_path, "decoded", 100)
+    cache.store_scaled("a", image_path, (20, 10), "scaled", 50)
+    assert cache.original("a", image_path) == "decoded"
+    assert cache.scaled_variant("a", image_path, (20, 10)) == "scaled"
+    assert cache.scaled_variant("a", image_path, (40, 20)) is None
+
+    stat = image_path.stat()
+    os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert cache.scaled_variant("a", image_path, (20, 10)) is None
+    assert cache.original("a", image_path) is None
+    stats = cache.stats()
+    assert stats["originals"]["hits"] == 1
+    assert stats["scaled"]["misses"] == 2
+    assert stats["originals"]["invalidations"] == 1
@@ -0,0 +1,140 @@
+import random
+
+from reader_app.catalog_index import CatalogIndex, IntervalTree, range_bounds
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+
+CHAPTERS = ["Chapter 1", "Chapter 2", None]
+VOCABULARY = ["wind", "Rail", "frost", "lantern", "Moon", "ridge", "spice", "howl"]
+
+
+def linear_find(entries, chapter, offset, keywords):
+    matching = []
+    normalized_keywords = {k.lower() for k in keywords}
+    for entry in entries:
+        if entry.chapter and chapter and entry.chapter != chapter:
+            continue
+        if not entry.matches_range(offset):
+            continue
+        weight = entry.priority
+        weight += len(normalized_keywords & {kw.lower() for kw in entry.keywords})
+        weight += 2 * len(normalized_keywords & {tag.lower() for tag in entry.tags})
+        matching.append((weight, entry))
+    matching.sort(key=lambda pair: (-pair[0], pair[1].id))
+    return [entry for _, entry in matching]
+
+
+def random_entry(rng, index, tmp_path):
+    start = rng.choice([None, rng.randint(0, 400)])
+    end = rng.choice([None, rng.randint(0, 500)])
+    return ImageCatalogEntry(
+        id=f"img-{rng.randint(0, index)}",
+        path=tmp_path / f"{index}.jpg",
+        title=str(index),
+        chapter=rng.choice(CHAPTERS),
+        priority=rng.randint(0, 5),
+        tags=rng.sample(VOCABULARY, rng.randint(0, 3)),
+        keywords=rng.sample(VOCABULARY, rng.randint(0, 3)),
+        start_offset=start,
+        end_offset=end,
+    )
+
+
+def assert_matches_linear(catalog, rng, rounds=50):
+    for _ in range(rounds):
+        chapter = rng.choice(CHAPTERS + [""])
+        offset = rng.randint(-5, 520)
+        keywords = rng.sample(VOCABULARY, rng.randint(0, 4))
+        expected = linear_find(catalog.entries(), chapter, offset, keywords)
+        assert catalog.find_for_context(chapter, offset, keywords) == expected
+
+
+def test_find_for_context_matches_linear_scan(tmp_path):
+    rng = random.Random(7)
+    entries = [random_entry(rng, index, tmp_path) for index in range(200)]
+    assert_matches_linear(ImageCatalog(entries), rng)
+
+
+def test_index_tracks_added_and_removed_entries(tmp_path):
+    rng = random.Random(11)
+    catalog = ImageCatalog([random_entry(rng, index, tmp_path) for index in range(50)])
+    for index in range(50, 80):
+        catalog.add_entry(random_entry(rng, index, tmp_path))
+    for _ in range(10):
+        catalog.remove_entry(rng.choice(catalog.entries()).id)
+    assert_matches_linear(catalog, rng)
+
+
+def test_interval_tree_matches_matches_range(tmp_path):
+    rng = random.Random(3)
+    for _ in range(20):
+        count = rng.randint(0, 120)
+        entries = [random_entry(rng, index, tmp_path) for index in range(count)]
+        tree = IntervalTree(
+            (*range_bounds(entry), slot) for slot, entry in enumerate(entries)
+        )
+        for offset in range(-3, 510, 7):
+            expected = [
+                slot for slot, entry in enumerate(entries) if entry.matches_range(offset)
+            ]
+            assert sorted(tree.stab(offset)) == expected
+
+
+def test_covering_respects_chapter_partitions(tmp_path):
+    rng = random.Random(5)
+    entries = [random_entry(rng, index, tmp_path) for index in range(150)]
+    index = CatalogIndex(entries)
+    for chapter in CHAPTERS + [""]:
+        for offset in range(0, 500, 13):
+            expected = [
+                entry
+                for entry in entries
+                if not (entry.chapter and chapter and entry.chapter != chapter)
+                and entry.matches_range(offset)
+            ]
+            covering = index.covering(chapter, offset)
+            assert sorted(map(id, covering)) == sorted(map(id, expected))
+
+
+def test_top_for_terms_ranks_lazily_like_find_for_terms(tmp_path):
+    rng = random.Random(13)
+    catalog = ImageCatalog([random_entry(rng, index, tmp_path) for index in range(120)])
+    for _ in range(30):
+        chapter = rng.choice(CHAPTERS + [""])
+        offset = rng.randint(-5, 520)
+        terms = {word.lower() for word in rng.sample(VOCABULARY, rng.randint(0, 4))}
+        expected = catalog.find_for_terms(chapter, offset, terms)
+        for k in (0, 1, 3, 500):
+            ranked = catalog.top_for_terms(chapter, offset, terms, k)
+            assert len(ranked) == len(expected)
+            assert ranked[:k] == expected[:k]
+            assert ranked.selected == min(k, len(expected))
+            assert list(ranked) == expected
+            assert ranked == expected
+        for entry_id in {entry.id for entry in expected} | {"img-0", "missing"}:
+            best = next((entry for entry in expected if entry.id == entry_id), None)
+            assert catalog.best_with_id(chapter, offset, terms, entry_id) == best
+
+    ranked = catalog.top_for_terms(None, 0, set(), 2)
+    full = catalog.find_for_terms(None, 0, set())
+    assert ranked[5] == full[5]
+    assert ranked.selected == 6
+    assert ranked[-1] == full[-1]
+
+
+def test_top_terms_recovers_from_a_stale_rank_order(tmp_path):
+    rng = random.Random(17)
+    entries = [random_entry(rng, index, tmp_path) for index in range(40)]
+    index = CatalogIndex(entries)
+    index.top_terms(None, 0, frozenset(), 1)
+    stale = index._plain_order
+    added = ImageCatalogEntry(
+        id="late", path=tmp_path / "late.jpg", title="late", priority=9
+    )
+    index.add(added)
+    # a reader that built the order before the edit publishes it afterwards
+    index._plain_order = stale
+    ranked = index.top_terms(None, 0, frozenset(), 1)
+    assert ranked[0] == added
+    assert list(ranked) == [
+        entry for _, entry in index.rank_terms(None, 0, frozenset())
+    ]
@@ -0,0 +1,87 @@
+import struct
+from pathlib import Path
+
+from reader_app.image_catalog import ImageCatalogEntry
+from reader_app.image_check import check_file, deep_validate
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def png_bytes(width, height, payload=b""):
+    header = b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height)
+    return header + b"\x08\x06\x00\x00\x00" + payload
+
+
+def entry(entry_id, path):
+    return ImageCatalogEntry(id=entry_id, path=path, title=entry_id.title())
+
+
+def test_headers_are_decoded_without_pixels(tmp_path):
+    gif = tmp_path / "a.gif"
+    gif.write_bytes(b"GIF89a" + struct.pack("<HH", 12, 7) + b"\x00" * 20)
+    bmp = tmp_path / "a.bmp"
+    bmp.write_bytes(b"BM" + b"\x00" * 16 + struct.pack("<ii", 5, -9) + b"\x00" * 8)
+    jpeg = tmp_path / "a.jpg"
+    jpeg.write_bytes(
+        b"\xff\xd8"
+        + b"\xff\xe0" + struct.pack(">H", 6) + b"JFIF"
+        + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 30, 40) + b"\x00" * 6
+    )
+    assert (check_file(gif).format, check_file(gif).width) == ("gif", 12)
+    assert (check_file(bmp).width, check_file(bmp).height) == (5, 9)
+    result = check_file(jpeg)
+    assert (result.format, result.width, result.height, result.error) == (
+        "jpeg",
+        40,
+        30,
+        None,
+    )
+
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(b"not an image at all")
+    assert check_file(broken).error == "unrecognized image format"
+
+    for image in sorted((ROOT / "resources" / "images").glob("*.*g")):
+        assert check_file(image).error is None
+
+
+def test_deep_validate_reports_and_caches(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "a.png").write_bytes(png_bytes(4, 3))
+    (images / "copy.png").write_bytes(png_bytes(4, 3))
+    (images / "b.png").write_bytes(png_bytes(8, 8, b"b"))
+    (images / "wrong.jpg").write_bytes(png_bytes(2, 2, b"w"))
+    (images / "bad.png").write_bytes(b"garbage")
+    (images / "orphan.png").write_bytes(png_bytes(1, 1, b"o"))
+    (images / "notes.txt").write_text("not an image")
+    entries = [
+        entry("a", images / "a.png"),
+        entry("copy", images / "copy.png"),
+        entry("b", images / "b.png"),
+        entry("b-again", images / "b.png"),
+        entry("wrong", images / "wrong.jpg"),
+        entry("bad", images / "bad.png"),
+        entry("gone", images / "gone.png"),
+    ]
+    cache = tmp_path / "catalog.yaml.sgcheck"
+    seen = []
+
+    report = deep_validate(
+        entries, cache, workers=3, progress=lambda done, total: seen.append(done)
+    )
+    assert report.read == 5 and report.cached == 0
+    assert seen[-1] == 6
+    assert report.checks[(images / "b.png").resolve()].width == 8
+    assert [error.split(":")[0] for error in report.errors] == ["wrong", "bad", "gone"]
+    assert report.duplicates == [
+        [(images / "a.png").resolve(), (images / "copy.png").resolve()]
+    ]
+    assert report.orphans == [images / "orphan.png"]
+
+    (images / "b.png").write_bytes(png_bytes(9, 9, b"changed"))
+    again = deep_validate(entries, cache, roots=[tmp_path])
+    assert (again.read, again.cached) == (1, 4)
+    assert again.checks[(images / "b.png").resolve()].width == 9
+    assert again.orphans == [images / "orphan.png"]
+    assert again.errors == report.errors
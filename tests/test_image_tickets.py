@@ -0,0 +1,34 @@
+from reader_app.image_tickets import ImageTickets
+
+
+def test_each_request_supersedes_the_previous_one():
+    tickets = ImageTickets()
+    first = tickets.request()
+    assert not tickets.is_stale(first)
+    second = tickets.request()
+    assert tickets.is_stale(first)
+    assert not tickets.is_stale(second)
+
+
+def test_prefetches_never_supersede_requests_and_cancel_together():
+    tickets = ImageTickets()
+    request = tickets.request()
+    early = tickets.prefetch()
+    late = tickets.prefetch()
+    assert not tickets.is_stale(request)
+    assert not tickets.is_stale_prefetch(early)
+
+    tickets.cancel_prefetch()
+    assert tickets.is_stale_prefetch(early)
+    assert tickets.is_stale_prefetch(late)
+    assert not tickets.is_stale_prefetch(tickets.prefetch())
+    assert not tickets.is_stale(request)
+
+
+def test_close_makes_everything_stale():
+    tickets = ImageTickets()
+    request = tickets.request()
+    prefetch = tickets.prefetch()
+    tickets.close()
+    assert tickets.is_stale(request)
+    assert tickets.is_stale_prefetch(prefetch)
@@ -0,0 +1,47 @@
+import json
+
+from reader_app.instrumentation import RollingHistogram, Tracer
+
+
+def test_disabled_tracer_records_nothing():
+    tracer = Tracer()
+    first = tracer.span("stage")
+    with first:
+        pass
+    assert tracer.span("other") is first
+    assert tracer.summary() == {}
+
+
+def test_rolling_histogram_keeps_latest_window():
+    histogram = RollingHistogram(window=4)
+    for duration in (100, 1, 2, 3, 4):
+        histogram.add(duration)
+    assert histogram.count == 5
+    assert histogram.total_ns == 110
+    assert histogram.percentiles(0.5, 1.0) == [3.0, 4.0]
+
+
+def test_summary_and_chrome_trace_export(tmp_path):
+    tracer = Tracer()
+    tracer.enable(trace=True)
+    for _ in range(3):
+        with tracer.span("matcher.update_context"):
+            with tracer.span("catalog.rank"):
+                pass
+    tracer.record("image.decode", 1_000_000, 3_000_000)
+
+    summary = tracer.summary()
+    assert summary["catalog.rank"]["count"] == 3
+    assert summary["image.decode"]["p99_ms"] == 2.0
+    assert "matcher.update_context" in tracer.format_summary()
+
+    path = tmp_path / "trace.json"
+    assert tracer.export_chrome_trace(path) == 7
+    events = json.loads(path.read_text())["traceEvents"]
+    decode = next(event for event in events if event["name"] == "image.decode")
+    assert decode["ph"] == "X"
+    assert decode["cat"] == "image"
+    assert decode["dur"] == 2000.0
+
+    tracer.reset()
+    assert tracer.summary() == {}
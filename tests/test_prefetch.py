@@ -0,0 +1,114 @@
+import threading
+import time
+
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+from reader_app.prefetch import PlanWorker, Prefetcher
+from reader_app.reader import BookLoader
+
+BOOK = """Chapter 1
+The wind howled.
+Lanterns swayed in the market.
+Chapter 2
+Moonlight on the ridge.
+"""
+
+
+def make_entry(tmp_path, entry_id, chapter, keywords, priority=50):
+    return ImageCatalogEntry(
+        id=entry_id,
+        path=tmp_path / f"{entry_id}.png",
+        title=entry_id,
+        chapter=chapter,
+        priority=priority,
+        keywords=keywords,
+    )
+
+
+def test_plan_predicts_neighbors_in_reading_order(tmp_path):
+    book_path = tmp_path / "book.txt"
+    book_path.write_text(BOOK, encoding="utf-8")
+    loader = BookLoader(book_path)
+    catalog = ImageCatalog(
+        [
+            make_entry(tmp_path, "wind", "Chapter 1", ["wind"]),
+            make_entry(tmp_path, "market", "Chapter 1", ["market"]),
+            make_entry(tmp_path, "ridge", "Chapter 2", ["ridge"]),
+            make_entry(tmp_path, "quiet", "Chapter 2", [], priority=10),
+        ]
+    )
+    prefetcher = Prefetcher(ContextMatcher(catalog), depth=2, behind=1, fallbacks=1)
+
+    loader.navigate_to(0, 1)
+    assert loader.neighbor_positions(2, 1) == [(1, 0), (0, 0)]
+    planned = [entry.id for entry in prefetcher.plan(loader)]
+    assert planned == ["ridge", "wind", "quiet", "market"]
+    loader.navigate_to(1, 0)
+    assert [entry.id for entry in prefetcher.plan(loader, (0, 1))] == planned
+
+
+def test_record_shown_counts_hits_and_misses():
+    prefetcher = Prefetcher(ContextMatcher(ImageCatalog([])))
+    prefetcher.mark_issued("a")
+    prefetcher.record_shown("a", cached=True)
+    prefetcher.record_shown("b", cached=False)
+    prefetcher.record_shown("c", cached=True)
+    assert (prefetcher.stats.hits, prefetcher.stats.misses) == (1, 1)
+    assert prefetcher.stats.issued == 1
+
+
+def test_plan_worker_delivers_plans_off_the_calling_thread(tmp_path):
+    book_path = tmp_path / "book.txt"
+    book_path.write_text(BOOK, encoding="utf-8")
+    loader = BookLoader(book_path)
+    catalog = ImageCatalog([make_entry(tmp_path, "ridge", "Chapter 2", ["ridge"])])
+    prefetcher = Prefetcher(ContextMatcher(catalog), depth=1, behind=0)
+    delivered = []
+    done = threading.Event()
+
+    def deliver(generation, entries):
+        delivered.append((generation, [entry.id for entry in entries]))
+        delivered.append(threading.current_thread() is threading.main_thread())
+        done.set()
+
+    worker = PlanWorker(prefetcher, deliver)
+    generation = worker.request(loader, (0, 1))
+    assert done.wait(5)
+    worker.close()
+    assert delivered == [(generation, ["ridge"]), False]
+    assert generation == worker.latest
+
+
+def test_plan_worker_survives_a_failing_plan(tmp_path, caplog):
+    book_path = tmp_path / "book.txt"
+    book_path.write_text(BOOK, encoding="utf-8")
+    loader = BookLoader(book_path)
+    catalog = ImageCatalog([make_entry(tmp_path, "ridge", "Chapter 2", ["ridge"])])
+    prefetcher = Prefetcher(ContextMatcher(catalog), depth=1, behind=0)
+    plan = prefetcher.plan
+    calls = []
+
+    def flaky_plan(loader, origin=None):
+        calls.append(origin)
+        if len(calls) == 1:
+            raise KeyError("stale slot")
+        return plan(loader, origin)
+
+    prefetcher.plan = flaky_plan
+    delivered = []
+    done = threading.Event()
+
+    def deliver(generation, entries):
+        delivered.append((generation, [entry.id for entry in entries]))
+        done.set()
+
+    worker = PlanWorker(prefetcher, deliver)
+    worker.request(loader, (0, 0))
+    deadline = time.monotonic() + 5
+    while not calls and time.monotonic() < deadline:
+        time.sleep(0.01)
+    generation = worker.request(loader, (0, 1))
+    assert done.wait(5)
+    worker.close()
+    assert delivered == [(generation, ["ridge"])]
+    assert "prefetch plan around (0, 0) failed" in caplog.text
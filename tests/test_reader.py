@@ -0,0 +1,212 @@
+from pathlib import Path
+
+import pytest
+
+from reader_app import book_index
+from reader_app.book_index import BookIndex, sidecar_path
+from reader_app.reader import BookLoader, Chapter, Paragraph, PositionIndex
+
+RESOURCES = Path(__file__).resolve().parent.parent / "resources"
+
+TRICKY_BOOK = (
+    "﻿Preface line\r\n\r\n"
+    "  CHAPTER One\r\n"
+    "First second\x0bthird\n"
+    " \n"
+    "chapter empty\n\n\n"
+    "　Chapter Três — Ação\r"
+    "  Olá, coração.  \x1c"
+    " Chapter spaced\n"
+    "Último parágrafo fim"
+)
+
+
+def write_book(tmp_path: Path, text: str) -> Path:
+    path = tmp_path / "book.txt"
+    path.write_bytes(text.encode("utf-8"))
+    return path
+
+
+def walk(loader: BookLoader):
+    loader.navigate_to(0, 0)
+    seen = [loader.current_context()]
+    for _ in range(sum(len(chapter.paragraphs) for chapter in loader.chapters) + 2):
+        loader.next_paragraph()
+        seen.append(loader.current_context())
+    for _ in range(3):
+        loader.previous_paragraph()
+        seen.append(loader.current_context())
+    return seen
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        (RESOURCES / "sample_book.txt").read_text(encoding="utf-8"),
+        (RESOURCES / "Ziraldino.txt").read_text(encoding="utf-8"),
+        TRICKY_BOOK,
+        "",
+        "\n\n   \n",
+    ],
+)
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"lazy": True, "chapter_cache_size": 2},
+        {"lazy": False, "compact": True},
+        {"lazy": True, "compact": True, "chapter_cache_size": 2},
+        {"lazy": False, "compact": True, "index_cache": True},
+        {"lazy": True, "compact": True, "index_cache": True},
+    ],
+)
+def test_loader_modes_match_eager_parse(tmp_path, monkeypatch, source, options):
+    # tiny scan chunks exercise headings that straddle chunk boundaries
+    monkeypatch.setattr(book_index, "_SCAN_CHUNK", 5)
+    path = write_book(tmp_path, source)
+    eager = BookLoader(path, lazy=False)
+    loader = BookLoader(path, **options)
+    assert len(loader.chapters) == len(eager.chapters)
+    for chapter, eager_chapter in zip(loader.chapters, eager.chapters):
+        assert chapter == eager_chapter
+        assert list(chapter.paragraphs) == eager_chapter.paragraphs
+    if eager.chapters:
+        assert walk(loader) == walk(eager)
+    loader.close()
+
+
+def test_eager_load_decodes_utf8_whatever_the_locale(tmp_path, monkeypatch):
+    path = write_book(tmp_path, TRICKY_BOOK)
+    read_text = Path.read_text
+
+    def latin1_locale(self, encoding=None, errors=None):
+        return read_text(self, encoding=encoding or "latin-1", errors=errors)
+
+    monkeypatch.setattr(Path, "read_text", latin1_locale)
+    eager = BookLoader(path, lazy=False)
+    assert walk(eager) == walk(BookLoader(path, lazy=True))
+
+
+def test_compact_paragraphs_have_no_instance_dict(tmp_path):
+    path = write_book(tmp_path, TRICKY_BOOK)
+    paragraph = BookLoader(path, compact=True).chapters[1].paragraphs[0]
+    assert not hasattr(paragraph, "__dict__")
+    assert paragraph.text == "First"
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_index_cache_round_trips_and_skips_parsing(tmp_path, monkeypatch, lazy):
+    path = write_book(tmp_path, TRICKY_BOOK)
+    eager = BookLoader(path, lazy=False)
+    first = BookLoader(path, lazy=lazy, index_cache=True)
+    assert sidecar_path(path).exists()
+    assert list(first.chapters) == eager.chapters
+    first.close()
+
+    def fail_build(buffer):
+        raise AssertionError("index should come from the sidecar")
+
+    monkeypatch.setattr(BookIndex, "build", staticmethod(fail_build))
+    cached = BookLoader(path, lazy=lazy, index_cache=True)
+    assert list(cached.chapters) == eager.chapters
+    assert walk(cached) == walk(eager)
+    cached.close()
+
+
+def test_index_cache_rebuilds_stale_sidecar(tmp_path):
+    path = write_book(tmp_path, "Chapter 1\nOld text.\n")
+    BookLoader(path, index_cache=True)
+    path.write_bytes("Chapter 1\nNew text here.\n".encode("utf-8"))
+    loader = BookLoader(path, index_cache=True)
+    assert loader.current_context()["text"] == "New text here."
+    sidecar_path(path).write_bytes(b"garbage")
+    assert BookLoader(path, index_cache=True).chapters == loader.chapters
+
+
+@pytest.mark.parametrize("damage", ["truncate", "title"])
+def test_corrupt_sidecar_with_matching_header_is_rebuilt(tmp_path, damage):
+    path = write_book(tmp_path, TRICKY_BOOK)
+    eager = BookLoader(path, lazy=False)
+    BookLoader(path, index_cache=True).close()
+    raw = bytearray(sidecar_path(path).read_bytes())
+    if damage == "truncate":
+        del raw[-3:]
+    else:
+        title_start = book_index._HEADER.size + len(str(path.resolve()).encode())
+        raw[title_start] = 0xFF
+    sidecar_path(path).write_bytes(bytes(raw))
+    stat = path.stat()
+    key = book_index.SourceKey.for_file(path, path.read_bytes())
+    assert (key.size, key.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+    assert BookIndex.read(sidecar_path(path), key) is None
+    loader = BookLoader(path, index_cache=True)
+    assert list(loader.chapters) == eager.chapters
+    loader.close()
+
+
+def test_lazy_loader_bounds_parsed_chapters(tmp_path):
+    text = "".join(f"Chapter {n}\nParagraph {n}.\n" for n in range(10))
+    loader = BookLoader(write_book(tmp_path, text), lazy=True, chapter_cache_size=3)
+    for chapter in range(10):
+        loader.navigate_to(chapter, 0)
+    assert loader.chapters.cached_indices() == [7, 8, 9]
+    loader.navigate_to(4, 0)
+    assert loader.current_context()["text"] == "Paragraph 4."
+    loader.close()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"lazy": False},
+        {"lazy": True},
+        {"lazy": True, "compact": True, "index_cache": True},
+    ],
+)
+def test_global_offsets_round_trip(tmp_path, options):
+    text = "Chapter 1\nabc\nde\nChapter 2\nfghij\nChapter 3\nk\nlmn\n"
+    loader = BookLoader(write_book(tmp_path, text), **options)
+    assert list(loader.positions.chapter_starts) == [0, 5, 10, 14]
+    assert list(loader.positions.chapter_bounds) == [0, 2, 3, 5]
+    offsets = {(0, 0): 0, (0, 1): 3, (1, 0): 5, (2, 0): 10, (2, 1): 11}
+    for position, offset in offsets.items():
+        assert loader.global_offset(*position) == offset
+        assert loader.position_at_offset(offset) == position
+    assert loader.position_at_offset(4) == (0, 1)
+    assert loader.position_at_offset(9) == (1, 0)
+    assert loader.position_at_offset(-3) == (0, 0)
+    assert loader.position_at_offset(100) == (2, 1)
+
+    loader.navigate_to_fraction(0.5)
+    assert loader.current_context()["text"] == "fghij"
+    loader.navigate_to_fraction(1.0)
+    assert loader.current_context()["text"] == "lmn"
+    loader.navigate_to_offset(3)
+    assert loader.current_context()["text"] == "de"
+    loader.close()
+
+
+@pytest.mark.parametrize("index_cache", [False, True])
+def test_lazy_position_index_parses_no_chapter(tmp_path, index_cache):
+    text = "Chapter 1\n  Ação é\n\nvida\nChapter 2\nChapter 3\n  çà \n"
+    path = write_book(tmp_path, text)
+    loader = BookLoader(path, lazy=True, index_cache=index_cache)
+    positions = loader.positions
+    assert loader.chapters.cached_indices() == []
+    expected = PositionIndex.build(BookLoader(path, lazy=False).chapters)
+    assert list(positions.chapter_starts) == list(expected.chapter_starts)
+    assert list(positions.chapter_bounds) == list(expected.chapter_bounds)
+    loader.close()
+
+
+def test_position_index_skips_empty_chapters():
+    def chapter(*texts):
+        offsets = [sum(len(text) for text in texts[:n]) for n in range(len(texts))]
+        return Chapter("c", [Paragraph(t, o) for t, o in zip(texts, offsets)])
+
+    positions = PositionIndex.build(
+        [chapter(), chapter("ab"), chapter(), chapter(), chapter("c", "d"), chapter()]
+    )
+    assert list(positions.chapter_starts) == [0, 0, 2, 2, 2, 4, 4]
+    assert [positions.nearest_chapter(c) for c in range(6)] == [1, 1, 4, 4, 4, 4]
+    assert [positions.chapter_at(offset) for offset in range(5)] == [1, 1, 4, 4, 4]
+    assert PositionIndex.build([chapter()]).nearest_chapter(0) is None
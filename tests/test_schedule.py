@@ -0,0 +1,158 @@
+from pathlib import Path
+
+import pytest
+
+from reader_app.book_index import SourceKey
+from reader_app.catalog_matrix import HAVE_NUMPY
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+from reader_app.reader import BookLoader
+from reader_app.schedule import (
+    ImageSchedule,
+    build_schedule,
+    load_schedule,
+    schedule_path,
+    write_schedule,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def all_positions(loader):
+    for chapter_index, chapter in enumerate(loader.chapters):
+        for paragraph_index in range(len(chapter.paragraphs)):
+            yield chapter_index, paragraph_index
+
+
+def result_ids(result):
+    if result is None:
+        return None
+    return [result.entry.id] + [entry.id for entry in result.fallback_candidates]
+
+
+@pytest.fixture
+def book(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_bytes((ROOT / "resources" / "sample_book.txt").read_bytes())
+    return path
+
+
+@pytest.fixture
+def catalog():
+    return ImageCatalog.load(ROOT / "resources" / "sample_catalog.yaml")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scheduled_matches_equal_live_scoring(book, catalog, workers):
+    write_schedule(book, catalog, workers=workers)
+    schedule = load_schedule(book, catalog)
+    assert schedule is not None
+
+    loader = BookLoader(book)
+    live = ContextMatcher(catalog)
+    scheduled = ContextMatcher(catalog)
+    scheduled.attach_schedule(schedule)
+    for position in all_positions(loader):
+        context = loader.context_at(*position)
+        assert result_ids(scheduled.match(context)) == result_ids(live.match(context))
+
+    pinned = catalog.entries()[-1].id
+    live.pin_entry(pinned)
+    scheduled.pin_entry(pinned)
+    for position in all_positions(loader):
+        context = loader.context_at(*position)
+        assert result_ids(scheduled.match(context)) == result_ids(live.match(context))
+
+
+def test_schedule_is_ignored_when_book_or_catalog_change(book, catalog, tmp_path):
+    write_schedule(book, catalog, workers=1)
+    assert schedule_path(book).exists()
+
+    edited = ImageCatalog(catalog.entries()[1:])
+    assert load_schedule(book, edited) is None
+
+    matcher = ContextMatcher(catalog)
+    matcher.attach_schedule(load_schedule(book, catalog))
+    extra = ImageCatalogEntry(
+        id="extra", path=tmp_path / "extra.jpg", title="Extra", priority=1000
+    )
+    catalog.add_entry(extra)
+    context = BookLoader(book).context_at(0, 0)
+    assert matcher.match(context).entry.id == "extra"
+
+    book.write_text(book.read_text() + "\nOne more line.\n")
+    assert load_schedule(book, catalog) is None
+
+
+def test_build_schedule_rows(book, catalog):
+    schedule = build_schedule(book, catalog, workers=1)
+    loader = BookLoader(book)
+    assert len(schedule) == len(loader.chapters)
+    assert schedule.ranked(len(loader.chapters), 0) is None
+    assert schedule.ranked(0, len(loader.chapters[0].paragraphs)) is None
+    assert schedule.ranked(0, -1) is None
+
+
+@pytest.mark.skipif(not HAVE_NUMPY, reason="numpy is not installed")
+def test_vectorized_schedule_equals_per_paragraph_scoring(book, catalog):
+    vectorized = build_schedule(book, catalog, workers=1, vectorized=True)
+    scored = build_schedule(book, catalog, workers=1, vectorized=False)
+    assert list(vectorized.chapter_bounds) == list(scored.chapter_bounds)
+    assert list(vectorized.row_bounds) == list(scored.row_bounds)
+    assert list(vectorized.candidates) == list(scored.candidates)
+
+
+def test_truncated_schedule_reads_as_stale(book, catalog):
+    write_schedule(book, catalog, workers=1)
+    target = schedule_path(book)
+    target.write_bytes(target.read_bytes()[:-2])
+    key = SourceKey.for_file(book, book.read_bytes())
+    assert ImageSchedule.read(target, key, catalog.fingerprint()) is None
+    assert load_schedule(book, catalog) is None
+
+
+def test_shallow_schedule_keeps_top_candidates_and_pins(book, catalog, monkeypatch):
+    write_schedule(book, catalog, workers=1, depth=2)
+    schedule = load_schedule(book, catalog)
+    assert schedule.depth == 2
+    assert max(
+        schedule.row_bounds[row + 1] - schedule.row_bounds[row]
+        for row in range(len(schedule.row_bounds) - 1)
+    ) == 2
+
+    loader = BookLoader(book)
+    live = ContextMatcher(catalog, top_k=1)
+    scheduled = ContextMatcher(catalog, top_k=1)
+    scheduled.attach_schedule(schedule)
+    deep = ContextMatcher(catalog)
+    deep.attach_schedule(schedule)
+    pinned = catalog.entries()[-1].id
+    for position in all_positions(loader):
+        context = loader.context_at(*position)
+        # fallbacks past the stored rows continue with the live ranking
+        assert result_ids(scheduled.match(context)) == result_ids(live.match(context))
+        # a matcher ranking deeper than the stored rows scores live
+        assert result_ids(deep.match(context)) == result_ids(
+            ContextMatcher(catalog).match(context)
+        )
+
+    # leading fallbacks still come from the stored rows alone
+    ranked = []
+    top_for_terms = catalog.top_for_terms
+
+    def counted(*query):
+        ranked.append(query)
+        return top_for_terms(*query)
+
+    monkeypatch.setattr(catalog, "top_for_terms", counted)
+    for position in all_positions(loader):
+        scheduled.match(loader.context_at(*position)).fallback_candidates[:1]
+    assert ranked == []
+    monkeypatch.undo()
+
+    live.pin_entry(pinned)
+    scheduled.pin_entry(pinned)
+    for position in all_positions(loader):
+        context = loader.context_at(*position)
+        expected = live.match(context)
+        assert scheduled.match(context).entry is expected.entry
@@ -0,0 +1,132 @@
+from reader_app.book_index import SourceKey
+from reader_app.reader import BookLoader
+from reader_app.search_index import (
+    SearchIndex,
+    build_search_index,
+    load_search_index,
+    parse_query,
+    search_index_path,
+)
+from reader_app.tokenizer import Tokenizer
+
+BOOK = """Chapter 1 — Dawn
+The old lantern swung over the market.
+Rain fell on the market square, and the market was empty.
+Nothing here ends with old
+
+Chapter 2 — Night
+Lantern light spilled over the old market stalls.
+The old lantern was dark.
+"""
+
+
+def write_book(tmp_path):
+    path = tmp_path / "book.txt"
+    path.write_text(BOOK, encoding="utf-8")
+    return path
+
+
+def positions(hits):
+    return [hit.position for hit in hits]
+
+
+def test_parse_query_splits_phrases_and_words():
+    tokenizer = Tokenizer()
+    assert parse_query('Old "the LANTERN" "rain" market', tokenizer) == [
+        ["old"],
+        ["the", "lantern"],
+        ["rain"],
+        ["market"],
+    ]
+    assert parse_query('"open phrase', tokenizer) == [["open", "phrase"]]
+
+
+def test_word_and_phrase_queries(tmp_path):
+    loader = BookLoader(write_book(tmp_path))
+    index = build_search_index(loader.chapters, Tokenizer())
+    assert len(index) == 5
+
+    market = index.search("market")
+    assert positions(market)[0] == (0, 1)  # two mentions outrank one
+    assert sorted(positions(market)) == [(0, 0), (0, 1), (1, 0)]
+    assert [hit.score for hit in market] == sorted(
+        (hit.score for hit in market), reverse=True
+    )
+
+    # the shorter paragraph ranks first
+    assert positions(index.search('"old lantern"')) == [(1, 1), (0, 0)]
+    assert positions(index.search('"old market"')) == [(1, 0)]
+    # "old" ends one paragraph and "lantern" starts the next: not a phrase
+    assert index.search('"old lantern light"') == []
+    assert positions(index.search('"old lantern" dark')) == [(1, 1), (0, 0)]
+    assert index.search("missing") == []
+    assert index.search('"market missing"') == []
+    assert len(index.search("the", limit=2)) == 2
+
+    loader.navigate_to(*index.search("dark")[0].position)
+    assert loader.current_context()["text"] == "The old lantern was dark."
+
+
+def test_index_persists_next_to_the_book(tmp_path):
+    path = write_book(tmp_path)
+    tokenizer = Tokenizer()
+    built = load_search_index(path, tokenizer)
+    target = search_index_path(path)
+    assert target.exists()
+    key = SourceKey.for_file(path, path.read_bytes())
+    stored = SearchIndex.read(target, key, tokenizer)
+    assert stored is not None
+    for query in ("market", '"old lantern" dark', "the lantern"):
+        assert stored.search(query) == built.search(query)
+
+    assert SearchIndex.read(target, key, Tokenizer(stem=True)) is None
+    stemmed = load_search_index(path, Tokenizer(stem=True))
+    assert positions(stemmed.search("lanterns")) == positions(built.search("lantern"))
+
+    path.write_text(BOOK + "The lantern returns.\n", encoding="utf-8")
+    fresh_key = SourceKey.for_file(path, path.read_bytes())
+    assert SearchIndex.read(target, fresh_key, Tokenizer(stem=True)) is None
+    assert (1, 2) in positions(load_search_index(path, tokenizer).search("returns"))
+
+
+def test_damaged_index_is_rebuilt(tmp_path):
+    path = write_book(tmp_path)
+    tokenizer = Tokenizer()
+    built = load_search_index(path, tokenizer)
+    target = search_index_path(path)
+    key = SourceKey.for_file(path, path.read_bytes())
+    raw = target.read_bytes()
+    for damaged in (raw[:-5], raw[:-4], raw.replace(b"lantern", b"\xfflntern")):
+        target.write_bytes(damaged)
+        assert SearchIndex.read(target, key, tokenizer) is None
+        rebuilt = load_search_index(path, tokenizer)
+        assert rebuilt.search('"old lantern"') == built.search('"old lantern"')
+
+
+def test_search_stays_fast_on_a_large_book(tmp_path):
+    import random
+    import time
+
+    rng = random.Random(5)
+    words = [f"w{n}" for n in range(400)] + ["the"] * 40 + ["old", "lantern"]
+    lines = []
+    for chapter in range(20):
+        lines.append(f"Chapter {chapter + 1}")
+        lines.extend(" ".join(rng.choices(words, k=12)) for _ in range(999))
+        lines.append("the old lantern " + " ".join(rng.choices(words, k=9)))
+    path = tmp_path / "large.txt"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    index = build_search_index(BookLoader(path).chapters, Tokenizer())
+    assert len(index) == 20000
+
+    for query in ("the", "the old lantern", '"old lantern" the', '"the the" w1'):
+        started = time.perf_counter()
+        hits = index.search(query)
+        elapsed = time.perf_counter() - started
+        assert hits
+        assert elapsed < 0.5, f"{query!r} took {elapsed:.3f}s"
+        scores = [hit.score for hit in hits]
+        assert scores == sorted(scores, reverse=True)
+        for better, worse in zip(hits, hits[1:]):
+            if better.score == worse.score:
+                assert better.position < worse.position
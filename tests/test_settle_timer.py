@@ -0,0 +1,23 @@
+from reader_app.settle_timer import SettleTimer
+
+
+def test_settle_timer_runs_once_after_the_last_restart():
+    scheduled = []
+    settled = []
+    timer = SettleTimer(scheduled.append, lambda: settled.append(len(scheduled)))
+
+    for _ in range(4):
+        timer.start()
+    assert timer.is_active()
+    for wake in scheduled[:3]:
+        wake()
+    assert settled == []
+    scheduled[3]()
+    assert settled == [4]
+    assert not timer.is_active()
+    assert timer.fired == 1
+
+    timer.start()
+    timer.stop()
+    scheduled[-1]()
+    assert settled == [4]
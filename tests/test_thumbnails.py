@@ -0,0 +1,74 @@
+import os
+
+from reader_app.thumbnails import Thumbnail, ThumbnailStore, level_sizes, pick_level
+
+
+def test_level_sizes_keep_aspect_and_skip_upscales():
+    assert level_sizes(4000, 3000, (256, 1024, 512)) == [
+        (256, 192),
+        (512, 384),
+        (1024, 768),
+    ]
+    assert level_sizes(300, 900, (256, 512, 2048)) == [(85, 256), (171, 512)]
+    assert level_sizes(200, 100, (256,)) == []
+
+
+def test_pick_level_prefers_smallest_covering_version(tmp_path):
+    levels = [
+        Thumbnail(tmp_path / "256.jpg", 256, 192),
+        Thumbnail(tmp_path / "1024.jpg", 1024, 768),
+        Thumbnail(tmp_path / "512.jpg", 512, 384),
+    ]
+    assert pick_level(levels, (400, 300)).width == 512
+    assert pick_level(levels, (500, 385)).width == 1024
+    assert pick_level(levels, (256, 192)).width == 256
+    assert pick_level(levels, (1200, 100)) is None
+
+
+def test_store_is_content_addressed(tmp_path):
+    store = ThumbnailStore(tmp_path / "cache")
+    image = tmp_path / "a.png"
+    image.write_bytes(b"pixels")
+    copy = tmp_path / "copy.png"
+    copy.write_bytes(b"pixels")
+    digest = store.digest_for(image)
+    assert digest == store.digest_for(copy)
+    assert store.levels(digest) is None
+    assert store.lookup(image, (10, 10)) is None
+
+    directory = store.directory(digest)
+    directory.mkdir(parents=True)
+    level = Thumbnail(directory / "64x32.jpg", 64, 32)
+    level.path.write_bytes(b"small")
+    store.write_manifest(digest, [level])
+    assert ThumbnailStore(tmp_path / "cache").lookup(copy, (60, 30)) == level
+    assert store.lookup(image, (65, 30)) is None
+
+    image.write_bytes(b"edited pixels")
+    stat = image.stat()
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert store.digest_for(image) != digest
+    assert store.lookup(image, (60, 30)) is None
+
+    level.path.unlink()
+    assert store.lookup(copy, (60, 30)) is None
+
+
+def test_digests_persist_until_the_file_changes(tmp_path, monkeypatch):
+    from reader_app import thumbnails
+
+    image = tmp_path / "image.jpg"
+    image.write_bytes(b"pixels")
+    store = ThumbnailStore(tmp_path / "cache")
+    digest = store.digest_for(image)
+    store.save_digests()
+
+    def no_hashing(path):
+        raise AssertionError(f"{path} hashed again")
+
+    monkeypatch.setattr(thumbnails, "content_digest", no_hashing)
+    assert ThumbnailStore(tmp_path / "cache").digest_for(image) == digest
+
+    monkeypatch.undo()
+    image.write_bytes(b"other pixels")
+    assert ThumbnailStore(tmp_path / "cache").digest_for(image) != digest
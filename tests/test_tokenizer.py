@@ -0,0 +1,116 @@
+import unicodedata
+
+from reader_app.context_matcher import ContextMatcher
+from reader_app.image_catalog import ImageCatalog, ImageCatalogEntry
+from reader_app.reader import BookLoader
+from reader_app.tokenizer import Tokenizer, light_stem
+
+
+def test_tokens_strip_punctuation_quotes_and_dashes():
+    tokens = Tokenizer().tokens("“Wind—rain!” said Mara's «friend»; (spice-laden) STRASSE…")
+    assert tokens == {
+        "wind",
+        "rain",
+        "said",
+        "mara",
+        "s",
+        "friend",
+        "spice",
+        "laden",
+        "strasse",
+    }
+    assert Tokenizer().tokens("Straße") == {"strasse"}
+
+
+def test_accent_folding_and_composition():
+    decomposed = "coração"
+    assert Tokenizer().tokens(decomposed) == {"coração"}
+    assert Tokenizer(fold_accents=True).tokens("Coração, ÁGUA") == {"coracao", "agua"}
+
+
+def test_light_stem():
+    assert light_stem("lanterns") == "lantern"
+    assert light_stem("stories") == "story"
+    assert light_stem("howling") == "howl"
+    assert light_stem("glass") == "glass"
+    assert light_stem("red") == "red"
+    tokenizer = Tokenizer(stem=True)
+    assert tokenizer.tokens("Lanterns glimmered") == {"lantern", "glimmer"}
+
+
+def test_catalog_terms_use_the_same_tokenizer(tmp_path):
+    tokenizer = Tokenizer(fold_accents=True, stem=True)
+    entries = [
+        ImageCatalogEntry(
+            id="river",
+            path=tmp_path / "river.jpg",
+            title="River",
+            priority=10,
+            keywords=["Coração", "lantern"],
+        ),
+        ImageCatalogEntry(id="plain", path=tmp_path / "plain.jpg", title="Plain"),
+    ]
+    matcher = ContextMatcher(ImageCatalog(entries, tokenizer))
+    result = matcher.match(
+        {"chapter_title": "", "text": "O coracao—and the lanterns!", "offset": 0}
+    )
+    assert result is not None
+    assert [result.entry.id] + [e.id for e in result.fallback_candidates] == [
+        "plain",
+        "river",
+    ]
+    matcher.pin_entry("river")
+    assert matcher.match({"chapter_title": "", "text": "", "offset": 0}).entry.id == (
+        "river"
+    )
+    ranked = matcher.catalog.find_for_terms(None, 0, {"coracao", "lantern"})
+    assert ranked == matcher.catalog.find_for_context(None, 0, ["CORAÇÃO", "Lanterns"])
+
+
+
+def test_multi_word_catalog_terms_need_every_word(tmp_path):
+    tokenizer = Tokenizer()
+    assert tokenizer.normalize(" Sun-Rise ") == "sun rise"
+    assert tokenizer.normalize("king's") == "king s"
+    entries = [
+        ImageCatalogEntry(
+            id="dawn",
+            path=tmp_path / "dawn.jpg",
+            title="Dawn",
+            priority=47,
+            keywords=["sun-rise"],
+            tags=["king's"],
+        ),
+        ImageCatalogEntry(
+            id="plain", path=tmp_path / "plain.jpg", title="Plain", priority=49
+        ),
+    ]
+    catalog = ImageCatalog(entries, tokenizer)
+    matcher = ContextMatcher(catalog)
+
+    def winner(text):
+        context = {"chapter_title": "", "text": text, "offset": 0}
+        return matcher.match(context).entry.id
+
+    assert winner("The sun-rise over the king's hall.") == "dawn"
+    # "sun-rise" alone is one point short of the plain entry
+    assert winner("Rise, sun!") == "plain"
+    assert winner("Rise, sun! The king's hall.") == "dawn"
+    assert winner("The sun was gone.") == "plain"
+    catalog.remove_entry("dawn")
+    catalog.add_entry(entries[0])
+    assert winner("Sun rise; king's men.") == "dawn"
+
+def test_loader_caches_tokens_per_paragraph(tmp_path):
+    book = tmp_path / "book.txt"
+    book.write_text("Chapter 1\n“Wind,” she said.\nRain—again.\n", encoding="utf-8")
+    loader = BookLoader(book)
+    assert "tokens" not in loader.current_context()
+
+    loader.set_tokenizer(Tokenizer(), cache_size=1)
+    first = loader.current_context()["tokens"]
+    assert first == {"wind", "she", "said"}
+    assert loader.context_at(0, 0)["tokens"] is first
+    loader.next_paragraph()
+    assert loader.current_context()["tokens"] == {"rain", "again"}
+    assert loader.context_at(0, 0)["tokens"] is not first
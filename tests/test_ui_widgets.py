@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PySide6.QtWidgets")
+
+from reader_app.reader import Chapter, Paragraph  # noqa: E402
+from reader_app.ui.chapter_view import ChapterView  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def test_chapter_view_maps_paragraphs_to_blocks(app):
+    texts = ["The wind howled.", "\U0001F319 over the ridge.", "", "Dawn."]
+    chapter = Chapter(
+        "Chapter 1", [Paragraph(text, n * 20) for n, text in enumerate(texts)]
+    )
+    browser = QtWidgets.QTextBrowser()
+    view = ChapterView(browser)
+
+    view.show(("book", 0), chapter, 1)
+    document = browser.document()
+    for index, text in enumerate(texts):
+        assert document.findBlock(view._starts[index]).text() == text
+    selection = browser.extraSelections()[0].cursor
+    assert selection.selectedText() == texts[1]
+
+    view.show(("book", 0), chapter, 3)
+    assert view.rebuilds == 1
+    assert browser.extraSelections()[0].cursor.selectedText() == "Dawn."
+    view.show(("book", 0), chapter, 9)
+    assert browser.extraSelections() == []
+    view.invalidate()
+    view.show(("book", 0), chapter, 0)
+    assert view.rebuilds == 2